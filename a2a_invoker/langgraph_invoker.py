@@ -1,5 +1,6 @@
 import asyncio
 import os
+import time
 import uuid
 from typing import TypedDict
 
@@ -20,13 +21,21 @@ from a2a.utils import get_message_text
 from langchain_core.runnables import RunnableLambda
 from langgraph.graph import END, StateGraph
 
+import codec
+from resilience import CircuitOpenError, http_resilience
+
 DEFAULT_AGENT_BASE_URL = "http://localhost:8001"
 DEFAULT_AGENT_PATH = "/calculator"
+DEFAULT_AGENT_TIMEOUT = 60.0
+CARD_TIMEOUT = 10.0
+DEADLINE_HEADER = "X-Request-Timeout"
 
 
 class A2AState(TypedDict, total=False):
     prompt: str
     rpc_url: str
+    # time.monotonic() deadline shared by discovery and invocation.
+    deadline: float
     result: str
     error: str
 
@@ -58,6 +67,16 @@ def _resolve_urls() -> tuple[str, str]:
     return rpc_url, card_url
 
 
+def _resolve_replica_urls() -> list[str]:
+    """Further agent URLs (like AGENT_RPC_URL) to fail over and hedge to."""
+    urls = os.getenv("AGENT_REPLICA_URLS", "")
+    return [_ensure_trailing_slash(url.strip()) for url in urls.split(",") if url.strip()]
+
+
+def _resolve_deadline() -> float:
+    return time.monotonic() + float(os.getenv("AGENT_TIMEOUT", DEFAULT_AGENT_TIMEOUT))
+
+
 def _resolve_rpc_url_from_card(card: AgentCard, fallback_url: str) -> str:
     preferred = (card.preferred_transport or "JSONRPC").upper()
     if card.additional_interfaces:
@@ -84,14 +103,27 @@ def _extract_text_from_parts(parts: list[Part]) -> str:
 
 async def _discover_agent(state: A2AState) -> A2AState:
     rpc_url, card_url = _resolve_urls()
+    endpoints = [card_url] + [f"{url}.well-known/agent-card.json" for url in _resolve_replica_urls()]
+    if "deadline" not in state:
+        state = {**state, "deadline": _resolve_deadline()}
+    deadline = min(state["deadline"], time.monotonic() + CARD_TIMEOUT)
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(card_url)
-            response.raise_for_status()
-            card = AgentCard.model_validate(response.json())
+        async with httpx.AsyncClient(timeout=httpx.Timeout(CARD_TIMEOUT, connect=5.0)) as client:
+            async def fetch(url: str) -> httpx.Response:
+                response = await client.get(url)
+                response.raise_for_status()
+                return response
+
+            # Idempotent, so a slow replica is hedged.
+            response = await http_resilience(endpoints).call(
+                fetch, idempotent=True, key="agent_card", deadline=deadline
+            )
+            card = AgentCard.model_validate(codec.loads(response.content))
         rpc_url = _resolve_rpc_url_from_card(card, rpc_url)
         return {**state, "rpc_url": rpc_url}
-    except httpx.HTTPError as exc:
+    except TimeoutError:
+        return {**state, "rpc_url": rpc_url, "error": "Agent card error: timed out"}
+    except (httpx.HTTPError, CircuitOpenError) as exc:
         return {**state, "rpc_url": rpc_url, "error": f"Agent card error: {exc}"}
 
 
@@ -106,14 +138,30 @@ async def _invoke_agent(state: A2AState) -> A2AState:
         id=str(uuid.uuid4()),
         params=MessageSendParams(message=message),
     )
-    payload = request.model_dump(mode="json", exclude_none=True)
+    payload = codec.dumps(request.model_dump(mode="json", exclude_none=True))
 
+    # Not idempotent: only retried (on the next replica) when unsent.
+    endpoints = [rpc_url] + _resolve_replica_urls()
+    deadline = state.get("deadline") or _resolve_deadline()
     try:
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            response = await client.post(rpc_url, json=payload)
-            response.raise_for_status()
-            parsed = SendMessageResponse.model_validate(response.json()).root
-    except httpx.HTTPError as exc:
+        async with httpx.AsyncClient() as client:
+            async def send(url: str) -> httpx.Response:
+                # The agent is told how much of the deadline is left.
+                left = max(deadline - time.monotonic(), 0.0)
+                response = await client.post(
+                    url,
+                    content=payload,
+                    headers={"Content-Type": "application/json", DEADLINE_HEADER: f"{left:.3f}"},
+                    timeout=httpx.Timeout(left, connect=min(5.0, left)),
+                )
+                response.raise_for_status()
+                return response
+
+            response = await http_resilience(endpoints).call(send, key="message/send", deadline=deadline)
+            parsed = SendMessageResponse.model_validate(codec.loads(response.content)).root
+    except TimeoutError:
+        return {**state, "error": "Error invoking agent: timed out"}
+    except (httpx.HTTPError, CircuitOpenError) as exc:
         return {**state, "error": f"Error invoking agent: {exc}"}
 
     if isinstance(parsed, JSONRPCErrorResponse):
@@ -3,6 +3,7 @@ import asyncio
 import httpx
 import sys
 import os
+import time
 import uuid
 
 from a2a.types import (
@@ -19,8 +20,16 @@ from a2a.types import (
 )
 from a2a.utils import get_message_text
 
+import codec
+from resilience import CircuitOpenError, http_resilience
+
 DEFAULT_AGENT_BASE_URL = "http://localhost:8001"
 DEFAULT_AGENT_PATH = "/calculator"
+DEFAULT_AGENT_TIMEOUT = 60.0
+CARD_TIMEOUT = 10.0
+# Tells the agent how many seconds the invoker will still wait, so it can
+# pass the budget on to its tool calls and give up once it is spent.
+DEADLINE_HEADER = "X-Request-Timeout"
 
 
 def _normalize_path(path: str) -> str:
@@ -52,6 +61,17 @@ def _resolve_agent_urls() -> tuple[str, str, str, str]:
     return base.rstrip("/"), _normalize_path(path), rpc_url, card_url
 
 
+def _resolve_replica_urls() -> list[str]:
+    """Further agent URLs (like AGENT_RPC_URL) to fail over and hedge to."""
+    urls = os.getenv("AGENT_REPLICA_URLS", "")
+    return [url.strip().rstrip("/") for url in urls.split(",") if url.strip()]
+
+
+def _resolve_deadline() -> float:
+    """Deadline (a `time.monotonic()` value) for one invocation, from AGENT_TIMEOUT seconds."""
+    return time.monotonic() + float(os.getenv("AGENT_TIMEOUT", DEFAULT_AGENT_TIMEOUT))
+
+
 def _resolve_rpc_url_from_card(card: AgentCard, fallback_url: str) -> str:
     preferred = (card.preferred_transport or "JSONRPC").upper()
     if card.additional_interfaces:
@@ -79,8 +99,12 @@ def _extract_text_from_parts(parts: list[Part]) -> str:
 def _ensure_trailing_slash(url: str) -> str:
     return url if url.endswith("/") else f"{url}/"
 
-async def get_agent_card() -> AgentCard | None:
-    """Fetch and parse the Agent Card using A2A types."""
+async def get_agent_card(deadline: float | None = None) -> AgentCard | None:
+    """
+    Fetch and parse the Agent Card using A2A types.
+
+    Gives up after 10 s, or at `deadline` (a `time.monotonic()` value) if sooner.
+    """
     _base, _path, _rpc_url, card_url = _resolve_agent_urls()
     url = card_url
     print(f"Fetching Agent Card from {card_url}...")
@@ -89,11 +113,21 @@ async def get_agent_card() -> AgentCard | None:
     if token:
         headers["Authorization"] = f"Bearer {token}"
         
-    async with httpx.AsyncClient(timeout=10.0) as client:
-        try:
-            response = await client.get(card_url, headers=headers)
+    # Fetching the card is idempotent, so a slow replica is hedged.
+    endpoints = [card_url] + [f"{url}/.well-known/agent-card.json" for url in _resolve_replica_urls()]
+    deadline = min(deadline or float("inf"), time.monotonic() + CARD_TIMEOUT)
+
+    async with httpx.AsyncClient(timeout=httpx.Timeout(CARD_TIMEOUT, connect=5.0)) as client:
+        async def fetch(url: str) -> httpx.Response:
+            response = await client.get(url, headers=headers)
             response.raise_for_status()
-            card_data = response.json()
+            return response
+
+        try:
+            response = await http_resilience(endpoints).call(
+                fetch, idempotent=True, key="agent_card", deadline=deadline
+            )
+            card_data = codec.loads(response.content)
             
             # Display the raw card data
             print("--- Agent Card ---")
@@ -104,12 +138,21 @@ async def get_agent_card() -> AgentCard | None:
             print("------------------\n")
             
             return AgentCard.model_validate(card_data)
-        except httpx.HTTPError as e:
+        except TimeoutError:
+            print("Error fetching agent card: timed out")
+            return None
+        except (httpx.HTTPError, CircuitOpenError) as e:
             print(f"Error fetching agent card: {e}")
             return None
 
-async def invoke_agent(prompt: str, rpc_url: str | None = None):
-    """Invoke the agent via A2A protocol."""
+async def invoke_agent(prompt: str, rpc_url: str | None = None, deadline: float | None = None):
+    """
+    Invoke the agent via A2A protocol.
+
+    `deadline` (a `time.monotonic()` value, by default AGENT_TIMEOUT seconds
+    from now) bounds the call and its retries; the agent is told how much of
+    it is left on each attempt.
+    """
     _base, _path, fallback_url, _card_url = _resolve_agent_urls()
     url = _ensure_trailing_slash(rpc_url or fallback_url)
     print(f"Invoking Agent at {url} with prompt: '{prompt}'")
@@ -123,20 +166,36 @@ async def invoke_agent(prompt: str, rpc_url: str | None = None):
         id=str(uuid.uuid4()),
         params=MessageSendParams(message=message),
     )
-    payload = request.model_dump(mode="json", exclude_none=True)
+    payload = codec.dumps(request.model_dump(mode="json", exclude_none=True))
     
-    headers = {}
+    headers = {"Content-Type": "application/json"}
     token = os.getenv("MCP_TOKEN")
     if token:
         headers["Authorization"] = f"Bearer {token}"
     else:
         print("Warning: MCP_TOKEN not set. Invocation may fail.")
 
-    async with httpx.AsyncClient(timeout=60.0) as client:
-        try:
-            response = await client.post(url, json=payload, headers=headers)
+    # message/send is not idempotent: it is only retried (on the next
+    # replica) when the request never reached the agent.
+    endpoints = [url] + [_ensure_trailing_slash(replica) for replica in _resolve_replica_urls()]
+    if deadline is None:
+        deadline = _resolve_deadline()
+
+    async with httpx.AsyncClient() as client:
+        async def send(endpoint: str) -> httpx.Response:
+            left = max(deadline - time.monotonic(), 0.0)
+            response = await client.post(
+                endpoint,
+                content=payload,
+                headers={**headers, DEADLINE_HEADER: f"{left:.3f}"},
+                timeout=httpx.Timeout(left, connect=min(5.0, left)),
+            )
             response.raise_for_status()
-            data = response.json()
+            return response
+
+        try:
+            response = await http_resilience(endpoints).call(send, key="message/send", deadline=deadline)
+            data = codec.loads(response.content)
             print(f"Response: {data}")
             
             parsed = SendMessageResponse.model_validate(data).root
@@ -167,7 +226,9 @@ async def invoke_agent(prompt: str, rpc_url: str | None = None):
             
             return "No response content found."
             
-        except httpx.HTTPError as e:
+        except TimeoutError:
+            return "Error invoking agent: timed out"
+        except (httpx.HTTPError, CircuitOpenError) as e:
             return f"Error invoking agent: {e}"
 
 async def main():
@@ -176,15 +237,18 @@ async def main():
     else:
         prompt = " ".join(sys.argv[1:])
 
+    # One deadline covers discovery and the invocation.
+    deadline = _resolve_deadline()
+
     # 1. Get Agent Card (demonstrates A2A discovery)
-    card = await get_agent_card()
+    card = await get_agent_card(deadline)
     _base, _path, fallback_url, _card_url = _resolve_agent_urls()
     rpc_url = fallback_url
     if card:
         rpc_url = _resolve_rpc_url_from_card(card, fallback_url)
     
     # 2. Invoke Agent
-    result = await invoke_agent(prompt, rpc_url=rpc_url)
+    result = await invoke_agent(prompt, rpc_url=rpc_url, deadline=deadline)
     print(f"\nResult from Agent:\n{result}")
 
 if __name__ == "__main__":
@@ -45,9 +45,7 @@ async def test_get_agent_card_success():
             )
         ],
     )
-    mock_response.json.return_value = card.model_dump(
-        mode="json", exclude_none=True
-    )
+    mock_response.content = card.model_dump_json(exclude_none=True).encode()
     mock_response.raise_for_status = MagicMock()
     
     with patch("httpx.AsyncClient") as mock_client_class:
@@ -104,9 +102,7 @@ async def test_invoke_agent_success():
     success = SendMessageSuccessResponse(id="req-1", result=task)
 
     mock_response = MagicMock()
-    mock_response.json.return_value = success.model_dump(
-        mode="json", exclude_none=True
-    )
+    mock_response.content = success.model_dump_json(exclude_none=True).encode()
     mock_response.raise_for_status = MagicMock()
     
     with patch("httpx.AsyncClient") as mock_client_class:
@@ -158,9 +154,7 @@ async def test_invoke_agent_no_assistant_message():
     success = SendMessageSuccessResponse(id="req-1", result=task)
 
     mock_response = MagicMock()
-    mock_response.json.return_value = success.model_dump(
-        mode="json", exclude_none=True
-    )
+    mock_response.content = success.model_dump_json(exclude_none=True).encode()
     mock_response.raise_for_status = MagicMock()
     
     with patch("httpx.AsyncClient") as mock_client_class:
@@ -173,3 +167,41 @@ async def test_invoke_agent_no_assistant_message():
         result = await invoke_agent("Test prompt")
         
         assert result == "No response content found."
+
+@pytest.mark.asyncio
+async def test_invoke_agent_fails_over_to_replica(monkeypatch):
+    """Test an unreachable agent is retried on a replica."""
+    from main import invoke_agent
+
+    monkeypatch.setenv("AGENT_RPC_URL", "http://agent-a/calculator")
+    monkeypatch.setenv("AGENT_REPLICA_URLS", "http://agent-b/calculator")
+    agent_message = Message(
+        message_id="msg-agent",
+        role=Role.agent,
+        parts=[Part(root=TextPart(text="The result is 42"))],
+    )
+    mock_response = MagicMock()
+    mock_response.content = SendMessageSuccessResponse(id="req-1", result=agent_message).model_dump_json(
+        exclude_none=True
+    ).encode()
+    mock_response.raise_for_status = MagicMock()
+
+    async def post(url, **kwargs):
+        if url.startswith("http://agent-a/"):
+            raise httpx.ConnectError("Connection refused")
+        return mock_response
+
+    with patch("httpx.AsyncClient") as mock_client_class, patch("resilience.backoff", return_value=0):
+        mock_client = AsyncMock()
+        mock_client.__aenter__.return_value = mock_client
+        mock_client.__aexit__.return_value = None
+        mock_client.post = AsyncMock(side_effect=post)
+        mock_client_class.return_value = mock_client
+
+        result = await invoke_agent("Calculate 6 * 7")
+
+        assert result == "The result is 42"
+        assert [call.args[0] for call in mock_client.post.call_args_list] == [
+            "http://agent-a/calculator/",
+            "http://agent-b/calculator/",
+        ]
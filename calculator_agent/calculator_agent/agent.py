@@ -1,22 +1,28 @@
+import functools
 import logging
 import os
-from google.adk import Agent
-from google.adk.models import Gemini
-from google.adk.tools.mcp_tool.mcp_session_manager import (
-    StreamableHTTPConnectionParams,
-)
-from google.adk.tools.mcp_tool.mcp_toolset import McpToolset
+from typing import TYPE_CHECKING
 
 from . import config
-from .patches import apply_patches
 from .context import token_context
 
-# Apply monkey patches at import time
-apply_patches()
+# google.adk and the model backends are imported where they are used, so the
+# CLI (and anything else importing this module) only pays for what it runs.
+if TYPE_CHECKING:
+    from google.adk import Agent
+    from google.adk.apps import App
 
 logger = logging.getLogger(__name__)
 
 
+# Asks the model to batch independent calculations into one turn; ADK runs
+# the function calls of a turn concurrently over the pooled MCP session.
+PARALLEL_TOOL_CALLS_INSTRUCTION = (
+    "When a request needs several independent calculations, call all of the "
+    "tools it needs in a single turn instead of one at a time."
+)
+
+
 class AgentError(Exception):
     """Base exception for agent errors."""
     pass
@@ -66,6 +72,10 @@ def _build_model():
             kwargs["api_key"] = final_api_key
             os.environ.setdefault("OPENAI_API_KEY", final_api_key)
             logger.info("Using custom LLM API key for LiteLLM.")
+
+        if config.LLM_PARALLEL_TOOL_CALLS:
+            # OpenAI-compatible servers may otherwise return one call per turn.
+            kwargs["parallel_tool_calls"] = True
             
         return LiteLlm(model=model_name, **kwargs)
 
@@ -75,10 +85,34 @@ def _build_model():
         os.environ.setdefault("GOOGLE_API_KEY", api_key)
     elif not (os.environ.get("GEMINI_API_KEY") or os.environ.get("GOOGLE_API_KEY")):
         logger.warning("API_KEY not set for Gemini.")
-        
+
+    from google.adk.models import Gemini
+
     return Gemini(model=model_name)
 
 
+@functools.cache
+def get_model():
+    """
+    Returns the configured model, built once per process.
+
+    Model configuration is fixed for the process lifetime, so every agent
+    shares one model (and its underlying client) instead of rebuilding it
+    per request. Called during server warmup to pay construction and import
+    costs (including LiteLLM, when selected) before the first request.
+
+    Calls to the model go through the process-wide `LlmScheduler`, which
+    caps how many reach the backend at once, and their prompt token counts
+    are recorded in `shared_llm_usage()`.
+    """
+    from .llm_scheduler import ScheduledLlm, shared_llm_scheduler, shared_llm_usage
+
+    model = _build_model()
+    return ScheduledLlm(
+        model=model.model, llm=model, scheduler=shared_llm_scheduler(), usage=shared_llm_usage()
+    )
+
+
 def _get_auth_headers():
     """Retrieves auth token from context and formats header."""
     token = token_context.get()
@@ -87,10 +121,20 @@ def _get_auth_headers():
     return {}
 
 
-def build_adk_agent() -> Agent:
+def build_adk_agent() -> "Agent":
     """Builds the ADK Agent with MCP tools and configured model."""
-    model = _build_model()
-    
+    from google.adk import Agent
+    from google.adk.tools.mcp_tool.mcp_session_manager import (
+        StreamableHTTPConnectionParams,
+    )
+    from google.adk.tools.mcp_tool.mcp_toolset import McpToolset
+
+    from .mcp_pool import PooledSessionManager, shared_pool, shared_resilience
+    from .patches import apply_patches
+
+    apply_patches()
+    model = get_model()
+
     connection_params = StreamableHTTPConnectionParams(
         url=config.MCP_SERVER_URL,
         terminate_on_close=False,
@@ -100,10 +144,129 @@ def build_adk_agent() -> Agent:
         connection_params=connection_params,
         header_provider=lambda _: _get_auth_headers(),
     )
+    # Agents are rebuilt per request; take MCP sessions from the process-wide
+    # pool so a caller's tool calls reuse a warm session across requests, and
+    # share circuit breakers and latency history across requests too.
+    toolset._mcp_session_manager = PooledSessionManager(
+        connection_params, shared_pool(), shared_resilience()
+    )
     
     return Agent(
         name="calculator_agent",
         description="Calculator agent backed by MCP tools.",
         model=model,
+        # Static, so the system prompt is identical across requests and the
+        # system-plus-tools prefix can be cached by the backend.
+        static_instruction=PARALLEL_TOOL_CALLS_INSTRUCTION if config.LLM_PARALLEL_TOOL_CALLS else None,
         tools=[toolset],
     )
+
+
+def build_app(agent: "Agent") -> "App":
+    """
+    Wraps `agent` in an ADK App for a runner.
+
+    With LLM_CONTEXT_CACHE and a Gemini model, the static system-plus-tools
+    prefix is stored in a Gemini context cache and reused by later calls.
+    OpenAI-compatible backends (vLLM, llama.cpp) cache prefixes on their
+    own when the prefix is byte-identical between requests.
+    """
+    from google.adk.apps import App
+
+    context_cache_config = None
+    if config.LLM_CONTEXT_CACHE and not _use_litellm(config.LLM_PROVIDER, config.LLM_API_BASE, config.LLM_MODEL):
+        from google.adk.agents.context_cache_config import ContextCacheConfig
+
+        context_cache_config = ContextCacheConfig(
+            ttl_seconds=config.LLM_CONTEXT_CACHE_TTL,
+            min_tokens=config.LLM_CONTEXT_CACHE_MIN_TOKENS,
+        )
+    return App(name=agent.name, root_agent=agent, context_cache_config=context_cache_config)
+
+
+class CalculatorAgent:
+    """
+    Runs the calculator agent from the command line.
+
+    The ADK agent, its model client and MCP toolset are built on the first
+    `run` and reused by later ones, each in its own conversation session, so
+    one instance can run many tasks (concurrently, see `batch`).
+    """
+
+    def __init__(self, token: str | None = None):
+        self.token = token or os.environ.get("MCP_TOKEN")
+        self._runner = None
+
+    def _get_runner(self):
+        if self._runner is None:
+            from google.adk.runners import InMemoryRunner
+
+            self._runner = InMemoryRunner(app=build_app(build_adk_agent()))
+        return self._runner
+
+    async def run(self, task: str) -> str:
+        """Runs `task` through the LLM agent and returns its final reply."""
+        from google.genai import types
+
+        token_context.set(self.token)
+        runner = self._get_runner()
+        session = await runner.session_service.create_session(
+            app_name=runner.app_name, user_id="cli"
+        )
+        message = types.Content(role="user", parts=[types.Part(text=task)])
+        reply = ""
+        async for event in runner.run_async(
+            user_id="cli", session_id=session.id, new_message=message
+        ):
+            if event.is_final_response() and event.content and event.content.parts:
+                reply = "".join(part.text or "" for part in event.content.parts)
+        logger.info(f"Agent reply: {reply}")
+        return reply
+
+    async def pooled_session(self):
+        """
+        Checks out an MCP session from the process-wide pool, with the same
+        pooling, retries and failover as the agent's toolset.
+        """
+        from google.adk.tools.mcp_tool.mcp_session_manager import (
+            StreamableHTTPConnectionParams,
+        )
+
+        from .mcp_pool import PooledSessionManager, shared_pool, shared_resilience
+
+        connection_params = StreamableHTTPConnectionParams(
+            url=config.MCP_SERVER_URL,
+            terminate_on_close=False,
+        )
+        manager = PooledSessionManager(connection_params, shared_pool(), shared_resilience())
+        headers = {"Authorization": f"Bearer {self.token}"} if self.token else None
+        return await manager.create_session(headers)
+
+    async def run_simple_eval(self, expr: str, session=None):
+        """
+        Calls a calculator tool directly, e.g. "add 5 10", without an LLM.
+
+        Uses `session` when given (see `pooled_session`), else opens a
+        one-off session without loading ADK.
+        """
+        from mcp.client.session import ClientSession
+
+        from .in_process import mcp_streams
+
+        try:
+            tool_name, a, b = expr.split()
+            arguments = {"a": float(a), "b": float(b)}
+        except ValueError as e:
+            raise AgentError(f"Expected '<tool> <a> <b>', got: {expr!r}") from e
+
+        if session is not None:
+            result = await session.call_tool(tool_name, arguments)
+        else:
+            headers = {"Authorization": f"Bearer {self.token}"} if self.token else None
+            async with mcp_streams(config.MCP_SERVER_URL, headers) as (read, write):
+                async with ClientSession(read, write) as session:
+                    await session.initialize()
+                    result = await session.call_tool(tool_name, arguments)
+        if result.isError:
+            raise AgentError(f"Tool {tool_name} failed: {result.content}")
+        return result.structuredContent.get("result") if result.structuredContent else result.content
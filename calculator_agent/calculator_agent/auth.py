@@ -1,12 +1,20 @@
+import asyncio
+import hashlib
 import os
 import logging
+import time
 import certifi
 import ssl
 import jwt
-from jwt import PyJWKClient
+from jwt import PyJWK, PyJWKClient
 from starlette.requests import Request
 from starlette.responses import JSONResponse
 
+from . import config
+from .cache_backends import SharedCache
+from .shared_cache import shared_cache
+from .singleflight import SingleFlight
+
 # Configure logging
 logger = logging.getLogger(__name__)
 
@@ -15,14 +23,78 @@ OIDC_ISSUER = os.getenv("OIDC_ISSUER", "https://dev-d2i2ktw25ycepyad.us.auth0.co
 OIDC_AUDIENCE = os.getenv("OIDC_AUDIENCE", "https://mcp.msgraph.com")
 OIDC_JWKS_URL = os.getenv("OIDC_JWKS_URL", "https://dev-d2i2ktw25ycepyad.us.auth0.com/.well-known/jwks.json")
 
-class TokenVerifier:
-    def __init__(self):
+# One JWKS client (and cache) per process, shared by every TokenVerifier, so
+# keys fetched during warmup serve the request path too.
+_jwks_client: PyJWKClient | None = None
+_jwks_refresh = SingleFlight()
+
+
+def _shared_jwks_client() -> PyJWKClient:
+    global _jwks_client
+    if _jwks_client is None:
         ssl_context = ssl.create_default_context(cafile=certifi.where())
-        self.jwks_client = PyJWKClient(OIDC_JWKS_URL, ssl_context=ssl_context)
+        _jwks_client = PyJWKClient(OIDC_JWKS_URL, ssl_context=ssl_context)
+    return _jwks_client
+
+
+class TokenVerifier:
+    """
+    Verifies bearer tokens against the OIDC provider's keys.
+
+    The JWKS and verified claims (keyed by a hash of the token, never past
+    its expiry) go through `cache`, by default the process-wide
+    `shared_cache()`, so workers sharing its backend fetch the JWKS and
+    verify a token once between them.
+    """
+
+    def __init__(self, cache: SharedCache | None = None):
+        self.jwks_client = _shared_jwks_client()
+        self.cache = cache if cache is not None else shared_cache()
 
-    def verify_token(self, token: str) -> dict:
+    def _cached_signing_key(self, kid: str | None) -> PyJWK | None:
+        cache = self.jwks_client.jwk_set_cache
+        jwk_set = cache.get() if cache is not None else None
+        if jwk_set is None:
+            return None
+        for key in jwk_set.keys:
+            if key.key_id == kid:
+                return key
+        return None
+
+    async def _load_jwks(self, kid: str | None):
+        jwks = await self.cache.get("jwks")
+        if jwks is None or (kid is not None and not any(key.get("kid") == kid for key in jwks.get("keys", []))):
+            jwks = await asyncio.to_thread(self.jwks_client.fetch_data)
+            await self.cache.set("jwks", jwks, config.JWKS_CACHE_TTL)
+        self.jwks_client.jwk_set_cache.put(jwks)
+
+    async def refresh_jwks(self, kid: str | None = None):
+        """
+        Loads the JWKS into this process: from the shared cache when it
+        holds `kid` (or any set, without one), else from the JWKS endpoint.
+        Concurrent callers share one load.
+        """
+        await _jwks_refresh.do("jwks", lambda: self._load_jwks(kid))
+
+    async def get_signing_key(self, token: str) -> PyJWK:
+        """
+        Resolves the token's signing key, refreshing the JWKS off the event loop.
+
+        On a cold or rotated key set, concurrent verifiers share one fetch.
+        """
+        kid = jwt.get_unverified_header(token).get("kid")
+        signing_key = self._cached_signing_key(kid)
+        if signing_key is None:
+            await self.refresh_jwks(kid)
+            signing_key = self._cached_signing_key(kid)
+        if signing_key is None:
+            raise jwt.PyJWKClientError(f'Unable to find a signing key that matches: "{kid}"')
+        return signing_key
+
+    def verify_token(self, token: str, signing_key: PyJWK | None = None) -> dict:
         try:
-            signing_key = self.jwks_client.get_signing_key_from_jwt(token)
+            if signing_key is None:
+                signing_key = self.jwks_client.get_signing_key_from_jwt(token)
             data = jwt.decode(
                 token,
                 signing_key.key,
@@ -32,17 +104,30 @@ class TokenVerifier:
             )
             return data
         except jwt.PyJWTError as e:
-            logger.error(f"Token verification failed: {e}")
+            logger.error("Token verification failed: %s", e)
             raise
 
-    async def verify_request(self, request: Request):
+    async def authenticate(self, request: Request) -> tuple[str, dict]:
+        """Verifies the request's bearer token and returns it with its claims."""
         auth_header = request.headers.get("Authorization")
         if not auth_header or not auth_header.startswith("Bearer "):
             raise ValueError("Missing or invalid Authorization header")
 
         token = auth_header.split(" ")[1]
+        key = "token:" + hashlib.sha256(token.encode()).hexdigest()
+        now = time.time()
+        claims = await self.cache.get(key)
+        if claims is not None and claims.get("exp", now + 1) > now:
+            return token, claims
         try:
-            self.verify_token(token)
-            return token  # Return the token so it can be used
+            signing_key = await self.get_signing_key(token)
+            claims = self.verify_token(token, signing_key)
         except Exception as e:
             raise ValueError(f"Invalid token: {str(e)}")
+        ttl = min(config.AUTH_CACHE_TTL, claims["exp"] - now) if "exp" in claims else config.AUTH_CACHE_TTL
+        await self.cache.set(key, claims, ttl)
+        return token, claims
+
+    async def verify_request(self, request: Request):
+        token, _claims = await self.authenticate(request)
+        return token  # Return the token so it can be used
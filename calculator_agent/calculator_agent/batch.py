@@ -0,0 +1,87 @@
+import asyncio
+import json
+import logging
+import statistics
+import time
+from typing import Iterable, TextIO
+
+from .context import deadline_context
+
+logger = logging.getLogger(__name__)
+
+SIMPLE_PREFIX = "simple_exec "
+
+
+def read_tasks(lines: Iterable[str]) -> list[str]:
+    """One task per line; blank lines and lines starting with `#` are skipped."""
+    tasks = []
+    for line in lines:
+        task = line.strip()
+        if task and not task.startswith("#"):
+            tasks.append(task)
+    return tasks
+
+
+async def run_batch(
+    agent,
+    tasks: list[str],
+    out: TextIO,
+    concurrency: int = 8,
+    timeout: float | None = None,
+) -> dict:
+    """
+    Runs `tasks` on one `CalculatorAgent`, at most `concurrency` at a time.
+
+    The agent (and so the model client and MCP toolset) is built once and
+    shared; `simple_exec` tasks use sessions from the same MCP session
+    pool. Each result is written
+    to `out` as a JSON line as soon as the task finishes, so lines come in
+    completion order and carry the task's `index`. A task that raises or
+    takes longer than `timeout` seconds is reported as failed and does not
+    stop the others. Returns a throughput summary.
+    """
+    pending = iter(enumerate(tasks))
+    durations = []
+    failed = 0
+
+    async def run_one(task: str):
+        if task.startswith(SIMPLE_PREFIX):
+            session = await agent.pooled_session()
+            return await agent.run_simple_eval(task[len(SIMPLE_PREFIX):], session=session)
+        return await agent.run(task)
+
+    async def worker():
+        nonlocal failed
+        for index, task in pending:
+            record = {"index": index, "task": task}
+            started = time.perf_counter()
+            if timeout is not None:
+                # Tool calls made for this task share its deadline.
+                deadline_context.set(time.monotonic() + timeout)
+            try:
+                async with asyncio.timeout(timeout):
+                    record["result"] = await run_one(task)
+                record["ok"] = True
+            except Exception as e:
+                failed += 1
+                record["ok"] = False
+                record["error"] = "timed out" if isinstance(e, TimeoutError) else f"{type(e).__name__}: {e}"
+            record["seconds"] = round(time.perf_counter() - started, 4)
+            durations.append(record["seconds"])
+            out.write(json.dumps(record, default=str) + "\n")
+            out.flush()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(max(1, min(concurrency, len(tasks))))))
+    elapsed = time.perf_counter() - started
+
+    return {
+        "tasks": len(tasks),
+        "succeeded": len(tasks) - failed,
+        "failed": failed,
+        "concurrency": concurrency,
+        "seconds": round(elapsed, 4),
+        "tasks_per_second": round(len(tasks) / elapsed, 2) if elapsed > 0 else None,
+        "p50_seconds": statistics.median(durations) if durations else None,
+        "max_seconds": max(durations, default=None),
+    }
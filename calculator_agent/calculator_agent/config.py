@@ -1,8 +1,48 @@
 import os
+import tempfile
 
-# MCP Server Configuration
+# MCP Server Configuration; memory://mcp_calculator calls a calculator server
+# running in this process instead (see in_process.py)
 MCP_SERVER_URL = os.environ.get("MCP_SERVER_URL", "http://localhost:8000/mcp/")
 
+# Optional service credential for server-initiated MCP calls (e.g. warmup)
+MCP_SERVICE_TOKEN = os.environ.get("MCP_SERVICE_TOKEN")
+
+# MCP Health Monitor Configuration
+MCP_HEALTH_INTERVAL = float(os.environ.get("MCP_HEALTH_INTERVAL", "10"))
+MCP_HEALTH_TIMEOUT = float(os.environ.get("MCP_HEALTH_TIMEOUT", "3"))
+
+# MCP Session Pool Configuration
+MCP_POOL_MAX_SESSIONS = int(os.environ.get("MCP_POOL_MAX_SESSIONS", "256"))
+MCP_POOL_IDLE_TTL = float(os.environ.get("MCP_POOL_IDLE_TTL", "300"))
+MCP_POOL_VALIDATE_INTERVAL = float(os.environ.get("MCP_POOL_VALIDATE_INTERVAL", "30"))
+
+# Response Compression
+# zstd (when zstandard is installed) or gzip, as negotiated by Accept-Encoding.
+COMPRESSION_ENABLED = os.environ.get("COMPRESSION_ENABLED", "true").lower() not in {"0", "false", "no"}
+COMPRESSION_MINIMUM_SIZE = int(os.environ.get("COMPRESSION_MINIMUM_SIZE", "1024"))
+COMPRESSION_GZIP_LEVEL = int(os.environ.get("COMPRESSION_GZIP_LEVEL", "6"))
+COMPRESSION_ZSTD_LEVEL = int(os.environ.get("COMPRESSION_ZSTD_LEVEL", "3"))
+
+# MCP Call Resilience
+# Further MCP server URLs (comma-separated) that tool calls fail over and
+# hedge to; each URL has its own circuit breaker.
+MCP_SERVER_REPLICAS = [url.strip() for url in os.environ.get("MCP_SERVER_REPLICAS", "").split(",") if url.strip()]
+MCP_RETRIES = int(os.environ.get("MCP_RETRIES", "2"))
+# Idempotent tool calls slower than the recent p95 are hedged; MCP_HEDGE_DELAY
+# is the delay used until enough latencies have been seen.
+MCP_HEDGE_ENABLED = os.environ.get("MCP_HEDGE_ENABLED", "true").lower() not in {"0", "false", "no"}
+MCP_HEDGE_DELAY = float(os.environ.get("MCP_HEDGE_DELAY", "1"))
+MCP_BREAKER_FAILURES = int(os.environ.get("MCP_BREAKER_FAILURES", "5"))
+MCP_BREAKER_RESET = float(os.environ.get("MCP_BREAKER_RESET", "30"))
+# Upper bound (seconds) for one MCP tool call, retries included; a shorter
+# caller deadline (X-Request-Timeout) takes precedence.
+MCP_CALL_TIMEOUT = float(os.environ.get("MCP_CALL_TIMEOUT", "30"))
+
+# CLI Batch Mode
+# Tasks run at once by `python -m calculator_agent --batch`.
+BATCH_CONCURRENCY = int(os.environ.get("BATCH_CONCURRENCY", "8"))
+
 # A2A Server Configuration
 A2A_BASE_URL = os.environ.get("A2A_BASE_URL", "http://localhost:8001")
 
@@ -14,3 +54,69 @@ LLM_PROVIDER = os.environ.get("LLM_PROVIDER", "gemini")
 LLM_API_BASE = os.environ.get("LLM_API_BASE") or LLM_BASE_URL
 OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY")
 LLM_API_KEY = os.environ.get("LLM_API_KEY") or OPENAI_API_KEY
+# Opt-in: ask the model for all independent tool calls in one turn (and, for
+# LiteLLM, send parallel_tool_calls); ADK then runs them concurrently.
+LLM_PARALLEL_TOOL_CALLS = os.environ.get("LLM_PARALLEL_TOOL_CALLS", "false").lower() in {"1", "true", "yes"}
+# Declare MCP tools compactly: one-sentence descriptions, schemas without
+# titles or output schemas, and tools with identical arguments grouped.
+MCP_COMPACT_TOOLS = os.environ.get("MCP_COMPACT_TOOLS", "false").lower() in {"1", "true", "yes"}
+# Gemini only: cache the static system-plus-tools prefix in a context cache.
+LLM_CONTEXT_CACHE = os.environ.get("LLM_CONTEXT_CACHE", "false").lower() in {"1", "true", "yes"}
+LLM_CONTEXT_CACHE_TTL = int(os.environ.get("LLM_CONTEXT_CACHE_TTL", "1800"))
+LLM_CONTEXT_CACHE_MIN_TOKENS = int(os.environ.get("LLM_CONTEXT_CACHE_MIN_TOKENS", "1024"))
+
+# LLM Call Scheduling
+# Model calls in flight at once (0 disables the cap); waiting calls are served
+# round-robin per caller. LLM_BATCH_WINDOW (seconds, 0 disables) holds calls
+# that find a free slot so concurrent ones reach the backend together.
+LLM_MAX_CONCURRENCY = int(os.environ.get("LLM_MAX_CONCURRENCY", "8"))
+LLM_MAX_QUEUE = int(os.environ.get("LLM_MAX_QUEUE", "1000"))
+LLM_QUEUE_TIMEOUT = float(os.environ.get("LLM_QUEUE_TIMEOUT", "60"))
+LLM_BATCH_WINDOW = float(os.environ.get("LLM_BATCH_WINDOW", "0"))
+LLM_BATCH_MAX_SIZE = int(os.environ.get("LLM_BATCH_MAX_SIZE", "8"))
+
+# Session Store Configuration
+# "memory" (bounded, per process) or "sqlite:<path>" for larger working sets.
+SESSION_BACKEND = os.environ.get("SESSION_BACKEND", "memory")
+SESSION_MAX_SESSIONS = int(os.environ.get("SESSION_MAX_SESSIONS", "1000"))
+SESSION_MAX_BYTES = int(os.environ.get("SESSION_MAX_BYTES", str(64 * 1024 * 1024)))
+SESSION_IDLE_TTL = float(os.environ.get("SESSION_IDLE_TTL", "1800"))
+SESSION_MAX_EVENTS = int(os.environ.get("SESSION_MAX_EVENTS", "100"))
+
+# Startup Warmup Configuration
+# When enabled, /ready reports 503 until every warmup step has succeeded.
+WARMUP_ENABLED = os.environ.get("WARMUP_ENABLED", "true").lower() not in {"0", "false", "no"}
+WARMUP_STEP_TIMEOUT = float(os.environ.get("WARMUP_STEP_TIMEOUT", "10"))
+
+# On-demand Profiling
+# When enabled, a PROFILING_SAMPLE_RATE fraction of requests is profiled by a
+# stack sampler. Callers granted PROFILING_ADMIN_SCOPE can profile a request
+# with `X-Profile: 1` at any time (an empty scope disables the header) and
+# list profiles at /debug/profiles.
+PROFILING_ENABLED = os.environ.get("PROFILING_ENABLED", "false").lower() in {"1", "true", "yes"}
+PROFILING_SAMPLE_RATE = float(os.environ.get("PROFILING_SAMPLE_RATE", "0.01"))
+PROFILING_INTERVAL = float(os.environ.get("PROFILING_INTERVAL", "0.005"))
+PROFILING_MAX_SECONDS = float(os.environ.get("PROFILING_MAX_SECONDS", "30"))
+PROFILING_DIR = os.environ.get("PROFILING_DIR", os.path.join(tempfile.gettempdir(), "calculator-agent-profiles"))
+PROFILING_MAX_PROFILES = int(os.environ.get("PROFILING_MAX_PROFILES", "100"))
+PROFILING_ADMIN_SCOPE = os.environ.get("PROFILING_ADMIN_SCOPE", "profile:admin")
+
+# Logging
+# Records are written by a background thread; warnings and errors are limited
+# to LOG_RATE_LIMIT_BURST per LOG_RATE_LIMIT_INTERVAL seconds per message
+# template. ACCESS_LOG writes one JSON line per request to stdout.
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+LOG_RATE_LIMIT_BURST = int(os.environ.get("LOG_RATE_LIMIT_BURST", "10"))
+LOG_RATE_LIMIT_INTERVAL = float(os.environ.get("LOG_RATE_LIMIT_INTERVAL", "60"))
+ACCESS_LOG = os.environ.get("ACCESS_LOG", "true").lower() in {"1", "true", "yes"}
+
+# Shared Cache
+# Verified tokens, the JWKS, MCP tool lists and A2A agent cards, shared by the
+# workers using the same backend: "memory" (per worker), "sqlite:<path>" (per
+# host; /dev/shm keeps it in memory) or "redis://[[user]:password@]host[:port][/db]".
+# A TTL of 0 disables caching that kind of entry.
+CACHE_BACKEND = os.environ.get("CACHE_BACKEND", "memory")
+AUTH_CACHE_TTL = float(os.environ.get("AUTH_CACHE_TTL", "300"))
+JWKS_CACHE_TTL = float(os.environ.get("JWKS_CACHE_TTL", "600"))
+TOOL_LIST_CACHE_TTL = float(os.environ.get("TOOL_LIST_CACHE_TTL", "60"))
+AGENT_CARD_CACHE_TTL = float(os.environ.get("AGENT_CARD_CACHE_TTL", "300"))
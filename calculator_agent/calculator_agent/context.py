@@ -2,3 +2,7 @@ from contextvars import ContextVar
 
 # ContextVar to store the JWT token for the current request
 token_context: ContextVar[str | None] = ContextVar("token_context", default=None)
+
+# ContextVar to store the current request's deadline (a time.monotonic()
+# value), set from the caller's X-Request-Timeout header
+deadline_context: ContextVar[float | None] = ContextVar("deadline_context", default=None)
@@ -0,0 +1,80 @@
+import math
+import time
+
+import anyio
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+
+from .context import deadline_context
+
+# Seconds the caller is still willing to wait. Received from invokers as an
+# HTTP header and passed on to the MCP server in each tool call's `_meta`
+# (pooled MCP sessions have fixed HTTP headers).
+DEADLINE_HEADER = "X-Request-Timeout"
+DEADLINE_META_KEY = "x-request-timeout"
+
+
+def parse_timeout(value) -> float | None:
+    """Parses a relative timeout in seconds; None when missing or malformed."""
+    if value is None:
+        return None
+    try:
+        timeout = float(value)
+    except (TypeError, ValueError):
+        return None
+    return timeout if math.isfinite(timeout) else None
+
+
+def remaining() -> float | None:
+    """Seconds left before the current request's deadline, or None without one."""
+    deadline = deadline_context.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+class DeadlineMiddleware:
+    """
+    Bounds A2A requests by the caller's `X-Request-Timeout`.
+
+    The deadline is stored in `deadline_context` for MCP tool calls, which
+    use what is left of it. A request whose deadline has passed gets a 504
+    straight away; one still running when it passes is cancelled, with a
+    504 if no response has started.
+    """
+
+    def __init__(self, app, path_prefix: str):
+        self.app = app
+        self.path_prefix = path_prefix
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope.get("method") == "GET" or not scope["path"].startswith(self.path_prefix):
+            await self.app(scope, receive, send)
+            return
+
+        timeout = parse_timeout(Headers(scope=scope).get(DEADLINE_HEADER))
+        if timeout is None:
+            await self.app(scope, receive, send)
+            return
+        if timeout <= 0:
+            await _deadline_exceeded()(scope, receive, send)
+            return
+
+        started = False
+
+        async def send_tracking(message):
+            nonlocal started
+            if message["type"] == "http.response.start":
+                started = True
+            await send(message)
+
+        token = deadline_context.set(time.monotonic() + timeout)
+        try:
+            with anyio.move_on_after(timeout) as cancel_scope:
+                await self.app(scope, receive, send_tracking)
+        finally:
+            deadline_context.reset(token)
+        if cancel_scope.cancelled_caught and not started:
+            await _deadline_exceeded()(scope, receive, send)
+
+
+def _deadline_exceeded() -> JSONResponse:
+    return JSONResponse({"error": "Deadline exceeded"}, status_code=504)
@@ -0,0 +1,122 @@
+import asyncio
+import contextlib
+import logging
+import time
+
+import httpx
+from mcp.client.session import ClientSession
+
+from .in_process import in_process_transport, is_in_process, mcp_streams
+
+logger = logging.getLogger(__name__)
+
+
+class McpHealthMonitor:
+    """
+    Tracks MCP server health from a background task.
+
+    With a service token, the monitor holds one long-lived MCP session and
+    sends an MCP ping every `interval` seconds, reconnecting after a failure.
+    Without one it can only check reachability: it sends a plain request
+    over a persistent HTTP client and counts any non-5xx answer (including
+    401) as reachable.
+
+    `snapshot()` returns the last result from memory, so health endpoints
+    never wait on the network.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        token: str | None = None,
+        interval: float = 10.0,
+        timeout: float = 3.0,
+    ):
+        self.url = url
+        self.token = token
+        self.interval = interval
+        self.timeout = timeout
+        self._snapshot = {"status": "unknown", "mcp_url": url, "authenticated": token is not None}
+        self._task: asyncio.Task | None = None
+
+    @property
+    def healthy(self) -> bool:
+        return self._snapshot["status"] == "ok"
+
+    def snapshot(self) -> dict:
+        return self._snapshot
+
+    def _record(self, status: str, latency: float | None = None, detail: str | None = None):
+        snapshot = {
+            "status": status,
+            "mcp_url": self.url,
+            "authenticated": self.token is not None,
+            "checked_at": time.time(),
+        }
+        if latency is not None:
+            snapshot["latency_ms"] = round(latency * 1000, 2)
+        if detail is not None:
+            snapshot["detail"] = detail
+        # Replaced as a whole so readers never see a half-updated result.
+        self._snapshot = snapshot
+
+    @contextlib.asynccontextmanager
+    async def _open_session(self):
+        headers = {"Authorization": f"Bearer {self.token}"}
+        async with mcp_streams(self.url, headers, terminate_on_close=False) as (read, write):
+            async with ClientSession(read, write) as session:
+                async with asyncio.timeout(self.timeout):
+                    await session.initialize()
+                yield session
+
+    async def _ping_loop(self, ping):
+        while True:
+            started = time.monotonic()
+            async with asyncio.timeout(self.timeout):
+                await ping()
+            self._record("ok", latency=time.monotonic() - started)
+            await asyncio.sleep(self.interval)
+
+    async def _monitor_session(self):
+        async with self._open_session() as session:
+            await self._ping_loop(session.send_ping)
+
+    async def _monitor_reachability(self):
+        if is_in_process(self.url):
+            # Nothing to reach; check that the server can be loaded.
+            async def loaded():
+                in_process_transport()
+
+            await self._ping_loop(loaded)
+            return
+
+        async with httpx.AsyncClient() as client:
+            async def ping():
+                response = await client.get(self.url)
+                if response.status_code >= 500:
+                    raise RuntimeError(f"MCP server returned {response.status_code}")
+
+            await self._ping_loop(ping)
+
+    async def run(self):
+        monitor = self._monitor_session if self.token else self._monitor_reachability
+        while True:
+            try:
+                await monitor()
+            except Exception as exc:
+                # The MCP client reports transport errors inside task groups.
+                while isinstance(exc, ExceptionGroup) and len(exc.exceptions) == 1:
+                    exc = exc.exceptions[0]
+                logger.warning("MCP health check failed: %r", exc)
+                self._record("error", detail=str(exc) or repr(exc))
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
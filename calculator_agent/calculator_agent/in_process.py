@@ -0,0 +1,44 @@
+import contextlib
+from urllib.parse import urlsplit
+
+# MCP_SERVER_URL scheme (e.g. memory://mcp_calculator) that selects the
+# calculator server running in this process instead of one reached over HTTP.
+IN_PROCESS_SCHEME = "memory"
+
+
+def is_in_process(url: str) -> bool:
+    return urlsplit(url).scheme == IN_PROCESS_SCHEME
+
+
+def in_process_transport():
+    """
+    The in-process transport of the calculator server (`mcp_calculator`).
+
+    The first call builds the server in this process, configured from the
+    environment as it would be on its own (OIDC_*, ADMISSION_*, TOOL_*).
+    """
+    try:
+        from mcp_calculator.app import in_process
+    except ImportError as e:
+        raise ImportError(
+            f"MCP_SERVER_URL={IN_PROCESS_SCHEME}:// needs mcp_calculator installed alongside the agent"
+        ) from e
+    return in_process
+
+
+@contextlib.asynccontextmanager
+async def mcp_streams(url: str, headers: dict[str, str] | None = None, terminate_on_close: bool = True):
+    """Yields the read and write streams of an MCP connection to `url`, in process or over HTTP."""
+    if is_in_process(url):
+        async with in_process_transport().connect(headers) as (read, write):
+            yield read, write
+        return
+
+    from mcp.client.streamable_http import streamable_http_client
+    from mcp.shared._httpx_utils import create_mcp_http_client
+
+    async with create_mcp_http_client(headers=headers) as http_client:
+        async with streamable_http_client(
+            url, http_client=http_client, terminate_on_close=terminate_on_close
+        ) as (read, write, _get_session_id):
+            yield read, write
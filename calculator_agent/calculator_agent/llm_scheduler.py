@@ -0,0 +1,253 @@
+import asyncio
+import contextlib
+import functools
+import logging
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import AsyncGenerator
+
+from google.adk.models import BaseLlm, LlmRequest, LlmResponse
+
+from . import config
+from .context import token_context
+from .logs import stage
+from .mcp_pool import _principal
+
+logger = logging.getLogger(__name__)
+
+
+class LlmOverloadedError(Exception):
+    """A model call was not admitted: the queue was full or the wait too long."""
+    pass
+
+
+@dataclass
+class _Waiter:
+    future: asyncio.Future
+    enqueued: float = field(default_factory=time.monotonic)
+
+
+class LlmScheduler:
+    """
+    Admits model calls to a backend that cannot take many at once.
+
+    - At most `max_concurrency` calls are in flight (0 disables the cap).
+    - Waiting calls are queued per principal and served round-robin, so one
+      caller with many agent runs cannot starve the others.
+    - With a `batch_window`, a call that finds a free slot waits up to that
+      long for others to join it (or until `batch_max_size` are waiting),
+      and they are released together. Chat completion APIs take
+      one conversation per request, so this cannot merge requests; it
+      lines up their arrival so a server that batches concurrent requests
+      (vLLM, llama.cpp with parallel slots) decodes them in one batch.
+    - At most `max_queue` calls wait; beyond that, or after `queue_timeout`
+      seconds in the queue, `acquire` raises `LlmOverloadedError`.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 8,
+        max_queue: int = 1000,
+        queue_timeout: float = 60.0,
+        batch_window: float = 0.0,
+        batch_max_size: int = 8,
+    ):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.batch_window = batch_window
+        self.batch_max_size = batch_max_size
+        self.in_flight = 0
+        self._queues: OrderedDict[str, deque[_Waiter]] = OrderedDict()
+        self._queued = 0
+        self._flush_handle: asyncio.TimerHandle | None = None
+        self.admitted = 0
+        self.rejected = 0
+        self.batches = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def _has_capacity(self) -> bool:
+        return self.max_concurrency <= 0 or self.in_flight < self.max_concurrency
+
+    def _next_waiter(self) -> _Waiter | None:
+        # Round-robin: take the head of the first principal's queue, then
+        # move that principal behind the others.
+        if self._queues:
+            principal, queue = next(iter(self._queues.items()))
+            waiter = queue.popleft()
+            if queue:
+                self._queues.move_to_end(principal)
+            else:
+                del self._queues[principal]
+            self._queued -= 1
+            return waiter
+        return None
+
+    def _remove(self, principal: str, waiter: _Waiter):
+        queue = self._queues.get(principal)
+        if queue is not None and waiter in queue:
+            queue.remove(waiter)
+            self._queued -= 1
+            if not queue:
+                del self._queues[principal]
+
+    def _dispatch(self):
+        released = 0
+        now = time.monotonic()
+        while self._queued and self._has_capacity():
+            waiter = self._next_waiter()
+            self.in_flight += 1
+            wait = now - waiter.enqueued
+            self.admitted += 1
+            self.wait_total += wait
+            self.wait_max = max(self.wait_max, wait)
+            waiter.future.set_result(None)
+            released += 1
+        if released:
+            self.batches += 1
+
+    def _flush(self):
+        self._flush_handle = None
+        self._dispatch()
+
+    async def acquire(self, principal: str):
+        if self._queued >= self.max_queue:
+            self.rejected += 1
+            raise LlmOverloadedError(f"{self._queued} model calls already queued")
+
+        waiter = _Waiter(asyncio.get_running_loop().create_future())
+        self._queues.setdefault(principal, deque()).append(waiter)
+        self._queued += 1
+
+        if self.batch_window <= 0 or self._queued >= self.batch_max_size:
+            self._dispatch()
+        elif self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_later(self.batch_window, self._flush)
+
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), self.queue_timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.future.done():
+                # Admitted just as the wait ended: hand the slot back.
+                self.release()
+            else:
+                waiter.future.cancel()
+                self._remove(principal, waiter)
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            self.rejected += 1
+            raise LlmOverloadedError(f"No model slot free after {self.queue_timeout}s") from None
+
+    def release(self):
+        self.in_flight -= 1
+        self._dispatch()
+
+    @contextlib.asynccontextmanager
+    async def slot(self, principal: str):
+        await self.acquire(principal)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def snapshot(self) -> dict:
+        return {
+            "in_flight": self.in_flight,
+            "queued": self._queued,
+            "queued_principals": len(self._queues),
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "batches": self.batches,
+            "avg_batch_size": round(self.admitted / self.batches, 2) if self.batches else 0.0,
+            "avg_queue_wait": round(self.wait_total / self.admitted, 4) if self.admitted else 0.0,
+            "max_queue_wait": round(self.wait_max, 4),
+        }
+
+
+class LlmUsage:
+    """
+    Prompt token counts reported by the model backend.
+
+    Cached tokens are the part of the prompt the backend served from its
+    prefix or context cache (0 when it does not report them).
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.cached_prompt_tokens = 0
+        self.max_prompt_tokens = 0
+
+    def record(self, usage) -> None:
+        if usage is None or usage.prompt_token_count is None:
+            return
+        cached = usage.cached_content_token_count or 0
+        self.calls += 1
+        self.prompt_tokens += usage.prompt_token_count
+        self.cached_prompt_tokens += cached
+        self.max_prompt_tokens = max(self.max_prompt_tokens, usage.prompt_token_count)
+        logger.info("Model call used %d prompt tokens (%d cached)", usage.prompt_token_count, cached)
+
+    def snapshot(self) -> dict:
+        return {
+            "calls": self.calls,
+            "prompt_tokens": self.prompt_tokens,
+            "avg_prompt_tokens": round(self.prompt_tokens / self.calls, 1) if self.calls else 0.0,
+            "max_prompt_tokens": self.max_prompt_tokens,
+            "cached_prompt_tokens": self.cached_prompt_tokens,
+        }
+
+
+def _current_principal() -> str:
+    token = token_context.get()
+    return _principal({"Authorization": f"Bearer {token}"}) if token else "anonymous"
+
+
+class ScheduledLlm(BaseLlm):
+    """
+    Wraps a model so every call takes a slot from `scheduler`, queued under
+    the caller's principal (from `token_context`). The slot is held until
+    the response, streamed or not, has been fully read. Prompt token counts
+    of complete responses are recorded in `usage`.
+    """
+
+    llm: BaseLlm
+    scheduler: LlmScheduler
+    usage: LlmUsage
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        with stage("llm_queue"):
+            await self.scheduler.acquire(_current_principal())
+        try:
+            with stage("llm"):
+                async for response in self.llm.generate_content_async(llm_request, stream):
+                    if not response.partial:
+                        self.usage.record(response.usage_metadata)
+                    yield response
+        finally:
+            self.scheduler.release()
+
+    def connect(self, llm_request: LlmRequest):
+        return self.llm.connect(llm_request)
+
+
+@functools.cache
+def shared_llm_usage() -> LlmUsage:
+    """Prompt token counts for calls to the configured model."""
+    return LlmUsage()
+
+
+@functools.cache
+def shared_llm_scheduler() -> LlmScheduler:
+    """The process-wide scheduler for calls to the configured model."""
+    return LlmScheduler(
+        max_concurrency=config.LLM_MAX_CONCURRENCY,
+        max_queue=config.LLM_MAX_QUEUE,
+        queue_timeout=config.LLM_QUEUE_TIMEOUT,
+        batch_window=config.LLM_BATCH_WINDOW,
+        batch_max_size=config.LLM_BATCH_MAX_SIZE,
+    )
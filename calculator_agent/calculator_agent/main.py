@@ -1,7 +1,6 @@
 import asyncio
 import sys
 import logging
-from .agent import CalculatorAgent, AgentError
 
 # Configure logging
 logging.basicConfig(
@@ -10,12 +9,61 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+def run_batch_cli(argv: list[str]):
+    """
+    Batch mode: runs one task per line of a file (or stdin for `-`)
+    concurrently on one agent, writing JSONL results to stdout and a
+    throughput summary to stderr.
+    """
+    import argparse
+    import json
+
+    from . import config
+    from .agent import CalculatorAgent
+    from .batch import read_tasks, run_batch
+
+    parser = argparse.ArgumentParser(prog="python -m calculator_agent --batch")
+    parser.add_argument("--batch", required=True, metavar="FILE", help="task file, one task per line; - for stdin")
+    parser.add_argument("--concurrency", type=int, default=config.BATCH_CONCURRENCY)
+    parser.add_argument("--timeout", type=float, default=None, help="seconds allowed per task")
+    args = parser.parse_args(argv)
+
+    if args.batch == "-":
+        tasks = read_tasks(sys.stdin)
+    else:
+        with open(args.batch) as f:
+            tasks = read_tasks(f)
+
+    logger.info(f"Running {len(tasks)} tasks, {args.concurrency} at a time")
+    summary = asyncio.run(
+        run_batch(CalculatorAgent(), tasks, sys.stdout, concurrency=args.concurrency, timeout=args.timeout)
+    )
+    print(json.dumps({"summary": summary}), file=sys.stderr)
+    if summary["failed"]:
+        sys.exit(1)
+
 def main():
     if len(sys.argv) < 2:
         print("Usage: python -m calculator_agent <task>")
+        print("       python -m calculator_agent --batch <file|-> [--concurrency N] [--timeout SECONDS]")
         sys.exit(1)
+
+    if sys.argv[1].startswith("--batch"):
+        try:
+            run_batch_cli(sys.argv[1:])
+        except KeyboardInterrupt:
+            logger.warning("\nOperation cancelled by user.")
+        except Exception as e:
+            logger.exception(f"Batch failed: {e}")
+            sys.exit(1)
+        return
         
     task = " ".join(sys.argv[1:])
+
+    # Imported here so printing usage stays instant; the agent module in turn
+    # defers google.adk until an LLM run actually needs it.
+    from .agent import AgentError, CalculatorAgent
+
     agent = CalculatorAgent()
     
     try:
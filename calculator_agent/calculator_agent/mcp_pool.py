@@ -0,0 +1,394 @@
+import asyncio
+import functools
+import hashlib
+import inspect
+import json
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Optional
+
+import anyio
+import httpx
+import jwt
+from google.adk.tools.mcp_tool.mcp_session_manager import MCPSessionManager
+from mcp import ClientSession
+from mcp.shared.exceptions import McpError
+from mcp.types import CONNECTION_CLOSED, ListToolsResult
+
+from . import config
+from .deadline import DEADLINE_META_KEY, remaining
+from .in_process import in_process_transport, is_in_process
+from .logs import stage
+from .resilience import Resilience
+from .shared_cache import shared_cache
+
+logger = logging.getLogger(__name__)
+
+
+def _principal(headers: Optional[dict[str, str]]) -> tuple[str, tuple[float, float]]:
+    """
+    Pool key for the caller behind `headers`, and how recent its credentials are.
+
+    The JWT subject when the Authorization header carries a JWT (the agent
+    server has already verified it), so a rotated token maps to the same
+    pooled entry, which is newer when its `iat` (then `exp`) is later;
+    otherwise a digest of the headers.
+    """
+    headers = headers or {}
+    auth = headers.get("Authorization", "")
+    if auth.startswith("Bearer "):
+        try:
+            claims = jwt.decode(auth.removeprefix("Bearer "), options={"verify_signature": False})
+            if claims.get("sub"):
+                return f"sub:{claims['sub']}", (claims.get("iat", 0), claims.get("exp", 0))
+        except jwt.PyJWTError:
+            pass
+    digest = hashlib.sha256(json.dumps(headers, sort_keys=True).encode()).hexdigest()
+    return f"headers:{digest}", (0, 0)
+
+
+class InProcessSessionManager(MCPSessionManager):
+    """Session manager for a calculator server in this process (see `in_process`)."""
+
+    def _create_client(self, merged_headers: Optional[dict[str, str]] = None):
+        return in_process_transport().connect(merged_headers)
+
+
+def _session_manager(connection_params) -> MCPSessionManager:
+    if is_in_process(connection_params.url):
+        return InProcessSessionManager(connection_params)
+    return MCPSessionManager(connection_params)
+
+
+@dataclass(eq=False)
+class _PoolEntry:
+    manager: MCPSessionManager
+    headers: dict[str, str]
+    issued: tuple[float, float]
+    last_used: float
+    last_validated: float
+    # Calls in flight on the manager's sessions.
+    active: int = 0
+    checked_out: Optional["_PooledSession"] = None
+
+
+class _PooledSession:
+    """
+    A session checked out of the pool. Calls made through it count as in
+    flight on its entry, so a retired entry is closed only once they finish.
+    """
+
+    def __init__(self, session: ClientSession, entry: _PoolEntry, pool: "McpSessionPool"):
+        self._session = session
+        self._entry = entry
+        self._pool = pool
+
+    def __getattr__(self, name):
+        attr = getattr(self._session, name)
+        if not inspect.iscoroutinefunction(attr):
+            return attr
+
+        @functools.wraps(attr)
+        async def tracked(*args, **kwargs):
+            self._entry.active += 1
+            try:
+                return await attr(*args, **kwargs)
+            finally:
+                self._pool._release(self._entry)
+
+        return tracked
+
+
+class McpSessionPool:
+    """
+    Process-wide pool of MCP client sessions.
+
+    Entries are keyed by server URL and principal, so tool listing and tool
+    calls from different requests (and rebuilt agents) for the same caller
+    reuse one initialized session and its HTTP connections.
+
+    - At most `max_sessions` entries; the least recently used is retired.
+    - Entries unused for `idle_ttl` seconds are closed.
+    - A session not validated for `validate_interval` seconds is pinged on
+      checkout and replaced if the ping fails.
+    - A checkout for a known principal with a newer token (a later `iat`)
+      reconnects with the new credentials. One with an older token, e.g.
+      from a second client of the same subject, reuses the entry and its
+      newer credentials instead of reconnecting.
+
+    Retired sessions may still be serving a call, so they are closed once
+    no call made through them is in flight.
+    """
+
+    def __init__(
+        self,
+        max_sessions: int = 256,
+        idle_ttl: float = 300.0,
+        validate_interval: float = 30.0,
+        validate_timeout: float = 3.0,
+    ):
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self.validate_interval = validate_interval
+        self.validate_timeout = validate_timeout
+        self._entries: OrderedDict[tuple[str, str], _PoolEntry] = OrderedDict()
+        self._retired: set[_PoolEntry] = set()
+        self._closing: set[asyncio.Task] = set()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = {"idle": 0, "capacity": 0, "unhealthy": 0, "reauth": 0}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _close_later(self, manager: MCPSessionManager):
+        task = asyncio.ensure_future(manager.close())
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    def _retire(self, key: tuple[str, str], reason: str):
+        entry = self._entries.pop(key)
+        self.evictions[reason] += 1
+        if entry.active:
+            self._retired.add(entry)
+        else:
+            self._close_later(entry.manager)
+
+    def _release(self, entry: _PoolEntry):
+        entry.active -= 1
+        if not entry.active and entry in self._retired:
+            self._retired.discard(entry)
+            self._close_later(entry.manager)
+
+    def _sweep(self):
+        now = time.monotonic()
+        # Entries are ordered by last use, so only the front can be idle.
+        while self._entries:
+            key, entry = next(iter(self._entries.items()))
+            if now - entry.last_used < self.idle_ttl:
+                break
+            self._retire(key, "idle")
+
+    async def _checkout(self, entry: _PoolEntry) -> _PooledSession:
+        # The manager reconnects sessions whose streams have closed.
+        session = await entry.manager.create_session(headers=entry.headers)
+        if entry.checked_out is None or entry.checked_out._session is not session:
+            entry.checked_out = _PooledSession(session, entry, self)
+        return entry.checked_out
+
+    async def session(self, connection_params, headers: Optional[dict[str, str]] = None) -> ClientSession:
+        """Checks out a session for `headers` against the server in `connection_params`."""
+        self._sweep()
+        now = time.monotonic()
+        headers = dict(headers or {})
+        principal, issued = _principal(headers)
+        key = (connection_params.url, principal)
+
+        entry = self._entries.get(key)
+        if entry is not None and entry.headers != headers and issued > entry.issued:
+            # Same principal, newer credentials: reconnect with the rotated token.
+            self._retire(key, "reauth")
+            entry = None
+        if entry is None:
+            self.misses += 1
+            entry = _PoolEntry(
+                manager=_session_manager(connection_params),
+                headers=headers,
+                issued=issued,
+                last_used=now,
+                last_validated=now,
+            )
+            self._entries[key] = entry
+            while len(self._entries) > self.max_sessions:
+                self._retire(next(iter(self._entries)), "capacity")
+        else:
+            self.hits += 1
+            self._entries.move_to_end(key)
+        entry.last_used = now
+
+        session = await self._checkout(entry)
+        if now - entry.last_validated >= self.validate_interval:
+            entry.last_validated = now
+            try:
+                async with asyncio.timeout(self.validate_timeout):
+                    await session.send_ping()
+            except Exception as exc:
+                logger.info("Pooled MCP session failed validation, reconnecting: %r", exc)
+                self.evictions["unhealthy"] += 1
+                await entry.manager.close()
+                session = await self._checkout(entry)
+        return session
+
+    def stats(self) -> dict:
+        return {
+            "sessions": len(self._entries),
+            "retired": len(self._retired),
+            "max_sessions": self.max_sessions,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": dict(self.evictions),
+        }
+
+    async def close(self):
+        """Closes every pooled and retired session."""
+        managers = [entry.manager for entry in (*self._entries.values(), *self._retired)]
+        self._entries.clear()
+        self._retired.clear()
+        for manager in managers:
+            try:
+                await manager.close()
+            except Exception as exc:
+                logger.warning("Error closing pooled MCP session: %r", exc)
+        if self._closing:
+            await asyncio.gather(*self._closing, return_exceptions=True)
+
+
+def _is_failure(exc: BaseException) -> bool:
+    """Errors that say an MCP endpoint is unhealthy rather than the call invalid."""
+    if isinstance(exc, McpError):
+        # Closed transports (e.g. after a 5xx) and read timeouts.
+        return exc.error.code in (CONNECTION_CLOSED, httpx.codes.REQUEST_TIMEOUT)
+    return isinstance(
+        exc,
+        (ConnectionError, TimeoutError, httpx.TransportError, anyio.ClosedResourceError, anyio.BrokenResourceError),
+    )
+
+
+def _is_unsent(exc: BaseException) -> bool:
+    """Errors from connecting, or from writing to a session that had already closed."""
+    return isinstance(exc, (ConnectionError, anyio.ClosedResourceError, anyio.BrokenResourceError))
+
+
+# Tools the server annotates as idempotent (`idempotentHint`), learned from
+# tool listings. Only their calls are hedged and retried after a failure.
+_idempotent_tools: set[str] = set()
+
+
+class ResilientSession:
+    """
+    The session a pooled toolset hands to its tools.
+
+    Tool calls go through `Resilience`: to the first endpoint whose circuit
+    is closed, hedged and retried on other endpoints' pooled sessions when
+    the tool is idempotent. Each call is bounded by the caller's deadline
+    (or `MCP_CALL_TIMEOUT`), and sends what is left of it to the server in
+    `_meta` so the server can drop work nobody is waiting for. Everything
+    else (tool listing, pings) uses the session it was created with; the
+    first page of tools is shared through `shared_cache()` for
+    `TOOL_LIST_CACHE_TTL` seconds, so workers list them once between them.
+    """
+
+    def __init__(self, session: ClientSession, checkout, resilience: Resilience):
+        self._session = session
+        self._checkout = checkout
+        self._resilience = resilience
+
+    def __getattr__(self, name):
+        return getattr(self._session, name)
+
+    async def list_tools(self, *args, **kwargs):
+        key = f"tools:{self._resilience.endpoints[0]}"
+        cached = None if args or kwargs else await shared_cache().get(key)
+        if cached is not None:
+            result = ListToolsResult.model_validate(cached)
+        else:
+            result = await self._session.list_tools(*args, **kwargs)
+            if not (args or kwargs):
+                data = result.model_dump(mode="json", by_alias=True, exclude_none=True)
+                await shared_cache().set(key, data, config.TOOL_LIST_CACHE_TTL)
+        for tool in result.tools:
+            if tool.annotations is not None and tool.annotations.idempotentHint:
+                _idempotent_tools.add(tool.name)
+            else:
+                _idempotent_tools.discard(tool.name)
+        return result
+
+    async def call_tool(
+        self,
+        name: str,
+        arguments: Optional[dict] = None,
+        read_timeout_seconds=None,
+        progress_callback=None,
+        *,
+        meta: Optional[dict[str, Any]] = None,
+    ):
+        budget = remaining()
+        timeout = config.MCP_CALL_TIMEOUT if budget is None else min(budget, config.MCP_CALL_TIMEOUT)
+        if timeout <= 0:
+            raise TimeoutError(f"Deadline exceeded before calling tool '{name}'")
+        deadline = time.monotonic() + timeout
+
+        async def request(endpoint: str):
+            session = await self._checkout(endpoint)
+            left = round(max(deadline - time.monotonic(), 0.0), 3)
+            return await session.call_tool(
+                name,
+                arguments,
+                read_timeout_seconds,
+                progress_callback,
+                meta={**(meta or {}), DEADLINE_META_KEY: left},
+            )
+
+        with stage("tool"):
+            return await self._resilience.call(
+                request, idempotent=name in _idempotent_tools, key=name, deadline=deadline
+            )
+
+
+class PooledSessionManager(MCPSessionManager):
+    """
+    Session manager for one toolset that checks sessions out of a pool.
+
+    Toolsets are rebuilt per request; their sessions outlive them in the
+    pool, so closing the toolset leaves pooled sessions open.
+
+    With `resilience`, sessions are `ResilientSession`s over the endpoints
+    it manages (the connection URL first, then replicas).
+    """
+
+    def __init__(self, connection_params, pool: McpSessionPool, resilience: Optional[Resilience] = None):
+        super().__init__(connection_params)
+        self._pool = pool
+        self._resilience = resilience
+
+    async def create_session(self, headers: Optional[dict[str, str]] = None) -> ClientSession:
+        if self._resilience is None:
+            return await self._pool.session(self._connection_params, headers)
+
+        async def checkout(endpoint: str) -> ClientSession:
+            params = self._connection_params.model_copy(update={"url": endpoint})
+            return await self._pool.session(params, headers)
+
+        # Connecting is retried on the next endpoint when it fails.
+        session = await self._resilience.call(checkout, key="checkout")
+        return ResilientSession(session, checkout, self._resilience)
+
+    async def close(self):
+        pass
+
+
+@functools.cache
+def shared_resilience() -> Resilience:
+    """Breakers, hedging and retries for tool calls to the MCP server and its replicas."""
+    return Resilience(
+        [config.MCP_SERVER_URL, *config.MCP_SERVER_REPLICAS],
+        is_failure=_is_failure,
+        is_unsent=_is_unsent,
+        retries=config.MCP_RETRIES,
+        hedge=config.MCP_HEDGE_ENABLED,
+        hedge_delay=config.MCP_HEDGE_DELAY,
+        failure_threshold=config.MCP_BREAKER_FAILURES,
+        reset_timeout=config.MCP_BREAKER_RESET,
+    )
+
+
+@functools.cache
+def shared_pool() -> McpSessionPool:
+    """The process-wide pool used by agents built with `build_adk_agent`."""
+    return McpSessionPool(
+        max_sessions=config.MCP_POOL_MAX_SESSIONS,
+        idle_ttl=config.MCP_POOL_IDLE_TTL,
+        validate_interval=config.MCP_POOL_VALIDATE_INTERVAL,
+    )
@@ -4,10 +4,16 @@ from mcp.types import ListToolsResult
 from google.adk.tools.mcp_tool.mcp_tool import MCPTool
 from google.adk.tools.mcp_tool.mcp_toolset import McpToolset
 
+from . import config
+from .singleflight import SingleFlight
+from .tool_declarations import CompactMcpTool, compact_tools
+
 logger = logging.getLogger(__name__)
 
 def apply_patches():
     """Applies monkey patches to fix upstream issues."""
+    if McpToolset.get_tools is _get_tools_patched:
+        return
     logger.info("Applying McpToolset monkey patch...")
     McpToolset.get_tools = _get_tools_patched
 
@@ -18,19 +24,14 @@ def apply_patches():
 # if a readonly_context is provided. However, the AgentCardBuilder calls canonical_tools()
 # with a None context, causing the auth headers to be skipped.
 # We patch it to always call header_provider if available.
+#
+# Concurrent listings against the same server with the same headers (e.g. a
+# burst of cold requests for one caller) also share a single list_tools call.
 
-async def _get_tools_patched(
-      self,
-      readonly_context = None,
-  ) -> list:
-    
-    # PATCH: Always call header_provider if it exists, regardless of context
-    headers = (
-        self._header_provider(readonly_context)
-        if self._header_provider
-        else None
-    )
+_list_tools_flight = SingleFlight()
 
+
+async def _list_tools(self, headers):
     # Get session from session manager
     session = await self._mcp_session_manager.create_session(headers=headers)
 
@@ -41,16 +42,38 @@ async def _get_tools_patched(
         else None
     )
     try:
-      tools_response = await asyncio.wait_for(
+      return await asyncio.wait_for(
           session.list_tools(), timeout=timeout_in_seconds
       )
     except Exception as e:
       raise ConnectionError("Failed to get tools from MCP server.") from e
 
+
+async def _get_tools_patched(
+      self,
+      readonly_context = None,
+  ) -> list:
+    
+    # PATCH: Always call header_provider if it exists, regardless of context
+    headers = (
+        self._header_provider(readonly_context)
+        if self._header_provider
+        else None
+    )
+
+    flight_key = (
+        getattr(self._connection_params, "url", id(self)),
+        tuple(sorted((headers or {}).items())),
+    )
+    tools_response: ListToolsResult = await _list_tools_flight.do(
+        flight_key, lambda: _list_tools(self, headers)
+    )
+
     # Apply filtering based on context and tool_filter
+    tool_cls = CompactMcpTool if config.MCP_COMPACT_TOOLS else MCPTool
     tools = []
     for tool in tools_response.tools:
-      mcp_tool = MCPTool(
+      mcp_tool = tool_cls(
           mcp_tool=tool,
           mcp_session_manager=self._mcp_session_manager,
           auth_scheme=self._auth_scheme,
@@ -61,4 +84,6 @@ async def _get_tools_patched(
 
       if self._is_tool_selected(mcp_tool, readonly_context):
         tools.append(mcp_tool)
+    if config.MCP_COMPACT_TOOLS:
+      return compact_tools(tools)
     return tools
@@ -1,15 +1,20 @@
 import asyncio
+import contextlib
 import logging
+import time
 
 import uvicorn
 from starlette.applications import Starlette
+from starlette.authentication import SimpleUser
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.requests import Request
-from starlette.responses import JSONResponse
+from starlette.responses import JSONResponse, Response
 from starlette.routing import Mount, Route
 from contextvars import ContextVar
 from .auth import TokenVerifier
 from .context import token_context
+from .logs import AccessLogMiddleware, configure_logging, stage
+from .profiling import PROFILES_PATH, ProfileStore, ProfilingMiddleware, StackSampler, profiles_routes
 
 class AuthMiddleware:
     def __init__(self, app):
@@ -24,34 +29,93 @@ class AuthMiddleware:
         # Create a lightweight Request wrapper to access headers easily
         request = Request(scope)
 
-        # Protect all calculator endpoints including agent card
-        if request.url.path.startswith("/calculator"):
+        # Protect all calculator endpoints including agent card, metrics and profiles
+        if (
+            request.url.path.startswith("/calculator")
+            or request.url.path == "/metrics"
+            or request.url.path.startswith(PROFILES_PATH)
+        ):
             try:
-                # verify_request returns the token string if successful
-                token = await self.verifier.verify_request(request)
+                with stage("auth"):
+                    token, claims = await self.verifier.authenticate(request)
+                if not claims.get("sub"):
+                    raise ValueError("Token has no subject")
                 token_context.set(token)
+                # The A2A call context takes its user from scope["user"]; ADK
+                # keys sessions by it, so conversations are scoped to the
+                # verified subject rather than the client-supplied contextId.
+                scope["user"] = SimpleUser(claims["sub"])
+                # Read downstream, e.g. for the profiling admin scope.
+                scope.setdefault("state", {})["claims"] = claims
             except ValueError as e:
-                logger.error(f"Auth failed: {e}")
+                logger.error("Auth failed: %s", e)
                 response = JSONResponse({"error": str(e)}, status_code=401)
                 await response(scope, receive, send)
                 return
         
         await self.app(scope, receive, send)
 
-from a2a.types import AgentCard
-from mcp.client.session import ClientSession
-from mcp.client.streamable_http import streamable_http_client
-from google.adk.a2a.utils.agent_card_builder import AgentCardBuilder
-from google.adk.a2a.utils.agent_to_a2a import to_a2a
+from typing import TYPE_CHECKING
 
-from .agent import build_adk_agent
-from .config import A2A_BASE_URL, MCP_SERVER_URL
+from google.adk.artifacts import InMemoryArtifactService
+from google.adk.auth.credential_service.in_memory_credential_service import (
+    InMemoryCredentialService,
+)
+from google.adk.memory import InMemoryMemoryService
+from google.adk.runners import Runner
+from google.adk.sessions.base_session_service import BaseSessionService
+
+from .agent import build_adk_agent, build_app, get_model
+from .patches import apply_patches
+from .compression import CompressionMiddleware, PrecompressedBody
+from .deadline import DeadlineMiddleware
+from .config import (
+    A2A_BASE_URL,
+    ACCESS_LOG,
+    AGENT_CARD_CACHE_TTL,
+    COMPRESSION_ENABLED,
+    COMPRESSION_GZIP_LEVEL,
+    COMPRESSION_MINIMUM_SIZE,
+    COMPRESSION_ZSTD_LEVEL,
+    LOG_LEVEL,
+    LOG_RATE_LIMIT_BURST,
+    LOG_RATE_LIMIT_INTERVAL,
+    MCP_HEALTH_INTERVAL,
+    MCP_HEALTH_TIMEOUT,
+    MCP_SERVER_URL,
+    MCP_SERVICE_TOKEN,
+    PROFILING_ADMIN_SCOPE,
+    PROFILING_DIR,
+    PROFILING_ENABLED,
+    PROFILING_INTERVAL,
+    PROFILING_MAX_PROFILES,
+    PROFILING_MAX_SECONDS,
+    PROFILING_SAMPLE_RATE,
+    WARMUP_ENABLED,
+    WARMUP_STEP_TIMEOUT,
+)
+from .health import McpHealthMonitor
+from .llm_scheduler import shared_llm_scheduler, shared_llm_usage
+from .mcp_pool import shared_pool, shared_resilience
+from .sessions import create_session_service
+from .shared_cache import shared_cache
+from .singleflight import SingleFlight
+from .warmup import Warmup
+
+# The A2A app and card builders add a noticeable share of import time; they
+# are imported on first use, which warmup does in the background at startup.
+if TYPE_CHECKING:
+    from a2a.types import AgentCard
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+apply_patches()
+
+# Configure logging: written by a background thread, with repeated errors
+# rate limited
+configure_logging(LOG_LEVEL, burst=LOG_RATE_LIMIT_BURST, interval=LOG_RATE_LIMIT_INTERVAL)
 logger = logging.getLogger("calculator_server")
 
 AGENT_PATH = "/calculator"
+AGENT_CARD_PATH = "/.well-known/agent-card.json"
 AGENT_NAME = "Calculator Agent"
 AGENT_VERSION = "0.1.0"
 AGENT_DESCRIPTION = (
@@ -65,7 +129,15 @@ def _agent_base_url(base_url: str) -> str:
     return base if base.endswith(AGENT_PATH) else f"{base}{AGENT_PATH}"
 
 
-async def _build_agent_card(agent, agent_url: str) -> AgentCard:
+def _import_a2a():
+    from google.adk.a2a.utils.agent_card_builder import AgentCardBuilder
+    from google.adk.a2a.utils.agent_to_a2a import to_a2a
+
+    return AgentCardBuilder, to_a2a
+
+
+async def _build_agent_card(agent, agent_url: str) -> "AgentCard":
+    AgentCardBuilder, _ = _import_a2a()
     builder = AgentCardBuilder(
         agent=agent,
         rpc_url=agent_url,
@@ -82,6 +154,20 @@ async def _build_agent_card(agent, agent_url: str) -> AgentCard:
     )
 
 
+async def _load_agent_card(agent, agent_url: str) -> "AgentCard":
+    """The agent card from the shared cache, or built and shared with the other workers."""
+    from a2a.types import AgentCard
+
+    key = f"agent_card:{agent_url}"
+    cached = await shared_cache().get(key)
+    if cached is not None:
+        return AgentCard.model_validate(cached)
+    card = await _build_agent_card(agent, agent_url)
+    data = card.model_dump(mode="json", by_alias=True, exclude_none=True)
+    await shared_cache().set(key, data, AGENT_CARD_CACHE_TTL)
+    return card
+
+
 
 # ------------------------------------------------------------------------------
 # Dynamic Application Handler
@@ -93,23 +179,74 @@ class DynamicA2AHandler:
     This approach ensures that the Agent (and its underlying McpToolset)
     is initialized within the context of the current request, allowing it
     to access the request-scoped 'token_context' for authentication.
+
+    Concurrent requests carrying the same token share one build, so a burst
+    of cold requests triggers a single agent card / list_tools round trip.
+    Conversation sessions live in one shared, bounded session service
+    rather than in a fresh in-memory store per built app.
+
+    The agent card does not depend on the caller, so it is built (by
+    warmup when a service token is configured, otherwise by the first
+    request, unless another worker has shared it through `shared_cache()`)
+    and reused by later builds for `AGENT_CARD_CACHE_TTL` seconds, then
+    loaded again so that changes to the MCP server's tools show up. Its
+    JSON is serialized and compressed once per card (see `card_response`).
     """
-    def __init__(self, agent_url: str):
+    def __init__(self, agent_url: str, session_service: BaseSessionService):
         self._agent_url = agent_url
+        self._session_service = session_service
+        self._builds = SingleFlight()
+        self._card_builds = SingleFlight()
+        self._agent_card: "AgentCard | None" = None
+        self._card_expires = 0.0
+        self._card_bodies: dict[bool, PrecompressedBody] = {}
 
     async def _build_app_and_card(self):
+        return await self._builds.do(token_context.get(), self._build)
+
+    def _card_is_fresh(self) -> bool:
+        return self._agent_card is not None and time.monotonic() < self._card_expires
+
+    async def _card_for(self, agent) -> "AgentCard":
+        if not self._card_is_fresh():
+            await self._card_builds.do("card", lambda: self._reload_card(agent))
+        return self._agent_card
+
+    async def _reload_card(self, agent):
+        # This triggers a 'list_tools' call to the MCP server, which
+        # requires the token from token_context.
+        try:
+            card = await _load_agent_card(agent, self._agent_url)
+        except Exception as exc:
+            if self._agent_card is None:
+                raise
+            # Keep serving the previous card; the next request tries again.
+            logger.warning("Failed to reload the agent card: %r", exc)
+            return
+        if card != self._agent_card:
+            self._agent_card = card
+            self._card_bodies = {}
+        self._card_expires = time.monotonic() + AGENT_CARD_CACHE_TTL
+
+    async def _build(self):
         # Build the agent (Model + Tools)
         # The McpToolset inside will look at the current token_context
         # when it streams tools in the next steps.
         agent = build_adk_agent()
         
-        # Build the Agent Card
-        # This triggers a 'list_tools' call to the MCP server, which requires
-        # the token from token_context.
-        agent_card = await _build_agent_card(agent, self._agent_url)
+        # Build (or reuse) the Agent Card
+        agent_card = await self._card_for(agent)
         
         # Create the A2A app wrapper
-        app = to_a2a(agent, agent_card=agent_card)
+        runner = Runner(
+            app=build_app(agent),
+            artifact_service=InMemoryArtifactService(),
+            session_service=self._session_service,
+            memory_service=InMemoryMemoryService(),
+            credential_service=InMemoryCredentialService(),
+        )
+        _, to_a2a = _import_a2a()
+        app = to_a2a(agent, agent_card=agent_card, runner=runner)
         
         # Ensure the router is started (if needed, though to_a2a usually handles this)
         if hasattr(app.router, "startup"):
@@ -119,7 +256,13 @@ class DynamicA2AHandler:
 
     async def __call__(self, scope, receive, send):
         try:
-            app, _ = await self._build_app_and_card()
+            if scope.get("method") == "GET" and scope["path"].endswith(AGENT_CARD_PATH):
+                # Served like the A2A app would, without building it per token.
+                response = await self.card_response(Request(scope), by_alias=True)
+                await response(scope, receive, send)
+                return
+            with stage("agent_build"):
+                app, _ = await self._build_app_and_card()
             await app(scope, receive, send)
         except Exception as exc:
             logger.exception("Failed to initialize dynamic A2A app", exc_info=exc)
@@ -129,18 +272,43 @@ class DynamicA2AHandler:
             )
             await response(scope, receive, send)
 
-    async def get_agent_card(self) -> AgentCard:
+    async def get_agent_card(self) -> "AgentCard":
+        if self._card_is_fresh():
+            return self._agent_card
         _, card = await self._build_app_and_card()
         return card
 
+    async def card_response(self, request: Request, by_alias: bool) -> Response:
+        """
+        Returns the agent card, compressed as the request accepts.
+
+        `by_alias` selects the A2A wire format (camelCase) served under the
+        agent path; the top-level card keeps the field names.
+        """
+        card = await self.get_agent_card()
+        body = self._card_bodies.get(by_alias)
+        if body is None:
+            content = card.model_dump(mode="json", exclude_none=True, by_alias=by_alias)
+            body = self._card_bodies[by_alias] = PrecompressedBody(
+                JSONResponse(content).body,
+                minimum_size=COMPRESSION_MINIMUM_SIZE,
+                gzip_level=COMPRESSION_GZIP_LEVEL,
+                zstd_level=COMPRESSION_ZSTD_LEVEL,
+            )
+        return body.response(request)
+
+    async def warm_agent_card(self, token: str):
+        """Builds and caches the agent card using `token` for tool listing."""
+        token_context.set(token)
+        await self._card_for(build_adk_agent())
+
 
 def _agent_card_handler(dynamic_handler: DynamicA2AHandler):
-    async def handler(_request):
+    async def handler(request):
         try:
-            card = await dynamic_handler.get_agent_card()
-            return JSONResponse(card.model_dump(mode="json", exclude_none=True))
+            return await dynamic_handler.card_response(request, by_alias=False)
         except Exception as exc:
-            logger.error(f"Failed to fetch agent card: {exc}")
+            logger.error("Failed to fetch agent card: %s", exc)
             return JSONResponse(
                  {"error": "Failed to fetch agent card", "detail": str(exc)},
                  status_code=503
@@ -148,43 +316,136 @@ def _agent_card_handler(dynamic_handler: DynamicA2AHandler):
     return handler
 
 
-async def _mcp_health_check(_request):
-    try:
-        # Note: This health check currently bypasses auth (no token context).
-        # Typically health checks should use a dedicated service token or 
-        # allow unauthenticated ping. For now, it might fail 401.
-        async with streamable_http_client(
-            MCP_SERVER_URL, terminate_on_close=False
-        ) as (read, write, _get_session_id):
-            async with ClientSession(read, write) as session:
-                try:
-                    await asyncio.wait_for(session.initialize(), timeout=3.0)
-                except Exception:
-                     # Ignore init errors (like 401) for health check connectivity
-                     pass
-        return JSONResponse({"status": "ok", "mcp_url": MCP_SERVER_URL})
-    except Exception as exc:
-        logger.exception("MCP connectivity check failed", exc_info=exc)
+def _mcp_health_handler(monitor: McpHealthMonitor):
+    async def handler(_request):
+        # Served from the monitor's last result; never touches the network.
+        return JSONResponse(monitor.snapshot(), status_code=200 if monitor.healthy else 503)
+    return handler
+
+
+def _metrics_handler(session_service: BaseSessionService):
+    async def handler(_request):
+        return JSONResponse(
+            {
+                "sessions": await session_service.stats(),
+                "mcp_pool": shared_pool().stats(),
+                "mcp_resilience": shared_resilience().snapshot(),
+                "llm_scheduler": shared_llm_scheduler().snapshot(),
+                "llm_usage": shared_llm_usage().snapshot(),
+                "shared_cache": shared_cache().snapshot(),
+            }
+        )
+    return handler
+
+
+def _warmup_steps(dynamic_handler: DynamicA2AHandler, monitor: McpHealthMonitor) -> dict:
+    async def jwks():
+        await TokenVerifier().refresh_jwks()
+
+    async def model():
+        # Builds the model client, importing LiteLLM here when it is selected.
+        await asyncio.to_thread(get_model)
+
+    async def a2a():
+        await asyncio.to_thread(_import_a2a)
+
+    async def mcp():
+        # Readiness gate only: waits for the health monitor's first good
+        # result; the monitor's session is not shared with requests.
+        if not monitor.healthy:
+            raise RuntimeError(monitor.snapshot().get("detail", "MCP server not yet healthy"))
+
+    async def agent_card():
+        # Runs in the warmup task's own context, so the service token does
+        # not leak into request handling.
+        await dynamic_handler.warm_agent_card(MCP_SERVICE_TOKEN)
+
+    # jwks, model and a2a populate process-wide caches used by every request.
+    steps = {"jwks": jwks, "model": model, "a2a": a2a, "mcp": mcp}
+    if MCP_SERVICE_TOKEN:
+        # Listing tools needs a credential the MCP server accepts.
+        steps["agent_card"] = agent_card
+    return steps
+
+
+def _ready_handler(warmup: Warmup | None):
+    async def handler(_request):
+        if warmup is None:
+            return JSONResponse({"status": "ready", "steps": {}})
+        status = "ready" if warmup.ready else "warming"
         return JSONResponse(
-            {"status": "error", "mcp_url": MCP_SERVER_URL, "detail": str(exc)},
-            status_code=503,
+            {"status": status, "steps": dict(warmup.status)},
+            status_code=200 if warmup.ready else 503,
         )
+    return handler
 
 
 def create_app() -> Starlette:
     agent_url = _agent_base_url(A2A_BASE_URL)
-    dynamic_handler = DynamicA2AHandler(agent_url)
-    
+    session_service = create_session_service()
+    dynamic_handler = DynamicA2AHandler(agent_url, session_service)
+    monitor = McpHealthMonitor(
+        MCP_SERVER_URL,
+        token=MCP_SERVICE_TOKEN,
+        interval=MCP_HEALTH_INTERVAL,
+        timeout=MCP_HEALTH_TIMEOUT,
+    )
+    warmup = (
+        Warmup(_warmup_steps(dynamic_handler, monitor), step_timeout=WARMUP_STEP_TIMEOUT)
+        if WARMUP_ENABLED
+        else None
+    )
+
+    profile_store = ProfileStore(PROFILING_DIR, max_profiles=PROFILING_MAX_PROFILES)
+    list_profiles, get_profile = profiles_routes(profile_store, PROFILING_ADMIN_SCOPE)
+
+    @contextlib.asynccontextmanager
+    async def lifespan(_app):
+        # Warm up in the background so the server accepts traffic (and
+        # answers /health) immediately; /ready gates on completion.
+        monitor.start()
+        if warmup is not None:
+            warmup.start()
+        try:
+            yield
+        finally:
+            if warmup is not None:
+                await warmup.stop()
+            await monitor.stop()
+            await shared_pool().close()
+
     app = Starlette(
+        lifespan=lifespan,
         routes=[
             Mount(AGENT_PATH, app=dynamic_handler, name="a2a_agent"),
             Route("/.well-known/agent-card.json", _agent_card_handler(dynamic_handler)),
             # Route("/calculator/info", _agent_card_handler(dynamic_handler)), # Optional alias
             Route("/health", lambda _: JSONResponse({"status": "ok"})),
-            Route("/health/mcp", _mcp_health_check),
+            Route("/health/mcp", _mcp_health_handler(monitor)),
+            Route("/ready", _ready_handler(warmup)),
+            Route("/metrics", _metrics_handler(session_service)),
+            Route(PROFILES_PATH, list_profiles),
+            Route(PROFILES_PATH + "/{profile_id}", get_profile),
         ],
     )
+    app.add_middleware(DeadlineMiddleware, path_prefix=AGENT_PATH)
+    app.add_middleware(
+        ProfilingMiddleware,
+        sampler=StackSampler(interval=PROFILING_INTERVAL, max_seconds=PROFILING_MAX_SECONDS),
+        store=profile_store,
+        sample_rate=PROFILING_SAMPLE_RATE if PROFILING_ENABLED else 0.0,
+        admin_scope=PROFILING_ADMIN_SCOPE,
+    )
     app.add_middleware(AuthMiddleware)
+    if COMPRESSION_ENABLED:
+        app.add_middleware(
+            CompressionMiddleware,
+            minimum_size=COMPRESSION_MINIMUM_SIZE,
+            gzip_level=COMPRESSION_GZIP_LEVEL,
+            zstd_level=COMPRESSION_ZSTD_LEVEL,
+        )
+    if ACCESS_LOG:
+        app.add_middleware(AccessLogMiddleware)
     return app
 
 
@@ -198,6 +459,10 @@ def start():
         host="0.0.0.0",
         port=8001,
         reload=True,
+        # uvicorn's own loggers go through the logging queue;
+        # AccessLogMiddleware replaces its access log.
+        log_config=None,
+        access_log=False,
     )
 
 
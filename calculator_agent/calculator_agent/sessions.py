@@ -0,0 +1,309 @@
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from google.adk.events.event import Event
+from google.adk.sessions.base_session_service import BaseSessionService, GetSessionConfig
+from google.adk.sessions.in_memory_session_service import InMemorySessionService
+from google.adk.sessions.session import Session
+from google.adk.sessions.sqlite_session_service import SqliteSessionService
+
+from . import config
+
+logger = logging.getLogger(__name__)
+
+
+def _compaction_start(events: list[Event], max_events: int) -> int:
+    """
+    Index of the first event to keep so at most `max_events` remain.
+
+    The cut moves forward past function responses so the kept history never
+    starts with a response whose function call was dropped. If only function
+    responses follow the cut, it moves back to their call instead, keeping
+    slightly more than `max_events` rather than dropping the latest events.
+    """
+    start = max(len(events) - max(max_events, 1), 0)
+    cut = start
+    while 0 < cut < len(events) and events[cut].get_function_responses():
+        cut += 1
+    if cut < len(events):
+        return cut
+    while start > 0 and events[start].get_function_responses():
+        start -= 1
+    return start
+
+
+def _event_size(event: Event) -> int:
+    return len(event.model_dump_json(exclude_none=True))
+
+
+def _state_size(state: dict[str, Any]) -> int:
+    return len(json.dumps(state, default=str))
+
+
+@dataclass
+class _SessionUsage:
+    last_access: float
+    base_bytes: int
+    event_bytes: list[int] = field(default_factory=list)
+
+    @property
+    def bytes(self) -> int:
+        return self.base_bytes + sum(self.event_bytes)
+
+
+class BoundedSessionService(InMemorySessionService):
+    """
+    In-memory session service with bounded memory.
+
+    - At most `max_sessions` sessions and roughly `max_bytes` of serialized
+      session data; least recently used sessions are evicted first.
+    - Sessions idle for longer than `idle_ttl` seconds are evicted.
+    - Each session keeps only its last `max_events` events.
+
+    Sizes are estimated from the serialized JSON of state and events.
+    """
+
+    def __init__(
+        self,
+        max_sessions: int = 1000,
+        max_bytes: int = 64 * 1024 * 1024,
+        idle_ttl: float = 1800.0,
+        max_events: int = 100,
+    ):
+        super().__init__()
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.idle_ttl = idle_ttl
+        self.max_events = max_events
+        self._usage: OrderedDict[tuple[str, str, str], _SessionUsage] = OrderedDict()
+        self._bytes = 0
+        self.evictions = {"capacity": 0, "idle": 0}
+
+    def _storage_session(self, key: tuple[str, str, str]) -> Session | None:
+        app_name, user_id, session_id = key
+        return self.sessions.get(app_name, {}).get(user_id, {}).get(session_id)
+
+    def _touch(self, key: tuple[str, str, str]):
+        usage = self._usage.get(key)
+        if usage is not None:
+            usage.last_access = time.monotonic()
+            self._usage.move_to_end(key)
+
+    def _untrack(self, key: tuple[str, str, str]):
+        usage = self._usage.pop(key, None)
+        if usage is not None:
+            self._bytes -= usage.bytes
+
+    def _evict(self, key: tuple[str, str, str], reason: str):
+        app_name, user_id, session_id = key
+        user_sessions = self.sessions.get(app_name, {}).get(user_id)
+        if user_sessions is not None:
+            user_sessions.pop(session_id, None)
+            if not user_sessions:
+                del self.sessions[app_name][user_id]
+        self._untrack(key)
+        self.evictions[reason] += 1
+        logger.debug("Evicted session %s (%s)", session_id, reason)
+
+    def _evict_idle(self):
+        deadline = time.monotonic() - self.idle_ttl
+        # Usage is ordered by last access, so only the front can be expired.
+        while self._usage:
+            key, usage = next(iter(self._usage.items()))
+            if usage.last_access > deadline:
+                break
+            self._evict(key, "idle")
+
+    def _enforce_limits(self):
+        # The most recently used session is never evicted to make room for itself.
+        while len(self._usage) > 1 and (
+            len(self._usage) > self.max_sessions or self._bytes > self.max_bytes
+        ):
+            key = next(iter(self._usage))
+            self._evict(key, "capacity")
+
+    async def create_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        state: Optional[dict[str, Any]] = None,
+        session_id: Optional[str] = None,
+    ) -> Session:
+        self._evict_idle()
+        session = await super().create_session(
+            app_name=app_name, user_id=user_id, state=state, session_id=session_id
+        )
+        key = (app_name, user_id, session.id)
+        usage = _SessionUsage(last_access=time.monotonic(), base_bytes=_state_size(session.state))
+        self._usage[key] = usage
+        self._bytes += usage.bytes
+        self._enforce_limits()
+        return session
+
+    async def get_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        session_id: str,
+        config: Optional[GetSessionConfig] = None,
+    ) -> Optional[Session]:
+        self._evict_idle()
+        session = await super().get_session(
+            app_name=app_name, user_id=user_id, session_id=session_id, config=config
+        )
+        if session is not None:
+            self._touch((app_name, user_id, session_id))
+        return session
+
+    async def delete_session(self, *, app_name: str, user_id: str, session_id: str) -> None:
+        await super().delete_session(app_name=app_name, user_id=user_id, session_id=session_id)
+        self._untrack((app_name, user_id, session_id))
+
+    async def append_event(self, session: Session, event: Event) -> Event:
+        event = await super().append_event(session=session, event=event)
+        key = (session.app_name, session.user_id, session.id)
+        storage_session = self._storage_session(key)
+        usage = self._usage.get(key)
+        if event.partial or storage_session is None or usage is None:
+            return event
+
+        size = _event_size(event)
+        usage.event_bytes.append(size)
+        self._bytes += size
+
+        start = _compaction_start(storage_session.events, self.max_events)
+        if start:
+            del storage_session.events[:start]
+            del session.events[:len(session.events) - len(storage_session.events)]
+            dropped = sum(usage.event_bytes[:start])
+            del usage.event_bytes[:start]
+            self._bytes -= dropped
+
+        self._touch(key)
+        self._enforce_limits()
+        return event
+
+    async def stats(self) -> dict:
+        self._evict_idle()
+        return {
+            "backend": "memory",
+            "sessions": len(self._usage),
+            "events": sum(len(usage.event_bytes) for usage in self._usage.values()),
+            "bytes": self._bytes,
+            "max_sessions": self.max_sessions,
+            "max_bytes": self.max_bytes,
+            "evictions": dict(self.evictions),
+        }
+
+
+class BoundedSqliteSessionService(SqliteSessionService):
+    """
+    SQLite-backed session service for working sets that outgrow memory.
+
+    Applies the same session-count, idle-TTL and event-history limits as
+    BoundedSessionService. Expired and excess sessions are purged at most
+    every `purge_interval` seconds; there is no byte budget since the data
+    lives on disk, but the database size is reported in `stats`.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        max_sessions: int = 100_000,
+        idle_ttl: float = 1800.0,
+        max_events: int = 100,
+        purge_interval: float = 30.0,
+    ):
+        super().__init__(db_path)
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self.max_events = max_events
+        self.purge_interval = purge_interval
+        self._last_purge = 0.0
+        self.evictions = {"capacity": 0, "idle": 0}
+
+    async def _purge(self):
+        now = time.monotonic()
+        if now - self._last_purge < self.purge_interval:
+            return
+        self._last_purge = now
+        async with self._get_db_connection() as db:
+            # Events go with their session (ON DELETE CASCADE).
+            cursor = await db.execute(
+                "DELETE FROM sessions WHERE update_time < ?", (time.time() - self.idle_ttl,)
+            )
+            self.evictions["idle"] += cursor.rowcount
+            cursor = await db.execute(
+                "DELETE FROM sessions WHERE rowid IN ("
+                "SELECT rowid FROM sessions ORDER BY update_time DESC LIMIT -1 OFFSET ?)",
+                (self.max_sessions,),
+            )
+            self.evictions["capacity"] += cursor.rowcount
+            await db.commit()
+
+    async def create_session(self, **kwargs) -> Session:
+        await self._purge()
+        return await super().create_session(**kwargs)
+
+    async def get_session(self, *, config: Optional[GetSessionConfig] = None, **kwargs) -> Optional[Session]:
+        config = config or GetSessionConfig()
+        if not config.num_recent_events or config.num_recent_events > self.max_events:
+            config = config.model_copy(update={"num_recent_events": self.max_events})
+        session = await super().get_session(config=config, **kwargs)
+        if session is not None:
+            del session.events[:_compaction_start(session.events, self.max_events)]
+        return session
+
+    async def append_event(self, session: Session, event: Event) -> Event:
+        event = await super().append_event(session=session, event=event)
+        if event.partial:
+            return event
+        async with self._get_db_connection() as db:
+            await db.execute(
+                "DELETE FROM events WHERE app_name=? AND user_id=? AND session_id=? "
+                "AND id NOT IN (SELECT id FROM events WHERE app_name=? AND user_id=? "
+                "AND session_id=? ORDER BY timestamp DESC LIMIT ?)",
+                (session.app_name, session.user_id, session.id) * 2 + (self.max_events,),
+            )
+            await db.commit()
+        return event
+
+    async def stats(self) -> dict:
+        async with self._get_db_connection() as db:
+            sessions = (await db.execute_fetchall("SELECT COUNT(*) FROM sessions"))[0][0]
+            events = (await db.execute_fetchall("SELECT COUNT(*) FROM events"))[0][0]
+        return {
+            "backend": "sqlite",
+            "sessions": sessions,
+            "events": events,
+            "bytes": os.path.getsize(self._db_path) if os.path.exists(self._db_path) else 0,
+            "max_sessions": self.max_sessions,
+            "evictions": dict(self.evictions),
+        }
+
+
+def create_session_service() -> BaseSessionService:
+    """Builds the session service selected by SESSION_BACKEND."""
+    backend = config.SESSION_BACKEND
+    if backend == "memory":
+        return BoundedSessionService(
+            max_sessions=config.SESSION_MAX_SESSIONS,
+            max_bytes=config.SESSION_MAX_BYTES,
+            idle_ttl=config.SESSION_IDLE_TTL,
+            max_events=config.SESSION_MAX_EVENTS,
+        )
+    if backend.startswith("sqlite:"):
+        return BoundedSqliteSessionService(
+            backend.removeprefix("sqlite:"),
+            max_sessions=config.SESSION_MAX_SESSIONS,
+            idle_ttl=config.SESSION_IDLE_TTL,
+            max_events=config.SESSION_MAX_EVENTS,
+        )
+    raise ValueError(f"Unsupported session backend: {backend}")
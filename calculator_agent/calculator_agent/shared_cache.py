@@ -0,0 +1,10 @@
+import functools
+
+from . import config
+from .cache_backends import SharedCache, create_cache_backend
+
+
+@functools.cache
+def shared_cache() -> SharedCache:
+    """The process-wide cache, on the backend selected by `CACHE_BACKEND`."""
+    return SharedCache(create_cache_backend(config.CACHE_BACKEND))
@@ -0,0 +1,40 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Hashable, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key into one in-flight call.
+
+    The first caller for a key starts `fn()` as a task; callers arriving
+    while it runs await the same task and get the same result or exception.
+    Nothing is cached: once the call finishes, the next caller starts a new
+    one. A caller being cancelled does not cancel the shared call, so the
+    remaining waiters still get their result.
+    """
+
+    def __init__(self):
+        self._calls: dict[Hashable, asyncio.Task] = {}
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # Mark the exception as retrieved in case every waiter was cancelled.
+        if not task.cancelled() and task.exception() is not None:
+            logger.debug("Single-flight call failed: %s", task.exception())
@@ -0,0 +1,125 @@
+import json
+import re
+from typing import Any, Optional
+
+from google.adk.features import FeatureName, is_feature_enabled
+from google.adk.tools._gemini_schema_util import _to_gemini_schema
+from google.adk.tools.base_tool import BaseTool
+from google.adk.tools.mcp_tool.mcp_tool import MCPTool
+from google.adk.tools.tool_context import ToolContext
+from google.genai.types import FunctionDeclaration
+
+# Schema keys that only help humans reading the schema.
+_DROPPED_KEYS = {"title", "examples", "$schema"}
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s")
+
+
+def short_description(text: Optional[str], limit: int = 100) -> str:
+    """The first sentence of `text`, cut at `limit` characters."""
+    text = " ".join((text or "").split())
+    sentence = _SENTENCE_END.split(text, maxsplit=1)[0]
+    return sentence if len(sentence) <= limit else sentence[: limit - 3].rstrip() + "..."
+
+
+def compact_schema(schema: Any, defs: Optional[dict] = None) -> Any:
+    """
+    A smaller JSON schema that validates the same arguments.
+
+    Titles and examples are dropped, descriptions are cut to their first
+    sentence, and `$ref`s are inlined (and `$defs` removed), so schemas that
+    only differed in their titles compare equal.
+    """
+    if isinstance(schema, list):
+        return [compact_schema(item, defs) for item in schema]
+    if not isinstance(schema, dict):
+        return schema
+    if defs is None:
+        defs = schema.get("$defs", {})
+    ref = schema.get("$ref")
+    if isinstance(ref, str) and ref.startswith("#/$defs/"):
+        return compact_schema(defs[ref.removeprefix("#/$defs/")], defs)
+
+    compacted = {}
+    for key, value in schema.items():
+        if key in _DROPPED_KEYS or key == "$defs":
+            continue
+        if key == "description" and isinstance(value, str):
+            compacted[key] = short_description(value)
+        elif key == "properties" and isinstance(value, dict):
+            # Property names are data here, not schema keywords.
+            compacted[key] = {name: compact_schema(prop, defs) for name, prop in value.items()}
+        else:
+            compacted[key] = compact_schema(value, defs)
+    return compacted
+
+
+def _declaration(name: str, description: str, parameters: dict) -> FunctionDeclaration:
+    if is_feature_enabled(FeatureName.JSON_SCHEMA_FOR_FUNC_DECL):
+        return FunctionDeclaration(name=name, description=description, parameters_json_schema=parameters)
+    return FunctionDeclaration(name=name, description=description, parameters=_to_gemini_schema(parameters))
+
+
+class CompactMcpTool(MCPTool):
+    """An MCP tool declared with a compacted schema and a one-sentence description, without its output schema."""
+
+    def _get_declaration(self) -> FunctionDeclaration:
+        return _declaration(
+            self.name,
+            short_description(self.description),
+            compact_schema(self._mcp_tool.inputSchema),
+        )
+
+
+class McpToolGroup(BaseTool):
+    """
+    One declaration for several MCP tools that take the same arguments.
+
+    The model picks the tool with an `op` argument; the call is run by that
+    member tool, so sessions, auth and retries are unchanged.
+    """
+
+    def __init__(self, members: list[MCPTool]):
+        self.members = {tool.name: tool for tool in members}
+        self.parameters = compact_schema(members[0].raw_mcp_tool.inputSchema)
+        super().__init__(
+            name="_".join(self.members),
+            description=" ".join(f"{name}: {short_description(tool.description)}" for name, tool in self.members.items()),
+        )
+
+    def _get_declaration(self) -> FunctionDeclaration:
+        parameters = dict(self.parameters)
+        parameters["properties"] = {"op": {"type": "string", "enum": list(self.members)}, **parameters.get("properties", {})}
+        parameters["required"] = ["op", *parameters.get("required", [])]
+        return _declaration(self.name, self.description, parameters)
+
+    async def run_async(self, *, args: dict[str, Any], tool_context: ToolContext) -> Any:
+        args = dict(args)
+        op = args.pop("op", None)
+        member = self.members.get(op)
+        if member is None:
+            return {"error": f"Unknown op {op!r}; expected one of {', '.join(self.members)}."}
+        return await member.run_async(args=args, tool_context=tool_context)
+
+
+def compact_tools(tools: list[CompactMcpTool]) -> list[BaseTool]:
+    """
+    Groups `tools` and puts them in a stable order.
+
+    Tools whose compacted input schemas are identical (the arithmetic tools)
+    become one `McpToolGroup`; the others are kept as they are. Sorting
+    by name keeps the declarations byte-identical between requests, so
+    backends with prefix caching can reuse the system-plus-tools prefix.
+    """
+    by_schema: dict[str, list[CompactMcpTool]] = {}
+    for tool in tools:
+        key = json.dumps(compact_schema(tool.raw_mcp_tool.inputSchema), sort_keys=True)
+        by_schema.setdefault(key, []).append(tool)
+
+    compacted: list[BaseTool] = []
+    for members in by_schema.values():
+        if len(members) > 1:
+            compacted.append(McpToolGroup(members))
+        else:
+            compacted.extend(members)
+    return sorted(compacted, key=lambda tool: tool.name)
+
@@ -0,0 +1,70 @@
+import asyncio
+import contextlib
+import logging
+import time
+from typing import Awaitable, Callable
+
+logger = logging.getLogger(__name__)
+
+
+class Warmup:
+    """
+    Runs startup warmup steps concurrently in the background.
+
+    Each step is retried with exponential backoff until it succeeds, so an
+    instance whose dependencies are still coming up becomes ready on its
+    own. `ready` turns true once every step has succeeded. `status` is
+    served on the unauthenticated `/ready`, so a failed step shows only
+    the exception type there; the full error is logged.
+    """
+
+    def __init__(
+        self,
+        steps: dict[str, Callable[[], Awaitable]],
+        step_timeout: float = 10.0,
+        retry_initial: float = 1.0,
+        retry_max: float = 30.0,
+    ):
+        self.steps = steps
+        self.step_timeout = step_timeout
+        self.retry_initial = retry_initial
+        self.retry_max = retry_max
+        self.status: dict[str, str] = {name: "pending" for name in steps}
+        self.durations: dict[str, float] = {}
+        self._task: asyncio.Task | None = None
+
+    @property
+    def ready(self) -> bool:
+        return all(status == "ok" for status in self.status.values())
+
+    async def _run_step(self, name: str, step: Callable[[], Awaitable]):
+        delay = self.retry_initial
+        started = time.monotonic()
+        while True:
+            try:
+                # asyncio.timeout rather than wait_for: on 3.11, wait_for can
+                # swallow a cancellation that races with a failing step.
+                async with asyncio.timeout(self.step_timeout):
+                    await step()
+                self.status[name] = "ok"
+                self.durations[name] = time.monotonic() - started
+                logger.info("Warmup step '%s' done in %.2fs", name, self.durations[name])
+                return
+            except Exception as e:
+                self.status[name] = f"error: {type(e).__name__}"
+                logger.warning("Warmup step '%s' failed, retrying in %.1fs: %r", name, delay, e)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.retry_max)
+
+    async def run(self):
+        await asyncio.gather(*(self._run_step(name, step) for name, step in self.steps.items()))
+
+    def start(self):
+        self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
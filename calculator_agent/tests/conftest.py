@@ -10,6 +10,8 @@ from a2a.types import (
 )
 from google.adk.a2a.utils.agent_card_builder import AgentCardBuilder
 
+from calculator_agent.shared_cache import shared_cache
+
 async def _stub_agent_card_build(*args, **kwargs):  # noqa: D401
     return AgentCard(
         name="Calculator Agent",
@@ -42,6 +44,7 @@ def mock_auth():
     with patch("calculator_agent.server.TokenVerifier") as mock_verifier_cls:
         mock_instance = AsyncMock()
         mock_instance.verify_request.return_value = "mock_token"
+        mock_instance.authenticate.return_value = ("mock_token", {"sub": "test-user"})
         mock_verifier_cls.return_value = mock_instance
         yield mock_verifier_cls
 
@@ -50,3 +53,10 @@ def mock_agent_card_builder():
     """Stub AgentCardBuilder to avoid real MCP calls."""
     with patch.object(AgentCardBuilder, "build", side_effect=_stub_agent_card_build) as mock_build:
         yield mock_build
+
+@pytest.fixture(autouse=True)
+def fresh_shared_cache():
+    """Give every test an empty process-wide shared cache."""
+    shared_cache.cache_clear()
+    yield
+    shared_cache.cache_clear()
@@ -0,0 +1,69 @@
+import asyncio
+import io
+import json
+
+import pytest
+
+from calculator_agent.batch import read_tasks, run_batch
+
+
+class FakeAgent:
+    def __init__(self):
+        self.running = self.peak = 0
+        self.sessions = 0
+
+    async def run(self, task):
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        try:
+            await asyncio.sleep(0.05 if task == "slow" else 0.01)
+            if task == "fail":
+                raise ValueError("bad task")
+            return task.upper()
+        finally:
+            self.running -= 1
+
+    async def pooled_session(self):
+        self.sessions += 1
+        return "session"
+
+    async def run_simple_eval(self, expr, session=None):
+        return f"{expr} via {session}"
+
+
+def test_read_tasks_skips_blanks_and_comments():
+    assert read_tasks(["add 1 2\n", "\n", "# note\n", "  mul 3 4  \n"]) == ["add 1 2", "mul 3 4"]
+
+
+@pytest.mark.asyncio
+async def test_batch_runs_tasks_concurrently_and_streams_results():
+    agent = FakeAgent()
+    tasks = [f"task {i}" for i in range(10)] + ["fail", "simple_exec add 1 2", "simple_exec mul 3 4"]
+    out = io.StringIO()
+
+    summary = await run_batch(agent, tasks, out, concurrency=4)
+
+    records = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert sorted(record["index"] for record in records) == list(range(len(tasks)))
+    by_task = {record["task"]: record for record in records}
+    assert by_task["task 3"]["ok"] and by_task["task 3"]["result"] == "TASK 3"
+    assert by_task["fail"] == {**by_task["fail"], "ok": False, "error": "ValueError: bad task"}
+    assert by_task["simple_exec add 1 2"]["result"] == "add 1 2 via session"
+    assert all(record["seconds"] >= 0 for record in records)
+
+    # Simple tasks check sessions out of the pool; concurrency is bounded.
+    assert agent.sessions == 2
+    assert 1 < agent.peak <= 4
+    assert summary["tasks"] == 13 and summary["succeeded"] == 12 and summary["failed"] == 1
+    assert summary["tasks_per_second"] > 0
+
+
+@pytest.mark.asyncio
+async def test_batch_timeout_fails_only_the_slow_task():
+    out = io.StringIO()
+    summary = await run_batch(FakeAgent(), ["slow", "fast"], out, concurrency=2, timeout=0.03)
+
+    records = {record["task"]: record for record in map(json.loads, out.getvalue().splitlines())}
+    assert records["slow"]["error"] == "timed out"
+    assert records["fast"]["ok"]
+    assert summary["failed"] == 1
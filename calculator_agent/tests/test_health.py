@@ -0,0 +1,90 @@
+import asyncio
+from contextlib import asynccontextmanager
+from unittest.mock import patch
+
+import pytest
+from starlette.testclient import TestClient
+
+from calculator_agent import server
+from calculator_agent.health import McpHealthMonitor
+
+
+class FakeSession:
+    def __init__(self, fail_on: set[int] = frozenset()):
+        self.pings = 0
+        self.fail_on = fail_on
+
+    async def send_ping(self):
+        self.pings += 1
+        if self.pings in self.fail_on:
+            raise ConnectionError("connection reset")
+
+
+@pytest.mark.asyncio
+async def test_monitor_reuses_one_session_for_pings():
+    opened = []
+
+    @asynccontextmanager
+    async def open_session(self):
+        opened.append(FakeSession())
+        yield opened[-1]
+
+    monitor = McpHealthMonitor("http://mcp/mcp/", token="service-token", interval=0.005)
+    with patch.object(McpHealthMonitor, "_open_session", open_session):
+        monitor.start()
+        await asyncio.sleep(0.05)
+        await monitor.stop()
+
+    assert len(opened) == 1
+    assert opened[0].pings >= 3
+    snapshot = monitor.snapshot()
+    assert snapshot["status"] == "ok" and snapshot["authenticated"] is True
+    assert "latency_ms" in snapshot
+
+
+@pytest.mark.asyncio
+async def test_monitor_reconnects_after_failed_ping():
+    opened = []
+    statuses = []
+
+    @asynccontextmanager
+    async def open_session(self):
+        opened.append(FakeSession(fail_on={2} if not opened else set()))
+        yield opened[-1]
+
+    monitor = McpHealthMonitor("http://mcp/mcp/", token="service-token", interval=0.005)
+    record = monitor._record
+
+    def recording(status, **kwargs):
+        statuses.append(status)
+        record(status, **kwargs)
+
+    with patch.object(McpHealthMonitor, "_open_session", open_session), patch.object(
+        monitor, "_record", recording
+    ):
+        monitor.start()
+        await asyncio.sleep(0.05)
+        await monitor.stop()
+
+    assert len(opened) == 2
+    assert statuses[:3] == ["ok", "error", "ok"]
+    assert monitor.healthy
+
+
+def test_health_endpoint_serves_cached_status_without_probing():
+    probes = 0
+
+    async def unreachable(self):
+        nonlocal probes
+        probes += 1
+        raise ConnectionError("connection refused")
+
+    with patch.object(McpHealthMonitor, "_monitor_reachability", unreachable), patch.object(
+        server, "WARMUP_ENABLED", False
+    ):
+        with TestClient(server.create_app()) as client:
+            responses = [client.get("/health/mcp") for _ in range(20)]
+
+    assert probes <= 1
+    assert all(response.status_code == 503 for response in responses)
+    assert responses[-1].json()["status"] in {"unknown", "error"}
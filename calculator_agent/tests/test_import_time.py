@@ -0,0 +1,41 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+PACKAGE_ROOT = Path(__file__).resolve().parents[1]
+
+# Packages each entry point must not import when cold: they are imported
+# where they are used (the agent framework when an agent is built, LiteLLM
+# when selected, the A2A builders during warmup).
+LAZY = {
+    "calculator_agent.main": ["google.adk", "google.genai", "litellm", "a2a", "mcp"],
+    "calculator_agent.agent": ["google.adk", "google.genai", "litellm", "a2a", "mcp"],
+    "calculator_agent.server": ["litellm", "a2a", "google.adk.a2a"],
+}
+
+
+def _imported_modules(module: str) -> set[str]:
+    """The modules in `sys.modules` after importing `module` in a fresh interpreter."""
+    result = subprocess.run(
+        [sys.executable, "-c", f"import json, sys, {module}; print(json.dumps(sorted(sys.modules)))"],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=PACKAGE_ROOT,
+    )
+    return set(json.loads(result.stdout.splitlines()[-1]))
+
+
+@pytest.mark.parametrize("module", sorted(LAZY))
+def test_cold_import_leaves_heavy_packages_unloaded(module):
+    imported = _imported_modules(module)
+    assert module in imported
+    loaded = sorted(
+        package
+        for package in LAZY[module]
+        if any(name == package or name.startswith(f"{package}.") for name in imported)
+    )
+    assert not loaded, f"importing {module} loaded {', '.join(loaded)}"
@@ -0,0 +1,134 @@
+import asyncio
+import socket
+
+import pytest
+import pytest_asyncio
+import uvicorn
+from google.adk.models import LlmRequest
+from google.genai import types
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from calculator_agent.llm_scheduler import LlmOverloadedError, LlmScheduler, LlmUsage, ScheduledLlm
+
+
+@pytest.mark.asyncio
+async def test_waiting_calls_are_served_round_robin_per_principal():
+    scheduler = LlmScheduler(max_concurrency=1)
+    order = []
+
+    async def call(principal, name):
+        async with scheduler.slot(principal):
+            order.append(name)
+            await asyncio.sleep(0.01)
+
+    await scheduler.acquire("busy")
+    # "a" queues three calls before "b" queues one; "b" still goes second.
+    tasks = [asyncio.create_task(call("a", f"a{i}")) for i in range(3)]
+    await asyncio.sleep(0)
+    tasks.append(asyncio.create_task(call("b", "b0")))
+    await asyncio.sleep(0)
+    assert scheduler.snapshot()["queued"] == 4
+    scheduler.release()
+    await asyncio.gather(*tasks)
+
+    assert order == ["a0", "b0", "a1", "a2"]
+    snapshot = scheduler.snapshot()
+    assert snapshot["admitted"] == 5 and snapshot["in_flight"] == 0
+    assert snapshot["max_queue_wait"] > 0
+
+
+@pytest.mark.asyncio
+async def test_batch_window_releases_concurrent_calls_together():
+    scheduler = LlmScheduler(max_concurrency=8, batch_window=0.05, batch_max_size=3)
+
+    async def admitted_at():
+        await scheduler.acquire("a")
+        return asyncio.get_running_loop().time()
+
+    # A full batch is released as soon as it fills...
+    times = await asyncio.gather(*(admitted_at() for _ in range(3)))
+    assert max(times) - min(times) < 0.01
+    # ...a lone call after the window.
+    start = asyncio.get_running_loop().time()
+    assert await admitted_at() - start >= 0.04
+    snapshot = scheduler.snapshot()
+    assert snapshot["batches"] == 2 and snapshot["avg_batch_size"] == 2.0
+
+
+@pytest.mark.asyncio
+async def test_overload_is_rejected():
+    scheduler = LlmScheduler(max_concurrency=1, max_queue=1, queue_timeout=0.05)
+    await scheduler.acquire("a")
+    with pytest.raises(LlmOverloadedError, match="No model slot"):
+        await scheduler.acquire("a")
+    waiting = asyncio.create_task(scheduler.acquire("a"))
+    await asyncio.sleep(0)
+    with pytest.raises(LlmOverloadedError, match="already queued"):
+        await scheduler.acquire("b")
+    waiting.cancel()
+    assert scheduler.snapshot()["rejected"] == 2
+
+
+@pytest_asyncio.fixture
+async def fake_llm_server():
+    """A local OpenAI-compatible chat completions server that records its peak concurrency."""
+    state = {"running": 0, "peak": 0}
+
+    async def chat(request):
+        body = await request.json()
+        state["running"] += 1
+        state["peak"] = max(state["peak"], state["running"])
+        try:
+            await asyncio.sleep(0.05)
+        finally:
+            state["running"] -= 1
+        return JSONResponse(
+            {
+                "id": "chatcmpl-1",
+                "object": "chat.completion",
+                "created": 0,
+                "model": body["model"],
+                "choices": [
+                    {"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": "42"}}
+                ],
+                "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+            }
+        )
+
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    app = Starlette(routes=[Route("/v1/chat/completions", chat, methods=["POST"])])
+    server = uvicorn.Server(uvicorn.Config(app, log_level="warning"))
+    serving = asyncio.create_task(server.serve(sockets=[sock]))
+    while not server.started:
+        await asyncio.sleep(0.01)
+    yield f"http://127.0.0.1:{sock.getsockname()[1]}/v1", state
+    server.should_exit = True
+    await serving
+
+
+@pytest.mark.asyncio
+async def test_litellm_calls_to_a_local_server_are_capped(fake_llm_server, monkeypatch):
+    monkeypatch.setenv("LITELLM_LOCAL_MODEL_COST_MAP", "True")
+    from google.adk.models.lite_llm import LiteLlm
+
+    api_base, state = fake_llm_server
+    inner = LiteLlm(model="openai/qwen3-4b-instruct", api_base=api_base, api_key="unused")
+    llm = ScheduledLlm(model=inner.model, llm=inner, scheduler=LlmScheduler(max_concurrency=2), usage=LlmUsage())
+
+    async def ask():
+        request = LlmRequest(
+            model=llm.model,
+            contents=[types.Content(role="user", parts=[types.Part(text="6 * 7?")])],
+        )
+        return [response async for response in llm.generate_content_async(request)]
+
+    replies = await asyncio.gather(*(ask() for _ in range(6)))
+
+    assert all(reply[-1].content.parts[0].text == "42" for reply in replies)
+    assert state["peak"] == 2
+    assert llm.scheduler.snapshot()["admitted"] == 6
+    # Prompt token counts come from the server's usage block.
+    assert llm.usage.snapshot()["calls"] == 6 and llm.usage.snapshot()["prompt_tokens"] == 6
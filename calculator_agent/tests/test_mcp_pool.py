@@ -0,0 +1,180 @@
+import asyncio
+import time
+from unittest.mock import patch
+
+import jwt
+import pytest
+from google.adk.tools.mcp_tool.mcp_session_manager import (
+    MCPSessionManager,
+    StreamableHTTPConnectionParams,
+)
+
+from calculator_agent.mcp_pool import McpSessionPool, PooledSessionManager
+
+PARAMS = StreamableHTTPConnectionParams(url="http://mcp/mcp/")
+
+
+def bearer(sub: str, iat: int = 0) -> dict[str, str]:
+    token = jwt.encode({"sub": sub, "iat": iat}, "secret", algorithm="HS256")
+    return {"Authorization": f"Bearer {token}"}
+
+
+class FakeSession:
+    def __init__(self, headers):
+        self.headers = headers
+        self.healthy = True
+        self.pings = 0
+        self.release = asyncio.Event()
+
+    async def send_ping(self):
+        self.pings += 1
+        if not self.healthy:
+            raise ConnectionError("session expired")
+
+    async def call_tool(self, name):
+        await self.release.wait()
+        return name
+
+
+@pytest.fixture
+def upstream():
+    """Replaces the real MCP connection with one fake session per manager."""
+    opened: list[FakeSession] = []
+    closed: list[FakeSession] = []
+
+    async def create_session(self, headers=None):
+        if getattr(self, "_fake", None) is None:
+            self._fake = FakeSession(headers)
+            opened.append(self._fake)
+        return self._fake
+
+    async def close(self):
+        if getattr(self, "_fake", None) is not None:
+            closed.append(self._fake)
+            self._fake = None
+
+    with patch.object(MCPSessionManager, "create_session", create_session), \
+            patch.object(MCPSessionManager, "close", close):
+        yield opened, closed
+
+
+@pytest.mark.asyncio
+async def test_toolsets_for_one_principal_share_a_session(upstream):
+    opened, _ = upstream
+    pool = McpSessionPool()
+
+    # A new PooledSessionManager per request, as build_adk_agent does.
+    first = await PooledSessionManager(PARAMS, pool).create_session(bearer("alice"))
+    second = await PooledSessionManager(PARAMS, pool).create_session(bearer("alice"))
+    other = await PooledSessionManager(PARAMS, pool).create_session(bearer("bob"))
+
+    assert first is second
+    assert other is not first
+    assert len(opened) == 2
+    assert pool.stats()["hits"] == 1 and pool.stats()["misses"] == 2
+
+
+@pytest.mark.asyncio
+async def test_rotated_token_reconnects_with_new_credentials(upstream):
+    opened, closed = upstream
+    pool = McpSessionPool()
+
+    old = await pool.session(PARAMS, bearer("alice", iat=1))
+    new = await pool.session(PARAMS, bearer("alice", iat=2))
+
+    assert new is not old
+    assert new.headers == bearer("alice", iat=2)
+    assert len(pool) == 1
+    assert pool.stats()["evictions"]["reauth"] == 1
+
+    # Nothing was in flight on the old session, so it is closed right away.
+    await pool.close()
+    assert opened[0] in closed
+
+
+@pytest.mark.asyncio
+async def test_older_token_of_a_subject_reuses_the_newer_session(upstream):
+    opened, _ = upstream
+    pool = McpSessionPool()
+
+    # Two clients of one subject, holding tokens issued at different times.
+    for iat in (2, 1, 2, 1):
+        session = await pool.session(PARAMS, bearer("alice", iat=iat))
+
+    assert session.headers == bearer("alice", iat=2)
+    assert len(opened) == 1
+    assert pool.stats()["evictions"]["reauth"] == 0
+
+
+@pytest.mark.asyncio
+async def test_retired_session_is_closed_when_its_calls_finish(upstream):
+    opened, closed = upstream
+    pool = McpSessionPool()
+
+    old = await pool.session(PARAMS, bearer("alice", iat=1))
+    call = asyncio.create_task(old.call_tool("add"))
+    await asyncio.sleep(0)
+    await pool.session(PARAMS, bearer("alice", iat=2))
+    await asyncio.sleep(0)
+    assert pool.stats()["retired"] == 1
+    assert not closed
+
+    opened[0].release.set()
+    assert await call == "add"
+    await asyncio.sleep(0)
+    assert closed == [opened[0]]
+    assert pool.stats()["retired"] == 0
+
+
+@pytest.mark.asyncio
+async def test_failed_validation_reconnects(upstream):
+    opened, closed = upstream
+    pool = McpSessionPool(validate_interval=0)
+
+    session = await pool.session(PARAMS, bearer("alice"))
+    opened[0].healthy = False
+    replacement = await pool.session(PARAMS, bearer("alice"))
+
+    assert replacement is not session
+    assert closed == [opened[0]]
+    assert pool.stats()["evictions"]["unhealthy"] == 1
+
+
+@pytest.mark.asyncio
+async def test_idle_and_capacity_eviction(upstream):
+    opened, closed = upstream
+    pool = McpSessionPool(max_sessions=2, idle_ttl=60)
+
+    await pool.session(PARAMS, bearer("a"))
+    await pool.session(PARAMS, bearer("b"))
+    await pool.session(PARAMS, bearer("c"))
+    assert len(pool) == 2
+    assert pool.stats()["evictions"]["capacity"] == 1
+
+    with patch("calculator_agent.mcp_pool.time.monotonic", return_value=time.monotonic() + 120):
+        await pool.session(PARAMS, bearer("d"))
+    assert len(pool) == 1
+    assert pool.stats()["evictions"]["idle"] == 2
+
+    await pool.close()
+    assert len(closed) == len(opened) == 4
+
+
+@pytest.mark.asyncio
+async def test_memory_url_calls_the_server_in_process(monkeypatch):
+    pytest.importorskip("mcp_calculator.app")
+    monkeypatch.setattr(
+        "mcp_calculator.auth.TokenVerifier.verify_token",
+        lambda _self, token: jwt.decode(token, options={"verify_signature": False}),
+    )
+    from mcp_calculator.app import in_process
+
+    pool = McpSessionPool()
+    session = await pool.session(StreamableHTTPConnectionParams(url="memory://mcp_calculator"), bearer("alice"))
+    try:
+        result = await session.call_tool("add", {"a": 2, "b": 3})
+        assert result.structuredContent == {"result": 5.0}
+        assert in_process.snapshot()["sessions"] == 1
+    finally:
+        await pool.close()
+    assert in_process.snapshot()["sessions"] == 0
@@ -0,0 +1,86 @@
+import asyncio
+import time
+from unittest.mock import patch
+
+import pytest
+from google.adk.models import BaseLlm, LlmResponse
+from google.adk.runners import InMemoryRunner
+from google.genai import types
+from mcp.types import CallToolResult, ListToolsResult, TextContent, Tool
+
+from calculator_agent import agent as agent_module
+from calculator_agent import config
+from calculator_agent.mcp_pool import shared_pool
+
+DELAYS = {"multiply": 0.3, "divide": 0.1}
+
+
+class ScriptedLlm(BaseLlm):
+    """Asks for multiply and divide in one turn, then answers with the results."""
+
+    async def generate_content_async(self, llm_request, stream=False):
+        responses = [part.function_response for part in llm_request.contents[-1].parts if part.function_response]
+        if responses:
+            text = ", ".join(f"{response.name}={response.response['structuredContent']['result']}" for response in responses)
+            yield LlmResponse(content=types.Content(role="model", parts=[types.Part(text=text)]))
+            return
+        yield LlmResponse(
+            content=types.Content(
+                role="model",
+                parts=[
+                    types.Part(function_call=types.FunctionCall(id="c1", name="multiply", args={"a": 3, "b": 4})),
+                    types.Part(function_call=types.FunctionCall(id="c2", name="divide", args={"a": 10, "b": 2})),
+                ],
+            )
+        )
+
+
+class SlowCalculatorSession:
+    async def list_tools(self):
+        schema = {"type": "object", "properties": {"a": {"type": "number"}, "b": {"type": "number"}}}
+        return ListToolsResult(tools=[Tool(name=name, inputSchema=schema) for name in DELAYS])
+
+    async def call_tool(self, name, arguments=None, read_timeout_seconds=None, progress_callback=None, *, meta=None):
+        await asyncio.sleep(DELAYS[name])
+        a, b = arguments["a"], arguments["b"]
+        result = a * b if name == "multiply" else a / b
+        return CallToolResult(content=[TextContent(type="text", text=str(result))], structuredContent={"result": result})
+
+
+@pytest.mark.asyncio
+async def test_tool_calls_from_one_turn_run_concurrently_in_order(monkeypatch):
+    monkeypatch.setattr(config, "LLM_PARALLEL_TOOL_CALLS", True)
+    monkeypatch.setattr(agent_module, "get_model", lambda: ScriptedLlm(model="scripted"))
+
+    async def session(connection_params, headers=None):
+        return SlowCalculatorSession()
+
+    adk_agent = agent_module.build_adk_agent()
+    assert "single turn" in adk_agent.static_instruction
+    runner = InMemoryRunner(agent=adk_agent, app_name=adk_agent.name)
+    conversation = await runner.session_service.create_session(app_name=adk_agent.name, user_id="u")
+    message = types.Content(role="user", parts=[types.Part(text="compute 3*4 and 10/2")])
+
+    events = []
+    with patch.object(shared_pool(), "session", session):
+        started = time.monotonic()
+        async for event in runner.run_async(user_id="u", session_id=conversation.id, new_message=message):
+            events.append(event)
+        elapsed = time.monotonic() - started
+
+    # Roughly the slowest call, not the sum of both.
+    assert elapsed < sum(DELAYS.values())
+    responses = next(event for event in events if event.get_function_responses()).get_function_responses()
+    assert [response.id for response in responses] == ["c1", "c2"]
+    assert events[-1].content.parts[0].text == "multiply=12, divide=5.0"
+
+
+def test_litellm_is_asked_for_parallel_tool_calls(monkeypatch):
+    monkeypatch.setattr(config, "LLM_PARALLEL_TOOL_CALLS", True)
+    monkeypatch.setattr(config, "LLM_PROVIDER", "litellm")
+    monkeypatch.setattr(config, "LLM_MODEL", "openai/qwen3-4b-instruct")
+    monkeypatch.setattr(config, "LLM_API_KEY", "unused")
+    monkeypatch.setenv("OPENAI_API_KEY", "unused")
+
+    model = agent_module._build_model()
+    assert model._additional_args["parallel_tool_calls"] is True
@@ -0,0 +1,179 @@
+import asyncio
+import time
+from unittest.mock import patch
+
+import pytest
+from google.adk.tools.mcp_tool.mcp_session_manager import StreamableHTTPConnectionParams
+from mcp.types import ListToolsResult, Tool, ToolAnnotations
+
+from calculator_agent import mcp_pool
+from calculator_agent.context import deadline_context
+from calculator_agent.deadline import DEADLINE_META_KEY
+from calculator_agent.mcp_pool import McpSessionPool, PooledSessionManager
+from calculator_agent.resilience import CircuitBreaker, CircuitOpenError, Resilience, backoff
+
+PRIMARY, REPLICA = "http://mcp-a/mcp/", "http://mcp-b/mcp/"
+
+
+def resilience(**kwargs) -> Resilience:
+    kwargs.setdefault("backoff_base", 0)
+    return Resilience([PRIMARY, REPLICA], is_failure=lambda exc: isinstance(exc, ConnectionError), **kwargs)
+
+
+def test_breaker_opens_and_probes_after_reset():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10)
+    breaker.record_failure()
+    assert breaker.acquire()
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.acquire()
+
+    with patch("calculator_agent.resilience.time.monotonic", return_value=breaker.opened_at + 10):
+        assert breaker.state == "half_open"
+        # One probe at a time; its failure reopens the circuit.
+        assert breaker.acquire() and not breaker.acquire()
+        breaker.record_failure()
+    assert breaker.state == "open"
+
+
+def test_backoff_is_jittered_and_capped():
+    delays = [backoff(attempt, base=0.1, cap=0.5) for attempt in range(10) for _ in range(20)]
+    assert all(0 <= delay <= 0.5 for delay in delays)
+    assert len(set(delays)) > 1
+
+
+@pytest.mark.asyncio
+async def test_slow_idempotent_calls_are_hedged_to_a_replica():
+    policy = resilience(hedge_delay=0.02)
+    calls = []
+
+    async def request(endpoint):
+        calls.append(endpoint)
+        await asyncio.sleep(5 if endpoint == PRIMARY else 0)
+        return endpoint
+
+    assert await policy.call(request, idempotent=True) == REPLICA
+    assert calls == [PRIMARY, REPLICA]
+    assert policy.counts["hedges"] == policy.counts["hedge_wins"] == 1
+
+    # Non-idempotent calls are never duplicated.
+    calls.clear()
+    with pytest.raises(TimeoutError):
+        async with asyncio.timeout(0.1):
+            await policy.call(request)
+    assert calls == [PRIMARY]
+
+
+@pytest.mark.asyncio
+async def test_hedge_delay_follows_recent_p95():
+    policy = resilience(min_samples=20)
+
+    async def request(_endpoint):
+        return None
+
+    assert policy.hedge_delay("add") == 1.0
+    for _ in range(20):
+        await policy.call(request, key="add")
+    assert policy.hedge_delay("add") < 0.05
+
+
+@pytest.mark.asyncio
+async def test_failures_retry_on_the_next_endpoint_and_open_the_circuit():
+    policy = resilience(failure_threshold=2, retries=1)
+    calls = []
+
+    async def request(endpoint):
+        calls.append(endpoint)
+        if endpoint == PRIMARY:
+            raise ConnectionError("refused")
+        return endpoint
+
+    assert await policy.call(request, idempotent=True) == REPLICA
+    assert await policy.call(request, idempotent=True) == REPLICA
+    assert calls == [PRIMARY, REPLICA, PRIMARY, REPLICA]
+    assert policy.snapshot()["circuits"] == {PRIMARY: "open", REPLICA: "closed"}
+
+    # With the primary's circuit open, calls go straight to the replica.
+    calls.clear()
+    assert await policy.call(request, idempotent=True) == REPLICA
+    assert calls == [REPLICA]
+
+    # Non-idempotent requests are not retried after a failure...
+    async def down(endpoint):
+        raise ConnectionError("refused")
+
+    policy = resilience(failure_threshold=1)
+    with pytest.raises(ConnectionError):
+        await policy.call(down)
+    # ...and fail fast once every circuit is open.
+    with pytest.raises(ConnectionError):
+        await policy.call(down)
+    with pytest.raises(CircuitOpenError):
+        await policy.call(down)
+
+
+@pytest.mark.asyncio
+async def test_deadline_bounds_the_call_and_its_retries():
+    policy = resilience(retries=5, backoff_base=0.5)
+
+    async def down(endpoint):
+        raise ConnectionError("refused")
+
+    started = time.monotonic()
+    with pytest.raises(TimeoutError):
+        await policy.call(down, idempotent=True, deadline=time.monotonic() + 0.05)
+    assert time.monotonic() - started < 0.5
+
+
+@pytest.mark.asyncio
+async def test_pooled_sessions_route_tool_calls_through_resilience():
+    sent_meta = []
+
+    class FakeSession:
+        def __init__(self, url):
+            self.url = url
+
+        async def list_tools(self):
+            return ListToolsResult(
+                tools=[
+                    Tool(
+                        name="add",
+                        inputSchema={"type": "object"},
+                        annotations=ToolAnnotations(idempotentHint=True),
+                    ),
+                    Tool(name="send_email", inputSchema={"type": "object"}),
+                ]
+            )
+
+        async def call_tool(self, name, arguments=None, read_timeout_seconds=None, progress_callback=None, *, meta=None):
+            sent_meta.append(meta)
+            if self.url == PRIMARY:
+                raise ConnectionError("refused")
+            return f"{name} on {self.url}"
+
+    pool = McpSessionPool()
+
+    async def session(connection_params, headers=None):
+        return FakeSession(connection_params.url)
+
+    policy = resilience()
+    manager = PooledSessionManager(StreamableHTTPConnectionParams(url=PRIMARY), pool, policy)
+    with patch.object(pool, "session", session), patch.object(mcp_pool, "_idempotent_tools", set()):
+        wrapped = await manager.create_session({})
+        await wrapped.list_tools()
+        assert wrapped.url == PRIMARY
+
+        token = deadline_context.set(time.monotonic() + 5)
+        try:
+            assert await wrapped.call_tool("add", {"a": 1, "b": 2}) == f"add on {REPLICA}"
+            # The server is told how much of the caller's deadline is left.
+            assert all(0 < meta[DEADLINE_META_KEY] <= 5 for meta in sent_meta)
+            with pytest.raises(ConnectionError):
+                await wrapped.call_tool("send_email", {})
+
+            deadline_context.set(time.monotonic() - 1)
+            calls = len(sent_meta)
+            with pytest.raises(TimeoutError):
+                await wrapped.call_tool("add", {"a": 1, "b": 2})
+            assert len(sent_meta) == calls
+        finally:
+            deadline_context.reset(token)
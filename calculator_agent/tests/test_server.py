@@ -1,4 +1,10 @@
+import gzip
+import json
+import logging
+from unittest.mock import patch
+
 import pytest
+from starlette.requests import Request
 from starlette.testclient import TestClient
 
 from a2a.types import (
@@ -9,6 +15,8 @@ from a2a.types import (
 from a2a.utils.constants import AGENT_CARD_WELL_KNOWN_PATH
 
 from calculator_agent import server
+from calculator_agent.logs import ACCESS_LOGGER
+from calculator_agent.sessions import BoundedSessionService
 
 @pytest.fixture
 def client():
@@ -84,3 +92,84 @@ def test_agent_card_structure():
     assert card.name == "Test Agent"
     assert card.version == "0.1.0"
     assert card.skills[0].id == "test"
+
+
+def test_agent_card_is_served_precompressed(client, monkeypatch):
+    """Test the agent card is compressed once and matches the uncompressed card."""
+    # The stub card is smaller than the default compression threshold.
+    monkeypatch.setattr(server, "COMPRESSION_MINIMUM_SIZE", 0)
+    handler = next(route.app for route in server.app.routes if getattr(route, "name", None) == "a2a_agent")
+    handler._card_bodies.clear()
+
+    path = f"/calculator{AGENT_CARD_WELL_KNOWN_PATH}"
+    plain = client.get(path, headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+
+    with client.stream("GET", path, headers={"Accept-Encoding": "gzip"}) as response:
+        raw = b"".join(response.iter_raw())
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert gzip.decompress(raw) == plain.content
+    assert handler._card_bodies[True]._variants["gzip"] == raw
+
+@pytest.mark.asyncio
+async def test_agent_card_is_reloaded_after_its_ttl(monkeypatch):
+    """An expired card is loaded again, and kept when loading fails."""
+    monkeypatch.setattr(server, "AGENT_CARD_CACHE_TTL", 0)
+    loads = iter(["First.", "Second."])
+
+    async def build(_agent, url):
+        description = next(loads, None)
+        if description is None:
+            raise RuntimeError("MCP server down")
+        return AgentCard(
+            name="Calculator Agent",
+            description=description,
+            url=url,
+            version="0.1.0",
+            capabilities=AgentCapabilities(),
+            default_input_modes=["text/plain"],
+            default_output_modes=["text/plain"],
+            skills=[],
+        )
+
+    handler = server.DynamicA2AHandler("http://localhost:8001/calculator", BoundedSessionService())
+    request = Request({"type": "http", "headers": []})
+    with patch.object(server, "_build_agent_card", build):
+        served = [await handler.card_response(request, by_alias=True) for _ in range(3)]
+
+    assert [json.loads(response.body)["description"] for response in served] == ["First.", "Second.", "Second."]
+
+
+def test_expired_deadline_is_rejected(client):
+    """A request whose caller has already given up is not run."""
+    response = client.post(
+        "/calculator",
+        json={"invalid": "payload"},
+        headers={"X-Request-Timeout": "0"},
+    )
+    assert response.status_code == 504
+    assert response.json() == {"error": "Deadline exceeded"}
+
+
+def test_admin_can_profile_a_request(mock_auth, monkeypatch, tmp_path):
+    """X-Profile from a token with the admin scope saves a profile listed under /debug/profiles."""
+    monkeypatch.setattr(server, "PROFILING_DIR", str(tmp_path))
+    mock_auth.return_value.authenticate.return_value = ("mock_token", {"sub": "test-user", "scope": "profile:admin"})
+    with TestClient(server.create_app()) as client:
+        assert client.get("/metrics", headers={"X-Profile": "1"}).status_code == 200
+        [profile] = client.get("/debug/profiles").json()["profiles"]
+        assert profile["route"] == "/metrics" and profile["status"] == 200
+
+        mock_auth.return_value.authenticate.return_value = ("mock_token", {"sub": "test-user"})
+        assert client.get("/debug/profiles").status_code == 403
+
+
+def test_access_log_records_stage_timings(client, caplog):
+    """Each request logs one access record with its subject and per-stage timings."""
+    with caplog.at_level(logging.INFO, logger=ACCESS_LOGGER):
+        client.post("/calculator/", json={"invalid": "payload"})
+
+    [record] = [r for r in caplog.records if r.name == ACCESS_LOGGER]
+    assert record.access["path"] == "/calculator/" and record.access["subject"] == "test-user"
+    assert {"auth", "agent_build"} <= set(record.access["stages"])
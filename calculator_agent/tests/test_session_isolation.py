@@ -0,0 +1,67 @@
+from typing import AsyncGenerator
+from unittest.mock import patch
+
+from google.adk import Agent
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+from starlette.testclient import TestClient
+
+from calculator_agent import server
+from calculator_agent.sessions import BoundedSessionService
+
+
+class RecordingLlm(BaseLlm):
+    """Replies "ok" and records the conversation each call was given."""
+
+    seen: list[list[str]] = []
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        self.seen.append(
+            [part.text for content in llm_request.contents for part in content.parts if part.text]
+        )
+        yield LlmResponse(content=types.Content(role="model", parts=[types.Part(text="ok")]))
+
+
+def _send(client, user: str, text: str):
+    return client.post(
+        "/calculator",
+        headers={"Authorization": f"Bearer {user}"},
+        json={
+            "jsonrpc": "2.0",
+            "id": "1",
+            "method": "message/send",
+            "params": {
+                "message": {
+                    "role": "user",
+                    "messageId": f"{user}-{text}",
+                    "contextId": "shared-context",
+                    "parts": [{"kind": "text", "text": text}],
+                }
+            },
+        },
+    )
+
+
+def test_same_context_id_is_isolated_per_subject(mock_auth):
+    async def authenticate(request):
+        token = request.headers["Authorization"].removeprefix("Bearer ")
+        return token, {"sub": token}
+
+    mock_auth.return_value.authenticate.side_effect = authenticate
+    session_service = BoundedSessionService()
+    llm = RecordingLlm(model="recording")
+    llm.seen.clear()
+
+    with patch.object(server, "create_session_service", lambda: session_service), patch.object(
+        server, "build_adk_agent", lambda: Agent(name="calculator_agent", model=llm)
+    ), patch.object(server, "WARMUP_ENABLED", False):
+        with TestClient(server.create_app()) as client:
+            assert _send(client, "alice", "alice secret").status_code == 200
+            assert _send(client, "mallory", "mallory question").status_code == 200
+
+    assert set(session_service.sessions["calculator_agent"]) == {"alice", "mallory"}
+    assert "alice secret" not in llm.seen[-1]
@@ -0,0 +1,117 @@
+import pytest
+from google.adk.events.event import Event
+from google.genai import types
+from starlette.testclient import TestClient
+
+from calculator_agent import server
+from calculator_agent.sessions import BoundedSessionService, BoundedSqliteSessionService
+
+APP = "calculator_agent"
+
+
+def _text_event(text: str) -> Event:
+    return Event(author="user", content=types.Content(role="user", parts=[types.Part(text=text)]))
+
+
+def _function_response_event() -> Event:
+    return Event(
+        author="calculator_agent",
+        content=types.Content(
+            role="user",
+            parts=[types.Part(function_response=types.FunctionResponse(name="add", response={"result": 3}))],
+        ),
+    )
+
+
+@pytest.mark.asyncio
+async def test_evicts_least_recently_used_beyond_max_sessions():
+    service = BoundedSessionService(max_sessions=2)
+    first = await service.create_session(app_name=APP, user_id="u", session_id="s1")
+    await service.create_session(app_name=APP, user_id="u", session_id="s2")
+    await service.get_session(app_name=APP, user_id="u", session_id=first.id)
+    await service.create_session(app_name=APP, user_id="u", session_id="s3")
+
+    assert await service.get_session(app_name=APP, user_id="u", session_id="s2") is None
+    assert await service.get_session(app_name=APP, user_id="u", session_id="s1") is not None
+    assert (await service.stats())["evictions"]["capacity"] == 1
+
+
+@pytest.mark.asyncio
+async def test_evicts_idle_sessions():
+    service = BoundedSessionService(idle_ttl=0)
+    await service.create_session(app_name=APP, user_id="u", session_id="s1")
+    assert await service.get_session(app_name=APP, user_id="u", session_id="s1") is None
+    assert (await service.stats())["evictions"]["idle"] == 1
+
+
+@pytest.mark.asyncio
+async def test_byte_budget_evicts_older_sessions():
+    service = BoundedSessionService(max_bytes=2000)
+    for session_id in ("s1", "s2"):
+        session = await service.create_session(app_name=APP, user_id="u", session_id=session_id)
+        await service.append_event(session, _text_event("x" * 1200))
+
+    stats = await service.stats()
+    assert stats["sessions"] == 1
+    assert stats["bytes"] <= 2000
+
+
+@pytest.mark.asyncio
+async def test_event_history_is_truncated_without_orphaned_function_responses():
+    service = BoundedSessionService(max_events=3)
+    session = await service.create_session(app_name=APP, user_id="u")
+    for event in [
+        _text_event("one"),
+        _text_event("two"),
+        _function_response_event(),
+        _text_event("three"),
+        _text_event("four"),
+    ]:
+        await service.append_event(session, event)
+
+    stored = await service.get_session(app_name=APP, user_id="u", session_id=session.id)
+    assert [e.content.parts[0].text for e in stored.events] == ["three", "four"]
+    assert len(session.events) == 2
+    assert (await service.stats())["events"] == 2
+
+
+@pytest.mark.asyncio
+async def test_sqlite_service_truncates_events_and_reports_size(tmp_path):
+    service = BoundedSqliteSessionService(str(tmp_path / "sessions.db"), max_events=2)
+    session = await service.create_session(app_name=APP, user_id="u")
+    for text in ("one", "two", "three"):
+        await service.append_event(session, _text_event(text))
+
+    stored = await service.get_session(app_name=APP, user_id="u", session_id=session.id)
+    assert [e.content.parts[0].text for e in stored.events] == ["two", "three"]
+    stats = await service.stats()
+    assert stats["sessions"] == 1 and stats["events"] == 2
+    assert stats["bytes"] > 0
+
+
+def test_metrics_endpoint_reports_session_footprint():
+    with TestClient(server.create_app()) as client:
+        response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.json()["sessions"]["backend"] == "memory"
+    assert response.json()["sessions"]["bytes"] == 0
+
+
+@pytest.mark.asyncio
+async def test_trailing_function_responses_keep_their_call():
+    service = BoundedSessionService(max_events=1)
+    session = await service.create_session(app_name=APP, user_id="u")
+    await service.append_event(session, _text_event("call"))
+    await service.append_event(session, _function_response_event())
+
+    stored = await service.get_session(app_name=APP, user_id="u", session_id=session.id)
+    assert len(stored.events) == 2
+    assert len(session.events) == 2
+    assert (await service.stats())["events"] == 2
+
+
+def test_metrics_endpoint_requires_authentication(mock_auth):
+    mock_auth.return_value.authenticate.side_effect = ValueError("Missing or invalid Authorization header")
+    with TestClient(server.create_app()) as client:
+        response = client.get("/metrics")
+    assert response.status_code == 401
@@ -0,0 +1,105 @@
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import jwt
+import pytest
+from a2a.types import AgentCapabilities, AgentCard
+from cryptography.hazmat.primitives.asymmetric import rsa
+from mcp.types import ListToolsResult, Tool, ToolAnnotations
+
+from calculator_agent import config, mcp_pool, server
+from calculator_agent.auth import OIDC_AUDIENCE, OIDC_ISSUER, TokenVerifier
+from calculator_agent.mcp_pool import ResilientSession
+from calculator_agent.resilience import Resilience
+from calculator_agent.shared_cache import shared_cache
+
+URL = "http://mcp/mcp/"
+
+
+@pytest.fixture
+def new_worker(tmp_path, monkeypatch):
+    """Starts a "worker": fresh process-wide caches, sharing the host's cache file."""
+    monkeypatch.setattr(config, "CACHE_BACKEND", f"sqlite:{tmp_path / 'cache.db'}")
+
+    def start():
+        shared_cache.cache_clear()
+        TokenVerifier().jwks_client.jwk_set_cache.put(None)
+
+    yield start
+    start()
+
+
+class ToolsSession:
+    def __init__(self):
+        self.lists = 0
+
+    async def list_tools(self):
+        self.lists += 1
+        return ListToolsResult(
+            tools=[Tool(name="add", inputSchema={"type": "object"}, annotations=ToolAnnotations(idempotentHint=True))]
+        )
+
+
+@pytest.mark.asyncio
+async def test_workers_share_tool_lists_and_agent_cards(new_worker):
+    card = AgentCard(
+        name="Calculator Agent",
+        description="Shared.",
+        url="http://agent/calculator",
+        version="0.1.0",
+        capabilities=AgentCapabilities(),
+        default_input_modes=["text/plain"],
+        default_output_modes=["text/plain"],
+        skills=[],
+    )
+    sessions = [ToolsSession(), ToolsSession()]
+    builds = 0
+
+    async def build(_agent, _url):
+        nonlocal builds
+        builds += 1
+        return card
+
+    with patch.object(server, "_build_agent_card", build):
+        for session in sessions:
+            new_worker()
+            with patch.object(mcp_pool, "_idempotent_tools", set()) as idempotent:
+                wrapped = ResilientSession(session, None, Resilience([URL], is_failure=lambda _exc: True))
+                assert [tool.name for tool in (await wrapped.list_tools()).tools] == ["add"]
+                assert idempotent == {"add"}
+            assert await server._load_agent_card(None, card.url) == card
+
+    assert [session.lists for session in sessions] == [1, 0]
+    assert builds == 1
+    assert shared_cache().snapshot()["hits"] == 2
+
+
+@pytest.mark.asyncio
+async def test_workers_share_the_jwks_and_verified_tokens(new_worker):
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    jwk = jwt.algorithms.RSAAlgorithm.to_jwk(private_key.public_key(), as_dict=True)
+    jwks = {"keys": [{**jwk, "kid": "key-1", "use": "sig", "alg": "RS256"}]}
+
+    def request(sub: str):
+        token = jwt.encode(
+            {"sub": sub, "aud": OIDC_AUDIENCE, "iss": OIDC_ISSUER},
+            private_key,
+            algorithm="RS256",
+            headers={"kid": "key-1"},
+        )
+        return SimpleNamespace(headers={"Authorization": f"Bearer {token}"})
+
+    alice = request("alice")
+    new_worker()
+    verifier = TokenVerifier()
+    with patch.object(verifier.jwks_client, "fetch_data", return_value=jwks) as fetch:
+        assert (await verifier.authenticate(alice))[1]["sub"] == "alice"
+    assert fetch.call_count == 1
+
+    # A cold worker neither re-verifies alice's token nor fetches the JWKS for bob's.
+    new_worker()
+    verifier = TokenVerifier()
+    with patch.object(verifier.jwks_client, "fetch_data", side_effect=AssertionError):
+        with patch.object(TokenVerifier, "verify_token", side_effect=AssertionError):
+            assert (await verifier.authenticate(alice))[1]["sub"] == "alice"
+        assert (await verifier.authenticate(request("bob")))[1]["sub"] == "bob"
@@ -0,0 +1,135 @@
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import jwt
+import pytest
+from cryptography.hazmat.primitives.asymmetric import rsa
+from google.adk.tools.mcp_tool.mcp_session_manager import (
+    MCPSessionManager,
+    StreamableHTTPConnectionParams,
+)
+from google.adk.tools.mcp_tool.mcp_toolset import McpToolset
+from mcp.types import ListToolsResult, Tool
+
+from calculator_agent import server
+from calculator_agent.auth import OIDC_AUDIENCE, OIDC_ISSUER, TokenVerifier
+from calculator_agent.context import token_context
+from calculator_agent.sessions import BoundedSessionService
+from calculator_agent.singleflight import SingleFlight
+
+CONCURRENCY = 100
+
+
+@pytest.mark.asyncio
+async def test_single_flight_shares_result_and_errors():
+    flight = SingleFlight()
+    calls = 0
+
+    async def upstream():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return calls
+
+    results = await asyncio.gather(*(flight.do("k", upstream) for _ in range(10)))
+    assert results == [1] * 10
+    assert len(flight) == 0
+
+    async def failing():
+        raise RuntimeError("upstream down")
+
+    results = await asyncio.gather(
+        *(flight.do("k", failing) for _ in range(3)), return_exceptions=True
+    )
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_does_not_cancel_shared_call():
+    flight = SingleFlight()
+
+    async def upstream():
+        await asyncio.sleep(0.02)
+        return "done"
+
+    first = asyncio.create_task(flight.do("k", upstream))
+    second = asyncio.create_task(flight.do("k", upstream))
+    await asyncio.sleep(0)
+    first.cancel()
+    assert await second == "done"
+
+
+@pytest.mark.asyncio
+async def test_cold_agent_card_burst_builds_once(mock_agent_card_builder):
+    handler = server.DynamicA2AHandler(
+        "http://localhost:8001/calculator", BoundedSessionService()
+    )
+    token_context.set("caller-token")
+
+    cards = await asyncio.gather(*(handler.get_agent_card() for _ in range(CONCURRENCY)))
+
+    assert mock_agent_card_builder.call_count == 1
+    assert all(card is cards[0] for card in cards)
+
+
+@pytest.mark.asyncio
+async def test_cold_tool_listing_burst_lists_once():
+    list_calls = 0
+
+    class FakeSession:
+        async def list_tools(self):
+            nonlocal list_calls
+            list_calls += 1
+            await asyncio.sleep(0.01)
+            return ListToolsResult(
+                tools=[Tool(name="add", inputSchema={"type": "object"})]
+            )
+
+    async def create_session(self, headers=None):
+        return FakeSession()
+
+    toolsets = [
+        McpToolset(
+            connection_params=StreamableHTTPConnectionParams(url="http://mcp/mcp/"),
+            header_provider=lambda _ctx: {"Authorization": "Bearer caller-token"},
+        )
+        for _ in range(CONCURRENCY)
+    ]
+
+    with patch.object(MCPSessionManager, "create_session", create_session):
+        results = await asyncio.gather(*(toolset.get_tools() for toolset in toolsets))
+
+    assert list_calls == 1
+    assert all(tools[0].name == "add" for tools in results)
+
+
+@pytest.mark.asyncio
+async def test_cold_jwks_burst_fetches_once():
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    jwk = jwt.algorithms.RSAAlgorithm.to_jwk(private_key.public_key(), as_dict=True)
+    jwks = {"keys": [{**jwk, "kid": "key-1", "use": "sig", "alg": "RS256"}]}
+    token = jwt.encode(
+        {"sub": "alice", "aud": OIDC_AUDIENCE, "iss": OIDC_ISSUER},
+        private_key,
+        algorithm="RS256",
+        headers={"kid": "key-1"},
+    )
+
+    verifier = TokenVerifier()
+    fetches = 0
+
+    def fetch_data():
+        nonlocal fetches
+        fetches += 1
+        return jwks
+
+    request = SimpleNamespace(headers={"Authorization": f"Bearer {token}"})
+    with patch.object(verifier.jwks_client, "fetch_data", side_effect=fetch_data):
+        results = await asyncio.gather(
+            *(verifier.verify_request(request) for _ in range(CONCURRENCY))
+        )
+
+    assert fetches == 1
+    assert results == [token] * CONCURRENCY
+
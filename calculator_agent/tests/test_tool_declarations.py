@@ -0,0 +1,62 @@
+import pytest
+from mcp.types import Tool
+
+from calculator_agent.tool_declarations import CompactMcpTool, McpToolGroup, compact_schema, compact_tools
+
+NUMBERS = {
+    "type": "object",
+    "title": "addArguments",
+    "properties": {
+        "a": {"type": "number", "title": "A", "description": "First operand. Any finite number."},
+        "b": {"type": "number", "title": "B", "description": "Second operand."},
+    },
+    "required": ["a", "b"],
+}
+
+
+def make_tool(name, schema, description=""):
+    return CompactMcpTool(mcp_tool=Tool(name=name, description=description, inputSchema=schema), mcp_session_manager=None)
+
+
+def test_compact_schema_drops_titles_and_inlines_refs():
+    schema = {
+        "type": "object",
+        "$defs": {"Step": {"type": "object", "title": "Step", "properties": {"op": {"type": "string"}}}},
+        "properties": {"steps": {"type": "array", "items": {"$ref": "#/$defs/Step"}}},
+    }
+
+    assert compact_schema(NUMBERS)["properties"]["a"] == {"type": "number", "description": "First operand."}
+    assert compact_schema(schema) == {
+        "type": "object",
+        "properties": {"steps": {"type": "array", "items": {"type": "object", "properties": {"op": {"type": "string"}}}}},
+    }
+
+
+@pytest.mark.asyncio
+async def test_tools_with_the_same_arguments_share_one_declaration():
+    calls = []
+    tools = [
+        make_tool(name, {**NUMBERS, "title": f"{name}Arguments"}, f"{name.title()} two numbers. Returns a number.")
+        for name in ("multiply", "add")
+    ]
+    tools.append(make_tool("evaluate", {"type": "object", "properties": {"expression": {"type": "string"}}}))
+    for tool in tools:
+        async def run_async(*, args, tool_context, name=tool.name):
+            calls.append((name, args))
+            return {"result": 1}
+        tool.run_async = run_async
+
+    compacted = compact_tools(tools)
+
+    # One group for the arithmetic tools, sorted by name so the prefix is stable.
+    assert [tool.name for tool in compacted] == ["evaluate", "multiply_add"]
+    group = compacted[1]
+    assert isinstance(group, McpToolGroup)
+    assert group.description == "multiply: Multiply two numbers. add: Add two numbers."
+    declaration = group._get_declaration()
+    schema = declaration.parameters_json_schema or declaration.parameters.model_dump(exclude_none=True)
+    assert schema["required"] == ["op", "a", "b"]
+
+    assert await group.run_async(args={"op": "add", "a": 1, "b": 2}, tool_context=None) == {"result": 1}
+    assert calls == [("add", {"a": 1, "b": 2})]
+    assert "Unknown op" in (await group.run_async(args={"op": "pow"}, tool_context=None))["error"]
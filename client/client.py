@@ -17,7 +17,12 @@ async def main():
     if not token:
         logger.warning("MCP_TOKEN environment variable is not set. Requests may fail.")
 
-    client = MCPClient(base_url="http://localhost:8000/mcp/", token=token)
+    # The calculator tools are pure, so slow calls may be hedged and retried.
+    client = MCPClient(
+        base_url="http://localhost:8000/mcp/",
+        token=token,
+        idempotent_tools=("add", "subtract", "multiply", "divide"),
+    )
     
     logger.info("Connecting to MCP Calculator Server at http://localhost:8000...")
     
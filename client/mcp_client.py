@@ -1,63 +1,281 @@
+import asyncio
+import base64
+import inspect
 import httpx
+import time
 import uuid
-import json
 import logging
-from typing import Any, Dict, Optional
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Union
+
+import codec
+from resilience import CircuitOpenError, Resilience, is_http_failure, is_http_unsent
 
 logger = logging.getLogger(__name__)
 
+# Header telling the server how many seconds the caller will still wait.
+DEADLINE_HEADER = "X-Request-Timeout"
+# Reconnections to an SSE response stream that ends before its result.
+SSE_MAX_RESUMES = 3
+# Seconds to wait before reconnecting when the server suggests no delay.
+SSE_RETRY_DELAY = 1.0
+
+# Called with (progress, total, message) for each progress notification;
+# may be a plain function or a coroutine function.
+ProgressCallback = Callable[[float, Optional[float], Optional[str]], Union[None, Awaitable[None]]]
+
+# Wire dtypes of binary arrays and their little-endian numpy type codes.
+_ARRAY_DTYPES = {"float64": "<f8", "int64": "<i8"}
+
+
+def encode_array(values) -> dict:
+    """
+    Encodes a numeric array for the server's array tools.
+
+    Integer arrays are sent as int64 and everything else as float64, as
+    base64 of the little-endian bytes. Passing a binary array also asks the
+    server for binary array results. Requires numpy.
+    """
+    import numpy as np
+
+    array = np.asarray(values)
+    dtype = "int64" if np.issubdtype(array.dtype, np.integer) else "float64"
+    array = np.ascontiguousarray(array, dtype=_ARRAY_DTYPES[dtype])
+    return {
+        "encoding": "base64",
+        "dtype": dtype,
+        "shape": list(array.shape),
+        "data": base64.b64encode(array.data).decode("ascii"),
+    }
+
+
+def decode_array(value):
+    """
+    Decodes an array result: a binary array becomes a read-only numpy array
+    viewing the decoded bytes, and a plain JSON list is returned as is.
+    """
+    if not (isinstance(value, dict) and value.get("encoding") == "base64"):
+        return value
+
+    import numpy as np
+
+    buffer = base64.b64decode(value["data"])
+    return np.frombuffer(buffer, dtype=_ARRAY_DTYPES[value["dtype"]]).reshape(value["shape"])
+
+
+class _SseState:
+    """What a client needs to resume an SSE stream: the last event id and the suggested delay."""
+
+    def __init__(self):
+        self.last_event_id: Optional[str] = None
+        self.retry: Optional[float] = None
+
+
+async def _sse_messages(response: httpx.Response, state: Optional[_SseState] = None):
+    """
+    Yields the JSON-RPC messages of an SSE response as they arrive, keeping
+    the last event id and `retry` delay in `state`.
+    """
+    state = state or _SseState()
+    data, event_id = [], None
+    async for line in response.aiter_lines():
+        field, _, value = line.partition(":")
+        value = value.removeprefix(" ")
+        if field == "data":
+            data.append(value)
+        elif field == "id":
+            event_id = value
+        elif field == "retry" and value.isdigit():
+            state.retry = int(value) / 1000
+        elif not line:
+            if event_id is not None:
+                state.last_event_id = event_id
+            # Priming events carry no data.
+            if any(data):
+                yield codec.loads("\n".join(data))
+            data, event_id = [], None
+
+
 class MCPClientError(Exception):
     """Base exception for MCP Client errors."""
     pass
 
 class MCPClient:
-    def __init__(self, base_url: str = "http://localhost:8000", token: str = None):
+    """
+    Client for the MCP server's stateless JSON-RPC endpoint.
+
+    `replicas` are further server URLs to fail over to; each URL has its own
+    circuit breaker. Calls to tools in `idempotent_tools` (all calculator
+    tools are) are hedged to the next replica when slower than the recent
+    p95, and retried with jittered backoff on transport errors, 429 and 5xx.
+    Other calls are only retried when the request never reached a server.
+    Pass `resilience` to tune or share the policy.
+    """
+
+    def __init__(
+        self,
+        base_url: str = "http://localhost:8000",
+        token: str = None,
+        replicas: Iterable[str] = (),
+        idempotent_tools: Iterable[str] = (),
+        resilience: Optional[Resilience] = None,
+    ):
         self.base_url = base_url.rstrip("/")
         self.token = token
+        self.idempotent_tools = frozenset(idempotent_tools)
+        self.resilience = resilience or Resilience(
+            [self.base_url, *(url.rstrip("/") for url in replicas)],
+            is_failure=is_http_failure,
+            is_unsent=is_http_unsent,
+        )
 
-    async def call_tool(self, tool_name: str, arguments: dict = None) -> Any:
+    async def call_tool(
+        self,
+        tool_name: str,
+        arguments: dict = None,
+        timeout: float = 30.0,
+        progress: Optional[ProgressCallback] = None,
+    ) -> Any:
         """
         Calls a tool on the MCP server via HTTP POST (JSON-RPC).
+
+        `timeout` bounds the whole call, retries and hedges included; each
+        attempt tells the server what is left of it, so the server can give
+        up on work nobody is waiting for.
+
+        With `progress`, the call asks for progress notifications and
+        `progress(progress, total, message)` is called for each one (only
+        for increases, as hedged attempts report too). Servers send them
+        when answering over SSE. Cancelling the call closes the connection,
+        which stops chunked tools on the server.
+
+        An SSE stream that ends before the result is resumed, when the
+        server numbers its events, with a GET carrying `Last-Event-ID` (at
+        most `SSE_MAX_RESUMES` times, after the server's `retry` delay).
         """
         if arguments is None:
             arguments = {}
 
-        payload = {
-            "jsonrpc": "2.0",
-            "id": str(uuid.uuid4()),
-            "method": "tools/call",
-            "params": {"name": tool_name, "arguments": arguments},
-        }
+        request_id = str(uuid.uuid4())
+        params = {"name": tool_name, "arguments": arguments}
+        if progress is not None:
+            params["_meta"] = {"progressToken": request_id}
+        payload = {"jsonrpc": "2.0", "id": request_id, "method": "tools/call", "params": params}
+        reported = float("-inf")
 
-        async with httpx.AsyncClient() as client:
-            headers = {"Accept": "application/json, text/event-stream"}
-            if self.token:
-                headers["Authorization"] = f"Bearer {self.token}"
+        async def on_progress(params: dict):
+            nonlocal reported
+            if progress is None or params.get("progress", reported) <= reported:
+                return
+            reported = params["progress"]
+            outcome = progress(reported, params.get("total"), params.get("message"))
+            if inspect.isawaitable(outcome):
+                await outcome
 
-            logger.debug(f"Sending request to {self.base_url}/: {payload}")
+        headers = {"Accept": "application/json, text/event-stream", "Content-Type": "application/json"}
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        content = codec.dumps(payload)
+        deadline = time.monotonic() + timeout
+
+        async def read_stream(response: httpx.Response, state: _SseState) -> Optional[dict]:
             try:
-                response = await client.post(
-                    f"{self.base_url}/", # Server is mounted at /
-                    json=payload,
-                    headers=headers,
-                    timeout=30.0
-                )
-                response.raise_for_status()
-            except httpx.HTTPStatusError as e:
-                logger.error(f"HTTP Error: {e}")
-                logger.error(f"Response content: {e.response.text}")
-                raise MCPClientError(f"HTTP Error: {e.response.text}") from e
-            except httpx.HTTPError as e:
-                logger.error(f"HTTP Connection Error: {e}")
-                raise MCPClientError(f"HTTP Connection Error: {e}")
-
-            data = response.json()
-            
-            if "error" in data:
-                error_msg = data['error']
-                logger.error(f"RPC Error from server: {error_msg}")
-                raise MCPClientError(f"RPC Error: {error_msg}")
-            
-            logger.debug(f"Received result: {data['result']}")
-            
-            return data["result"]
+                async for message in _sse_messages(response, state):
+                    if message.get("method") == "notifications/progress":
+                        await on_progress(message.get("params", {}))
+                    elif message.get("id") == request_id:
+                        return message
+            except httpx.TransportError as e:
+                if state.last_event_id is None:
+                    raise
+                logger.info(f"Response stream broke, resuming: {e!r}")
+            return None
+
+        async def post(base_url: str) -> dict:
+            logger.debug(f"Sending request to {base_url}/: {payload}")
+            url = f"{base_url}/" # Server is mounted at /
+            left = max(deadline - time.monotonic(), 0.0)
+            async with httpx.AsyncClient() as client:
+                async with client.stream(
+                    "POST",
+                    url,
+                    content=content,
+                    headers={**headers, DEADLINE_HEADER: f"{left:.3f}"},
+                    timeout=httpx.Timeout(left, connect=min(5.0, left)),
+                ) as response:
+                    if response.is_error:
+                        await response.aread()
+                    response.raise_for_status()
+                    if not response.headers.get("content-type", "").startswith("text/event-stream"):
+                        return codec.loads(await response.aread())
+                    state = _SseState()
+                    session_id = response.headers.get("mcp-session-id")
+                    message = await read_stream(response, state)
+
+                for _ in range(SSE_MAX_RESUMES):
+                    if message is not None or state.last_event_id is None:
+                        break
+                    await asyncio.sleep(SSE_RETRY_DELAY if state.retry is None else state.retry)
+                    left = max(deadline - time.monotonic(), 0.0)
+                    resume_headers = {
+                        **headers,
+                        DEADLINE_HEADER: f"{left:.3f}",
+                        "Last-Event-ID": state.last_event_id,
+                    }
+                    if session_id:
+                        resume_headers["mcp-session-id"] = session_id
+                    async with client.stream(
+                        "GET", url, headers=resume_headers, timeout=httpx.Timeout(left, connect=min(5.0, left))
+                    ) as response:
+                        if response.is_error:
+                            await response.aread()
+                        response.raise_for_status()
+                        message = await read_stream(response, state)
+            if message is None:
+                raise MCPClientError("Response stream ended without a result")
+            return message
+
+        try:
+            data = await self.resilience.call(
+                post, idempotent=tool_name in self.idempotent_tools, key=tool_name, deadline=deadline
+            )
+        except TimeoutError as e:
+            logger.error(f"Tool call {tool_name} timed out after {timeout}s")
+            raise MCPClientError(f"Timed out after {timeout}s") from e
+        except CircuitOpenError as e:
+            logger.error(f"MCP server unavailable: {e}")
+            raise MCPClientError(f"MCP server unavailable: {e}") from e
+        except httpx.HTTPStatusError as e:
+            logger.error(f"HTTP Error: {e}")
+            logger.error(f"Response content: {e.response.text}")
+            raise MCPClientError(f"HTTP Error: {e.response.text}") from e
+        except httpx.HTTPError as e:
+            logger.error(f"HTTP Connection Error: {e}")
+            raise MCPClientError(f"HTTP Connection Error: {e}")
+
+        if "error" in data:
+            error_msg = data['error']
+            logger.error(f"RPC Error from server: {error_msg}")
+            raise MCPClientError(f"RPC Error: {error_msg}")
+
+        logger.debug(f"Received result: {data['result']}")
+
+        return data["result"]
+
+    async def call_array_tool(self, tool_name: str, arguments: dict) -> Any:
+        """
+        Calls an array tool with numpy arrays sent in binary.
+
+        Every numpy array in `arguments` is encoded with `encode_array`, so
+        array results come back in binary too; returns the structured
+        result with any array decoded.
+        """
+        import numpy as np
+
+        arguments = {
+            name: encode_array(value) if isinstance(value, np.ndarray) else value
+            for name, value in arguments.items()
+        }
+        result = await self.call_tool(tool_name, arguments)
+        if result.get("isError"):
+            raise MCPClientError(f"Tool error: {result['content'][0]['text']}")
+        return decode_array(result["structuredContent"]["result"])
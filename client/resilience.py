@@ -0,0 +1,287 @@
+# Copied from common/resilience.py by common/sync.py; edit that file instead.
+"""
+Circuit breaking, hedging and retries for calls to replicated endpoints.
+
+`Resilience.call` runs a request against the first endpoint whose circuit
+is closed. Idempotent requests still running after the recent p95 latency
+are hedged: a duplicate goes to the next healthy endpoint and the first
+success wins. Failed requests are retried with full-jitter backoff when
+that is safe (the request was idempotent, or was never sent).
+"""
+import asyncio
+import random
+import time
+from collections import deque
+from typing import Awaitable, Callable, Sequence, TypeVar
+
+import httpx
+
+T = TypeVar("T")
+
+
+class CircuitOpenError(Exception):
+    """Raised when every endpoint's circuit is open."""
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker for one endpoint.
+
+    Opens after `failure_threshold` failures in a row. After `reset_timeout`
+    seconds it lets one probe request through (half-open); the probe's
+    outcome closes or reopens the circuit.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: float | None = None
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def acquire(self) -> bool:
+        """Whether a request may be sent now; a half-open circuit admits one probe."""
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self._probing or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+        self._probing = False
+
+    def release(self):
+        """Ends a request that proved nothing about the endpoint (e.g. cancelled)."""
+        self._probing = False
+
+
+class LatencyWindow:
+    """The last `size` latencies of successful requests, for quantiles."""
+
+    def __init__(self, size: int = 200):
+        self._samples: deque[float] = deque(maxlen=size)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def record(self, seconds: float):
+        self._samples.append(seconds)
+
+    def quantile(self, q: float) -> float:
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def backoff(attempt: int, base: float, cap: float) -> float:
+    """Full-jitter exponential backoff before retry number `attempt` (from 0)."""
+    return random.uniform(0, min(cap, base * 2**attempt))
+
+
+class Resilience:
+    """
+    Per-endpoint circuit breakers, hedging and retries over `endpoints`.
+
+    `is_failure(exc)` decides which errors count against an endpoint (and
+    may be retried for idempotent requests); `is_unsent(exc)` marks errors
+    raised before the request left the client, which are safe to retry
+    even for non-idempotent requests. Errors matching neither (e.g. a 4xx
+    or an RPC error) are raised straight away.
+
+    Hedges fire after the `hedge_quantile` latency of recent successes
+    (`hedge_delay` until `min_samples` are collected), and at most
+    `max_hedge_ratio` of requests are hedged so a slow fleet is not hit
+    with double the load.
+    """
+
+    def __init__(
+        self,
+        endpoints: Sequence[str],
+        *,
+        is_failure: Callable[[BaseException], bool],
+        is_unsent: Callable[[BaseException], bool] = lambda exc: False,
+        retries: int = 2,
+        backoff_base: float = 0.1,
+        backoff_cap: float = 2.0,
+        hedge: bool = True,
+        hedge_quantile: float = 0.95,
+        hedge_delay: float = 1.0,
+        min_hedge_delay: float = 0.01,
+        max_hedge_ratio: float = 0.1,
+        min_samples: int = 20,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+    ):
+        if not endpoints:
+            raise ValueError("At least one endpoint is required")
+        self.endpoints = list(dict.fromkeys(endpoints))
+        self.is_failure = is_failure
+        self.is_unsent = is_unsent
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.hedge = hedge
+        self.hedge_quantile = hedge_quantile
+        self.default_hedge_delay = hedge_delay
+        self.min_hedge_delay = min_hedge_delay
+        self.max_hedge_ratio = max_hedge_ratio
+        self.min_samples = min_samples
+        self.breakers = {
+            endpoint: CircuitBreaker(failure_threshold, reset_timeout) for endpoint in self.endpoints
+        }
+        self.latencies: dict[str, LatencyWindow] = {}
+        self.counts = {"requests": 0, "hedges": 0, "hedge_wins": 0, "retries": 0, "rejected": 0}
+
+    def hedge_delay(self, key: str = "") -> float:
+        window = self.latencies.get(key)
+        if window is None or len(window) < self.min_samples:
+            return self.default_hedge_delay
+        return max(self.min_hedge_delay, window.quantile(self.hedge_quantile))
+
+    def _may_hedge(self) -> bool:
+        return self.counts["hedges"] < self.max_hedge_ratio * self.counts["requests"] + 1
+
+    async def _send(self, endpoint: str, request: Callable[[str], Awaitable[T]], key: str) -> T:
+        breaker = self.breakers[endpoint]
+        start = time.monotonic()
+        try:
+            result = await request(endpoint)
+        except asyncio.CancelledError:
+            breaker.release()
+            raise
+        except BaseException as exc:
+            if self.is_failure(exc) or self.is_unsent(exc):
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+            raise
+        breaker.record_success()
+        self.latencies.setdefault(key, LatencyWindow()).record(time.monotonic() - start)
+        return result
+
+    def _next_endpoint(self, exclude: set[str], start: int = 0) -> str | None:
+        # Endpoints are tried in order from `start`, so retries move on to
+        # the next replica.
+        for i in range(len(self.endpoints)):
+            endpoint = self.endpoints[(start + i) % len(self.endpoints)]
+            if endpoint not in exclude and self.breakers[endpoint].acquire():
+                return endpoint
+        return None
+
+    async def _attempt(
+        self, request: Callable[[str], Awaitable[T]], idempotent: bool, key: str, start: int
+    ) -> T:
+        endpoint = self._next_endpoint(set(), start)
+        if endpoint is None:
+            self.counts["rejected"] += 1
+            raise CircuitOpenError(f"All circuits open for {', '.join(self.endpoints)}")
+        if not (idempotent and self.hedge):
+            return await self._send(endpoint, request, key)
+
+        primary = asyncio.ensure_future(self._send(endpoint, request, key))
+        tasks = {primary}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=self.hedge_delay(key))
+            if not done and self._may_hedge():
+                # With a single endpoint the duplicate goes to the same URL,
+                # which a load balancer may route to another replica.
+                hedge_endpoint = self._next_endpoint({endpoint}, start) or (
+                    endpoint if len(self.endpoints) == 1 else None
+                )
+                if hedge_endpoint is not None:
+                    self.counts["hedges"] += 1
+                    tasks.add(asyncio.ensure_future(self._send(hedge_endpoint, request, key)))
+            error = None
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not primary:
+                            self.counts["hedge_wins"] += 1
+                        return task.result()
+                    error = error or task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def call(
+        self,
+        request: Callable[[str], Awaitable[T]],
+        *,
+        idempotent: bool = False,
+        key: str = "",
+        deadline: float | None = None,
+    ) -> T:
+        """
+        Runs `request(endpoint)` with breaking, hedging and retries.
+
+        `key` groups requests with similar latency (e.g. a tool name) for
+        the hedge delay. `deadline` (a `time.monotonic()` value) bounds the
+        whole call, retries included; passing it raises `TimeoutError`.
+        """
+        self.counts["requests"] += 1
+        timeout = None if deadline is None else deadline - time.monotonic()
+        async with asyncio.timeout(timeout):
+            for attempt in range(self.retries + 1):
+                try:
+                    return await self._attempt(request, idempotent, key, start=attempt)
+                except CircuitOpenError:
+                    raise
+                except Exception as exc:
+                    retryable = self.is_unsent(exc) or (idempotent and self.is_failure(exc))
+                    if not retryable or attempt == self.retries:
+                        raise
+                self.counts["retries"] += 1
+                await asyncio.sleep(backoff(attempt, self.backoff_base, self.backoff_cap))
+        raise AssertionError("unreachable")
+
+    def snapshot(self) -> dict:
+        return {
+            **self.counts,
+            "circuits": {endpoint: breaker.state for endpoint, breaker in self.breakers.items()},
+            "hedge_delay": {key: round(self.hedge_delay(key), 4) for key in self.latencies},
+        }
+
+
+def is_http_failure(exc: BaseException) -> bool:
+    """Errors that say an endpoint is unhealthy: transport errors, 429 and 5xx."""
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code == 429 or exc.response.status_code >= 500
+    return isinstance(exc, httpx.TransportError)
+
+
+def is_http_unsent(exc: BaseException) -> bool:
+    """Errors raised before the request reached the server."""
+    return isinstance(exc, (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout))
+
+
+_http_policies: dict[tuple[str, ...], Resilience] = {}
+
+
+def http_resilience(endpoints: Sequence[str]) -> Resilience:
+    """
+    The process-wide policy for httpx requests to `endpoints`, so breakers
+    and latency history carry over between calls to the same replicas.
+    """
+    key = tuple(endpoints)
+    if key not in _http_policies:
+        _http_policies[key] = Resilience(endpoints, is_failure=is_http_failure, is_unsent=is_http_unsent)
+    return _http_policies[key]
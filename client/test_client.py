@@ -0,0 +1,327 @@
+import asyncio
+import functools
+import json
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import httpx
+import numpy as np
+import pytest
+
+# Add this directory to the path to import the client modules
+sys.path.insert(0, str(Path(__file__).parent))
+
+import codec
+import mcp_client
+from mcp_client import DEADLINE_HEADER, MCPClient, MCPClientError, _sse_messages, _SseState, decode_array, encode_array
+
+URL = "http://mcp-a/mcp"
+REPLICA = "http://mcp-b/mcp"
+
+
+def reply(request: httpx.Request, result: dict, status_code: int = 200) -> httpx.Response:
+    """A JSON-RPC result for `request`."""
+    body = {"jsonrpc": "2.0", "id": json.loads(request.content)["id"], "result": result}
+    return httpx.Response(status_code, content=codec.dumps(body), headers={"Content-Type": "application/json"})
+
+
+def event(message: dict | None = None, event_id: str | None = None, retry: int | None = None) -> bytes:
+    """One SSE event; without a message, a priming event."""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    if retry is not None:
+        lines.append(f"retry: {retry}")
+    lines.append(f"data: {json.dumps(message)}" if message is not None else "data:")
+    return ("\n".join(lines) + "\n\n").encode()
+
+
+def progress_event(request: httpx.Request, progress: float, total: float, event_id: str | None = None) -> bytes:
+    token = json.loads(request.content)["params"]["_meta"]["progressToken"]
+    params = {"progressToken": token, "progress": progress, "total": total, "message": f"{progress}/{total}"}
+    return event({"jsonrpc": "2.0", "method": "notifications/progress", "params": params}, event_id)
+
+
+def result_event(request: httpx.Request, result: dict, event_id: str | None = None) -> bytes:
+    return event({"jsonrpc": "2.0", "id": json.loads(request.content)["id"], "result": result}, event_id)
+
+
+def sse(*chunks, error: Exception | None = None, headers: dict | None = None) -> httpx.Response:
+    """An SSE response sending `chunks`, then failing with `error` if given."""
+
+    async def body():
+        for chunk in chunks:
+            yield chunk
+        if error is not None:
+            raise error
+
+    return httpx.Response(200, content=body(), headers={"Content-Type": "text/event-stream", **(headers or {})})
+
+
+@pytest.fixture
+def server(monkeypatch):
+    """
+    Answers MCPClient's requests with `server.handler(request)` instead of
+    the network, and records them in `server.requests`.
+    """
+    state = SimpleNamespace(requests=[], handler=None)
+
+    async def handle(request: httpx.Request) -> httpx.Response:
+        state.requests.append(request)
+        return await state.handler(request)
+
+    transport = httpx.MockTransport(handle)
+    monkeypatch.setattr(mcp_client.httpx, "AsyncClient", functools.partial(httpx.AsyncClient, transport=transport))
+    return state
+
+
+@pytest.mark.asyncio
+async def test_call_tool_sends_json_rpc_and_returns_the_result(server):
+    async def handler(request):
+        return reply(request, {"structuredContent": {"result": 5.0}})
+
+    server.handler = handler
+    result = await MCPClient(URL, token="token").call_tool("add", {"a": 2, "b": 3})
+
+    assert result == {"structuredContent": {"result": 5.0}}
+    request = server.requests[0]
+    assert request.url == f"{URL}/"
+    assert request.headers["Authorization"] == "Bearer token"
+    assert request.headers["Content-Type"] == "application/json"
+    payload = codec.loads(request.content)
+    assert payload["method"] == "tools/call"
+    assert payload["params"] == {"name": "add", "arguments": {"a": 2, "b": 3}}
+
+
+@pytest.mark.asyncio
+async def test_rpc_errors_raise(server):
+    async def handler(request):
+        body = {"jsonrpc": "2.0", "id": json.loads(request.content)["id"], "error": {"code": -32602, "message": "bad"}}
+        return httpx.Response(200, json=body)
+
+    server.handler = handler
+    with pytest.raises(MCPClientError, match="RPC Error"):
+        await MCPClient(URL).call_tool("add", {"a": 2})
+
+
+@pytest.mark.parametrize(
+    "values, dtype",
+    [
+        (np.arange(6, dtype=np.int32).reshape(2, 3), "int64"),
+        (np.linspace(0, 1, 5), "float64"),
+        ([1.5, 2, 3], "float64"),
+    ],
+)
+def test_arrays_round_trip_in_binary(values, dtype):
+    encoded = encode_array(values)
+
+    assert encoded["encoding"] == "base64"
+    assert encoded["dtype"] == dtype
+    assert encoded["shape"] == list(np.shape(values))
+    decoded = decode_array(encoded)
+    np.testing.assert_array_equal(decoded, values)
+    assert decoded.dtype == np.dtype(dtype).newbyteorder("<")
+    assert not decoded.flags.writeable
+
+
+def test_plain_json_lists_decode_as_is():
+    assert decode_array([1.0, 2.0]) == [1.0, 2.0]
+
+
+@pytest.mark.asyncio
+async def test_call_array_tool_sends_and_decodes_binary_arrays(server):
+    async def handler(request):
+        values = decode_array(codec.loads(request.content)["params"]["arguments"]["values"])
+        return reply(request, {"structuredContent": {"result": encode_array(values * 2)}})
+
+    server.handler = handler
+    result = await MCPClient(URL).call_array_tool("array_scale", {"values": np.arange(4.0), "factor": 2.0})
+
+    np.testing.assert_array_equal(result, [0.0, 2.0, 4.0, 6.0])
+    arguments = codec.loads(server.requests[0].content)["params"]["arguments"]
+    assert arguments["values"]["encoding"] == "base64"
+    assert arguments["factor"] == 2.0
+
+
+@pytest.mark.asyncio
+async def test_call_array_tool_raises_tool_errors(server):
+    async def handler(request):
+        return reply(request, {"isError": True, "content": [{"type": "text", "text": "Shapes differ"}]})
+
+    server.handler = handler
+    with pytest.raises(MCPClientError, match="Shapes differ"):
+        await MCPClient(URL).call_array_tool("array_add", {"a": np.zeros(2), "b": np.zeros(3)})
+
+
+@pytest.mark.asyncio
+async def test_idempotent_calls_are_retried_on_a_replica(server):
+    async def handler(request):
+        if request.url.host == "mcp-a":
+            return httpx.Response(503)
+        return reply(request, {"structuredContent": {"result": 5.0}})
+
+    server.handler = handler
+    client = MCPClient(URL, replicas=[REPLICA], idempotent_tools=["add"])
+    result = await client.call_tool("add", {"a": 2, "b": 3})
+
+    assert result == {"structuredContent": {"result": 5.0}}
+    assert [request.url.host for request in server.requests] == ["mcp-a", "mcp-b"]
+    assert client.resilience.counts["retries"] == 1
+
+
+@pytest.mark.asyncio
+async def test_other_calls_are_retried_only_when_unsent(server):
+    async def handler(request):
+        if request.url.host == "mcp-a":
+            raise httpx.ConnectError("connection refused", request=request)
+        return httpx.Response(503)
+
+    server.handler = handler
+    client = MCPClient(URL, replicas=[REPLICA])
+
+    # Refused by mcp-a, so sent again to mcp-b, whose 503 may have done the work.
+    with pytest.raises(MCPClientError, match="HTTP Error"):
+        await client.call_tool("create_report")
+    assert [request.url.host for request in server.requests] == ["mcp-a", "mcp-b"]
+
+
+@pytest.mark.asyncio
+async def test_slow_idempotent_calls_are_hedged(server):
+    async def handler(request):
+        if request.url.host == "mcp-a":
+            await asyncio.sleep(5)
+        return reply(request, {"structuredContent": {"result": request.url.host}})
+
+    server.handler = handler
+    client = MCPClient(URL, replicas=[REPLICA], idempotent_tools=["add"])
+    client.resilience.default_hedge_delay = 0.01
+    result = await client.call_tool("add", {"a": 2, "b": 3})
+
+    assert result == {"structuredContent": {"result": "mcp-b"}}
+    assert client.resilience.counts["hedge_wins"] == 1
+
+
+@pytest.mark.asyncio
+async def test_failing_server_opens_the_circuit(server):
+    async def handler(request):
+        return httpx.Response(500)
+
+    server.handler = handler
+    client = MCPClient(URL)
+    for _ in range(5):
+        with pytest.raises(MCPClientError, match="HTTP Error"):
+            await client.call_tool("add")
+
+    with pytest.raises(MCPClientError, match="MCP server unavailable"):
+        await client.call_tool("add")
+    assert len(server.requests) == 5
+    assert client.resilience.snapshot()["circuits"] == {URL: "open"}
+
+
+@pytest.mark.asyncio
+async def test_each_attempt_sends_what_is_left_of_the_timeout(server):
+    async def handler(request):
+        if request.url.host == "mcp-a":
+            await asyncio.sleep(0.2)
+            return httpx.Response(503)
+        return reply(request, {"structuredContent": {"result": 5.0}})
+
+    server.handler = handler
+    client = MCPClient(URL, replicas=[REPLICA], idempotent_tools=["add"])
+    client.resilience.hedge = False
+    await client.call_tool("add", {"a": 2, "b": 3}, timeout=10.0)
+
+    first, retry = (float(request.headers[DEADLINE_HEADER]) for request in server.requests)
+    assert 9.9 < first <= 10.0
+    assert retry <= first - 0.2
+
+
+@pytest.mark.asyncio
+async def test_expired_timeout_raises(server):
+    async def handler(request):
+        await asyncio.sleep(5)
+
+    server.handler = handler
+    with pytest.raises(MCPClientError, match="Timed out after 0.05s"):
+        await MCPClient(URL).call_tool("add", timeout=0.05)
+
+
+@pytest.mark.asyncio
+async def test_sse_messages_are_parsed_with_their_ids():
+    body = (
+        b": keep-alive\n\n"
+        + event(event_id="s-1", retry=250)
+        + b'id: s-2\ndata: {"jsonrpc": "2.0",\ndata:  "id": 1}\n\n'
+        + b"data: [1, 2]\n\n"
+    )
+    state = _SseState()
+
+    messages = [message async for message in _sse_messages(httpx.Response(200, content=body), state)]
+
+    assert messages == [{"jsonrpc": "2.0", "id": 1}, [1, 2]]
+    assert state.last_event_id == "s-2"
+    assert state.retry == 0.25
+
+
+@pytest.mark.asyncio
+async def test_progress_is_reported_in_increasing_order(server):
+    async def handler(request):
+        return sse(
+            event(),
+            progress_event(request, 1, 4),
+            progress_event(request, 2, 4),
+            # A hedged attempt reporting again is ignored.
+            progress_event(request, 1, 4),
+            result_event(request, {"structuredContent": {"result": 10}}),
+        )
+
+    server.handler = handler
+    reports = []
+
+    async def report(progress, total, message):
+        reports.append((progress, total, message))
+
+    result = await MCPClient(URL).call_tool("prime_count", {"n": 30}, progress=report)
+
+    assert result == {"structuredContent": {"result": 10}}
+    assert reports == [(1, 4, "1/4"), (2, 4, "2/4")]
+    assert codec.loads(server.requests[0].content)["params"]["_meta"]["progressToken"]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("error", [None, httpx.ReadError("connection reset")])
+async def test_interrupted_stream_resumes_with_last_event_id(server, error):
+    async def handler(request):
+        call = server.requests[0]
+        if request.method == "POST":
+            return sse(
+                event(event_id="s-1", retry=0),
+                progress_event(call, 1, 2, event_id="s-2"),
+                error=error,
+                headers={"mcp-session-id": "session-1"},
+            )
+        return sse(progress_event(call, 2, 2, event_id="s-3"), result_event(call, {"content": []}, event_id="s-4"))
+
+    server.handler = handler
+    reports = []
+
+    result = await MCPClient(URL).call_tool("prime_count", {"n": 30}, progress=lambda p, *_: reports.append(p))
+
+    assert result == {"content": []}
+    assert reports == [1, 2]
+    _, resume = server.requests
+    assert resume.method == "GET"
+    assert resume.headers["Last-Event-ID"] == "s-2"
+    assert resume.headers["mcp-session-id"] == "session-1"
+
+
+@pytest.mark.asyncio
+async def test_stream_without_event_ids_is_not_resumed(server):
+    async def handler(request):
+        return sse(event(), progress_event(request, 1, 2))
+
+    server.handler = handler
+    with pytest.raises(MCPClientError, match="ended without a result"):
+        await MCPClient(URL).call_tool("prime_count", {"n": 30}, progress=lambda *_: None)
+    assert len(server.requests) == 1
@@ -0,0 +1,329 @@
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from collections.abc import Callable
+from contextlib import asynccontextmanager
+from typing import Any
+from urllib.parse import unquote, urlsplit
+
+logger = logging.getLogger(__name__)
+
+
+class CacheBackend(ABC):
+    """Storage for cached values, shared by every worker using the same backend."""
+
+    @abstractmethod
+    async def get(self, key: str) -> bytes | None:
+        """Returns the value stored under `key`, or None when missing or expired."""
+
+    @abstractmethod
+    async def set(self, key: str, value: bytes, ttl: float):
+        """Stores `value` under `key` for `ttl` seconds."""
+
+    @abstractmethod
+    async def delete(self, key: str):
+        """Removes `key`."""
+
+
+class InMemoryCacheBackend(CacheBackend):
+    """Per-worker entries, LRU-bounded to `max_entries`."""
+
+    def __init__(self, max_entries: int = 10_000):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[bytes, float]] = OrderedDict()
+
+    async def get(self, key: str) -> bytes | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires = entry
+        if expires <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: bytes, ttl: float):
+        self._entries.pop(key, None)
+        self._entries[key] = (value, time.monotonic() + ttl)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def delete(self, key: str):
+        self._entries.pop(key, None)
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """
+    Entries shared by all workers on a host through one SQLite file in WAL
+    mode, so readers never wait for a writer.
+
+    Put the file on a memory-backed filesystem (e.g. /dev/shm) to keep it
+    in shared memory. At most every `prune_interval` seconds, a write also
+    deletes expired entries.
+    """
+
+    def __init__(self, path: str, prune_interval: float = 60.0):
+        self.path = path
+        self.prune_interval = prune_interval
+        self._last_prune = 0.0
+        self._conn = sqlite3.connect(path, timeout=5.0, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache_entries "
+            "(key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS cache_entries_expires ON cache_entries (expires)")
+        self._lock = threading.Lock()
+
+    def _get(self, key: str) -> bytes | None:
+        with self._lock:
+            # Wall-clock time: monotonic clocks are not shared between processes.
+            row = self._conn.execute(
+                "SELECT value FROM cache_entries WHERE key = ? AND expires > ?", (key, time.time())
+            ).fetchone()
+        return row[0] if row else None
+
+    def _set(self, key: str, value: bytes, ttl: float):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache_entries (key, value, expires) VALUES (?, ?, ?)",
+                (key, value, now + ttl),
+            )
+            if now - self._last_prune >= self.prune_interval:
+                self._last_prune = now
+                self._conn.execute("DELETE FROM cache_entries WHERE expires <= ?", (now,))
+
+    def _delete(self, key: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+
+    async def get(self, key: str) -> bytes | None:
+        return await asyncio.to_thread(self._get, key)
+
+    async def set(self, key: str, value: bytes, ttl: float):
+        await asyncio.to_thread(self._set, key, value, ttl)
+
+    async def delete(self, key: str):
+        await asyncio.to_thread(self._delete, key)
+
+
+class RedisError(Exception):
+    """An error reply from a Redis-protocol server."""
+    pass
+
+
+def _encode_command(*args) -> bytes:
+    parts = [b"*%d\r\n" % len(args)]
+    for arg in args:
+        if not isinstance(arg, bytes):
+            arg = str(arg).encode()
+        parts.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+    return b"".join(parts)
+
+
+async def _read_reply(reader: asyncio.StreamReader) -> Any:
+    line = await reader.readline()
+    if not line.endswith(b"\r\n"):
+        raise ConnectionError("Cache server closed the connection")
+    kind, rest = line[:1], line[1:-2]
+    if kind == b"+":
+        return rest.decode()
+    if kind == b"-":
+        return RedisError(rest.decode())
+    if kind == b":":
+        return int(rest)
+    if kind == b"$":
+        length = int(rest)
+        return None if length < 0 else (await reader.readexactly(length + 2))[:-2]
+    if kind == b"*":
+        length = int(rest)
+        return None if length < 0 else [await _read_reply(reader) for _ in range(length)]
+    raise ConnectionError(f"Unexpected reply from cache server: {line!r}")
+
+
+class RedisCacheBackend(CacheBackend):
+    """
+    Entries in a server speaking the Redis protocol (Redis, Valkey, KeyDB,
+    Dragonfly), shared by every worker and host that uses it.
+
+    A minimal RESP2 client over asyncio streams: GET, SET with PX and DEL,
+    after AUTH and SELECT when configured. Up to `max_idle` connections are
+    kept open for reuse; a connection that fails or times out is dropped.
+    Each command is bounded by `timeout` seconds.
+    """
+
+    def __init__(
+        self,
+        host: str = "localhost",
+        port: int = 6379,
+        db: int = 0,
+        username: str | None = None,
+        password: str | None = None,
+        timeout: float = 0.5,
+        max_idle: int = 8,
+    ):
+        self.host = host
+        self.port = port
+        self.db = db
+        self.username = username
+        self.password = password
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self._idle: list[tuple[asyncio.StreamReader, asyncio.StreamWriter]] = []
+
+    @classmethod
+    def from_url(cls, url: str) -> "RedisCacheBackend":
+        """Builds a backend from `redis://[[user]:password@]host[:port][/db]`."""
+        parts = urlsplit(url)
+        return cls(
+            host=parts.hostname or "localhost",
+            port=parts.port or 6379,
+            db=int(parts.path.lstrip("/") or 0),
+            username=unquote(parts.username) if parts.username else None,
+            password=unquote(parts.password) if parts.password else None,
+        )
+
+    @staticmethod
+    async def _roundtrip(reader, writer, *args) -> Any:
+        writer.write(_encode_command(*args))
+        await writer.drain()
+        return await _read_reply(reader)
+
+    async def _connect(self):
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        try:
+            setup = []
+            if self.password is not None:
+                setup.append(("AUTH", self.username, self.password) if self.username else ("AUTH", self.password))
+            if self.db:
+                setup.append(("SELECT", self.db))
+            for command in setup:
+                reply = await self._roundtrip(reader, writer, *command)
+                if isinstance(reply, RedisError):
+                    raise reply
+        except BaseException:
+            writer.close()
+            raise
+        return reader, writer
+
+    @asynccontextmanager
+    async def _connection(self):
+        connection = self._idle.pop() if self._idle else await self._connect()
+        try:
+            yield connection
+        except BaseException:
+            connection[1].close()
+            raise
+        if len(self._idle) < self.max_idle:
+            self._idle.append(connection)
+        else:
+            connection[1].close()
+
+    async def execute(self, *args) -> Any:
+        """Sends one command and returns its reply; raises `RedisError` for error replies."""
+        async with asyncio.timeout(self.timeout):
+            async with self._connection() as (reader, writer):
+                reply = await self._roundtrip(reader, writer, *args)
+        if isinstance(reply, RedisError):
+            raise reply
+        return reply
+
+    async def get(self, key: str) -> bytes | None:
+        return await self.execute("GET", key)
+
+    async def set(self, key: str, value: bytes, ttl: float):
+        await self.execute("SET", key, value, "PX", max(1, int(ttl * 1000)))
+
+    async def delete(self, key: str):
+        await self.execute("DEL", key)
+
+    async def close(self):
+        while self._idle:
+            _, writer = self._idle.pop()
+            writer.close()
+
+
+def create_cache_backend(url: str) -> CacheBackend:
+    """Builds a backend from `memory`, `sqlite:<path>` or `redis://...`."""
+    if url == "memory":
+        return InMemoryCacheBackend()
+    if url.startswith("sqlite:"):
+        return SQLiteCacheBackend(url.removeprefix("sqlite:"))
+    if url.startswith("redis://"):
+        return RedisCacheBackend.from_url(url)
+    raise ValueError(f"Unsupported cache backend: {url}")
+
+
+def _json_dumps(value: Any) -> bytes:
+    return json.dumps(value, separators=(",", ":")).encode()
+
+
+class SharedCache:
+    """
+    JSON values in a `CacheBackend`, under keys prefixed with `namespace`.
+
+    Values are serialized with `dumps` and `loads` (the standard library's
+    json by default). Backend errors are logged and count as misses: an
+    unreachable cache server makes requests slower (nothing is cached),
+    never failed.
+    """
+
+    def __init__(
+        self,
+        backend: CacheBackend,
+        namespace: str = __package__,
+        dumps: Callable[[Any], bytes] = _json_dumps,
+        loads: Callable[[bytes], Any] = json.loads,
+    ):
+        self.backend = backend
+        self.namespace = namespace
+        self.dumps = dumps
+        self.loads = loads
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    async def get(self, key: str) -> Any | None:
+        try:
+            data = await self.backend.get(f"{self.namespace}:{key}")
+        except Exception as e:
+            self.errors += 1
+            logger.warning("Shared cache read failed: %r", e)
+            return None
+        if data is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return self.loads(data)
+
+    async def set(self, key: str, value: Any, ttl: float):
+        if ttl <= 0:
+            return
+        try:
+            await self.backend.set(f"{self.namespace}:{key}", self.dumps(value), ttl)
+        except Exception as e:
+            self.errors += 1
+            logger.warning("Shared cache write failed: %r", e)
+
+    async def delete(self, key: str):
+        try:
+            await self.backend.delete(f"{self.namespace}:{key}")
+        except Exception as e:
+            self.errors += 1
+            logger.warning("Shared cache delete failed: %r", e)
+
+    def snapshot(self) -> dict:
+        return {
+            "backend": type(self.backend).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+        }
+
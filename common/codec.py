@@ -0,0 +1,64 @@
+"""
+JSON encoding using the fastest installed backend.
+
+Set JSON_CODEC to "orjson", "msgspec" or "stdlib" to force one; the default
+"auto" tries orjson, then msgspec, then the stdlib. orjson and msgspec are
+optional; a backend that is not installed falls back to the stdlib.
+"""
+import json
+import os
+from typing import Any
+
+
+def _stdlib_dumps(obj: Any) -> bytes:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def _load_backend(name: str):
+    """Returns (dumps, loads, encode errors) for a backend, or None if it is not installed."""
+    if name == "orjson":
+        try:
+            import orjson
+        except ImportError:
+            return None
+        return orjson.dumps, orjson.loads, (TypeError,)
+    if name == "msgspec":
+        try:
+            import msgspec
+        except ImportError:
+            return None
+        encoder, decoder = msgspec.json.Encoder(), msgspec.json.Decoder()
+        return encoder.encode, decoder.decode, (TypeError, OverflowError, msgspec.EncodeError)
+    if name == "stdlib":
+        return _stdlib_dumps, json.loads, ()
+    raise ValueError(f"Unknown JSON codec: {name}")
+
+
+def _select(preference: str):
+    names = ("orjson", "msgspec", "stdlib") if preference == "auto" else (preference, "stdlib")
+    for name in names:
+        backend = _load_backend(name)
+        if backend is not None:
+            return name, backend
+    raise AssertionError("the stdlib backend is always available")
+
+
+BACKEND, (_dumps, _loads, _encode_errors) = _select(os.environ.get("JSON_CODEC", "auto"))
+
+
+def dumps(obj: Any) -> bytes:
+    """
+    Encodes `obj` as compact UTF-8 JSON.
+
+    Values the fast backends reject (e.g. integers beyond 64 bits) are
+    encoded with the stdlib instead. NaN and infinities become `null` with
+    orjson and msgspec but are kept by the stdlib.
+    """
+    try:
+        return _dumps(obj)
+    except _encode_errors:
+        return _stdlib_dumps(obj)
+
+
+def loads(data: bytes | str) -> Any:
+    return _loads(data)
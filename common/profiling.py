@@ -0,0 +1,249 @@
+import json
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+
+import anyio
+from starlette.datastructures import Headers
+from starlette.requests import Request
+from starlette.responses import JSONResponse, PlainTextResponse
+
+logger = logging.getLogger(__name__)
+
+# Set to 1 by an admin to profile one request regardless of the sample rate.
+PROFILE_HEADER = "X-Profile"
+PROFILES_PATH = "/debug/profiles"
+
+_PROFILE_ID = re.compile(r"^[0-9]+-[0-9a-f]+$")
+
+
+def _collapsed_stacks(skip_thread: int) -> list[str]:
+    """The current stack of every thread but `skip_thread`, root first, in collapsed form."""
+    names = {thread.ident: thread.name for thread in threading.enumerate()}
+    stacks = []
+    for ident, frame in sys._current_frames().items():
+        if ident == skip_thread:
+            continue
+        frames = []
+        while frame is not None:
+            module = frame.f_globals.get("__name__", "?")
+            frames.append(f"{module}:{frame.f_code.co_qualname}")
+            frame = frame.f_back
+        frames.append(names.get(ident, str(ident)))
+        stacks.append(";".join(reversed(frames)))
+    return stacks
+
+
+class StackSampler:
+    """
+    Samples the Python stacks of every thread while profiles are recording.
+
+    One daemon thread wakes every `interval` seconds and adds the stacks to
+    each recording profile; it only runs while a profile is recording, so
+    requests that are not profiled pay nothing. A profile stops collecting
+    after `max_seconds`. Requests share the event loop thread, so a profile
+    also counts work done for requests that ran at the same time.
+    """
+
+    def __init__(self, interval: float = 0.005, max_seconds: float = 30.0):
+        self.interval = interval
+        self.max_seconds = max_seconds
+        self._lock = threading.Lock()
+        self._recording: dict[int, tuple[Counter, float]] = {}
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> Counter:
+        stacks = Counter()
+        with self._lock:
+            self._recording[id(stacks)] = (stacks, time.monotonic() + self.max_seconds)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+                self._thread.start()
+        return stacks
+
+    def stop(self, stacks: Counter):
+        with self._lock:
+            self._recording.pop(id(stacks), None)
+
+    def _run(self):
+        own = threading.get_ident()
+        while True:
+            time.sleep(self.interval)
+            sampled = _collapsed_stacks(own)
+            now = time.monotonic()
+            with self._lock:
+                if not self._recording:
+                    self._thread = None
+                    return
+                for stacks, until in self._recording.values():
+                    if now < until:
+                        stacks.update(sampled)
+
+
+class ProfileStore:
+    """
+    Profiles in `directory`: the collapsed stacks (`<id>.collapsed`, for
+    flamegraph.pl or speedscope) and a JSON summary (`<id>.json`) each.
+
+    Only the newest `max_profiles` are kept. The directory can be shared by
+    the workers of one host; listings read it rather than memory.
+    """
+
+    def __init__(self, directory: str, max_profiles: int = 100):
+        self.directory = directory
+        self.max_profiles = max_profiles
+
+    def _ids(self) -> list[str]:
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        return sorted((name.removesuffix(".json") for name in names if name.endswith(".json")), reverse=True)
+
+    def save(self, summary: dict, stacks: Counter) -> dict:
+        os.makedirs(self.directory, exist_ok=True)
+        profile_id = f"{time.time_ns() // 1_000_000}-{uuid.uuid4().hex[:8]}"
+        summary = {"id": profile_id, **summary, "samples": sum(stacks.values())}
+        with open(self.path(profile_id), "w") as f:
+            f.writelines(f"{stack} {count}\n" for stack, count in stacks.most_common())
+        with open(os.path.join(self.directory, f"{profile_id}.json"), "w") as f:
+            json.dump(summary, f)
+        for old in self._ids()[self.max_profiles:]:
+            for suffix in (".json", ".collapsed"):
+                try:
+                    os.remove(os.path.join(self.directory, old + suffix))
+                except FileNotFoundError:
+                    pass
+        return summary
+
+    def list(self, limit: int = 50) -> list[dict]:
+        profiles = []
+        for profile_id in self._ids()[:limit]:
+            try:
+                with open(os.path.join(self.directory, f"{profile_id}.json")) as f:
+                    profiles.append(json.load(f))
+            except (FileNotFoundError, ValueError):
+                continue
+        return profiles
+
+    def path(self, profile_id: str) -> str:
+        if not _PROFILE_ID.match(profile_id):
+            raise ValueError(f"Invalid profile id {profile_id!r}")
+        return os.path.join(self.directory, f"{profile_id}.collapsed")
+
+
+def is_admin(scope, admin_scope: str) -> bool:
+    """Whether the verified claims in `scope` grant `admin_scope`."""
+    claims = scope.get("state", {}).get("claims") or {}
+    return bool(admin_scope) and admin_scope in claims.get("scope", "").split()
+
+
+def _route(scope) -> str:
+    # The router fills in path_params; put the parameter names back so
+    # profiles of one route group together.
+    path = scope["path"]
+    for name, value in (scope.get("path_params") or {}).items():
+        path = path.replace(str(value), "{" + name + "}")
+    return path
+
+
+class ProfilingMiddleware:
+    """
+    Profiles a sample of HTTP requests with `sampler` and saves them to `store`.
+
+    A `sample_rate` fraction of requests is profiled. Callers whose token
+    grants `admin_scope` can also send `X-Profile: 1` to profile their
+    request; the header is ignored for everyone else. Must run after
+    authentication, which puts the verified claims in the request state.
+    """
+
+    def __init__(self, app, sampler: StackSampler, store: ProfileStore, sample_rate: float = 0.0, admin_scope: str = ""):
+        self.app = app
+        self.sampler = sampler
+        self.store = store
+        self.sample_rate = sample_rate
+        self.admin_scope = admin_scope
+
+    def _wanted(self, scope) -> bool:
+        if scope["path"].startswith(PROFILES_PATH):
+            return False
+        if Headers(scope=scope).get(PROFILE_HEADER) == "1" and is_admin(scope, self.admin_scope):
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._wanted(scope):
+            await self.app(scope, receive, send)
+            return
+
+        status = None
+
+        async def send_tracking(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        started = time.monotonic()
+        stacks = self.sampler.start()
+        try:
+            await self.app(scope, receive, send_tracking)
+        finally:
+            self.sampler.stop(stacks)
+            summary = {
+                "method": scope["method"],
+                "route": _route(scope),
+                "status": status,
+                "seconds": round(time.monotonic() - started, 4),
+                "created": time.time(),
+            }
+            try:
+                await anyio.to_thread.run_sync(self.store.save, summary, stacks)
+            except OSError as e:
+                logger.warning(f"Failed to save profile: {e}")
+
+
+def profiles_routes(store: ProfileStore, admin_scope: str, json_response: type[JSONResponse] = JSONResponse):
+    """
+    Handlers for `GET /debug/profiles` (recent profiles, newest first) and
+    `GET /debug/profiles/{profile_id}` (one profile's collapsed stacks).
+
+    Both need a token that grants `admin_scope`. The listing's `limit`
+    query parameter must be a positive integer; values above the store's
+    `max_profiles` are capped. JSON bodies are rendered with `json_response`.
+    """
+
+    def forbidden(request: Request):
+        if not is_admin(request.scope, admin_scope):
+            return json_response({"error": f"Requires the {admin_scope!r} scope"}, status_code=403)
+        return None
+
+    async def list_profiles(request: Request):
+        if (response := forbidden(request)) is not None:
+            return response
+        try:
+            limit = int(request.query_params.get("limit", "50"))
+        except ValueError:
+            limit = 0
+        if limit < 1:
+            return json_response({"error": "limit must be a positive integer"}, status_code=400)
+        limit = min(limit, store.max_profiles)
+        return json_response({"profiles": await anyio.to_thread.run_sync(store.list, limit)})
+
+    async def get_profile(request: Request):
+        if (response := forbidden(request)) is not None:
+            return response
+        try:
+            path = store.path(request.path_params["profile_id"])
+            body = await anyio.Path(path).read_text()
+        except (ValueError, FileNotFoundError):
+            return json_response({"error": "Profile not found"}, status_code=404)
+        return PlainTextResponse(body)
+
+    return list_profiles, get_profile
@@ -0,0 +1,90 @@
+"""
+Copies the modules in common/ into the packages that use them.
+
+Each package is installed and built (Docker contexts included) on its own,
+so shared modules are vendored: the file in common/ is the only one to
+edit, and every copy is that file plus a header naming it.
+
+    python common/sync.py           # rewrite the copies
+    python common/sync.py --check   # fail if a copy differs (run in CI)
+"""
+import argparse
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Module in common/ -> the copies of it, relative to the repository root.
+COPIES = {
+    "codec.py": [
+        "server/mcp_calculator/codec.py",
+        "client/codec.py",
+        "a2a_invoker/codec.py",
+    ],
+    "resilience.py": [
+        "calculator_agent/calculator_agent/resilience.py",
+        "client/resilience.py",
+        "a2a_invoker/resilience.py",
+    ],
+    "logs.py": [
+        "server/mcp_calculator/logs.py",
+        "calculator_agent/calculator_agent/logs.py",
+    ],
+    "profiling.py": [
+        "server/mcp_calculator/profiling.py",
+        "calculator_agent/calculator_agent/profiling.py",
+    ],
+    "cache_backends.py": [
+        "server/mcp_calculator/cache_backends.py",
+        "calculator_agent/calculator_agent/cache_backends.py",
+    ],
+}
+
+HEADER = "# Copied from common/{name} by common/sync.py; edit that file instead.\n"
+
+
+def expected(name: str) -> str:
+    with open(os.path.join(ROOT, "common", name), encoding="utf-8") as f:
+        return HEADER.format(name=name) + f.read()
+
+
+def stale_copies() -> list[str]:
+    """The copies whose content differs from their source in common/."""
+    stale = []
+    for name, copies in COPIES.items():
+        content = expected(name)
+        for copy in copies:
+            try:
+                with open(os.path.join(ROOT, copy), encoding="utf-8") as f:
+                    current = f.read()
+            except FileNotFoundError:
+                current = None
+            if current != content:
+                stale.append(copy)
+    return stale
+
+
+def sync():
+    for name, copies in COPIES.items():
+        content = expected(name)
+        for copy in copies:
+            with open(os.path.join(ROOT, copy), "w", encoding="utf-8") as f:
+                f.write(content)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--check", action="store_true", help="only report copies that differ")
+    args = parser.parse_args()
+
+    if not args.check:
+        sync()
+        return
+    stale = stale_copies()
+    for copy in stale:
+        print(f"{copy} differs from common/; run `python common/sync.py`", file=sys.stderr)
+    sys.exit(1 if stale else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Serialization microbenchmark over realistic JSON-RPC payloads.
+
+    python benchmarks/json_codec.py
+
+Times encoding and decoding with each installed JSON backend (stdlib, orjson,
+msgspec), and the two ways of getting a pydantic message on and off the wire:
+through a dict and the fastest JSON library (what the invokers do), or
+directly with pydantic-core (what the MCP SDK transport does).
+"""
+import json
+import random
+import sys
+import timeit
+
+from mcp.types import JSONRPCMessage
+
+
+def _stdlib_backend():
+    return (lambda obj: json.dumps(obj, separators=(",", ":")).encode()), json.loads
+
+
+def _backends() -> dict:
+    backends = {"stdlib": _stdlib_backend()}
+    try:
+        import orjson
+        backends["orjson"] = (orjson.dumps, orjson.loads)
+    except ImportError:
+        pass
+    try:
+        import msgspec
+        backends["msgspec"] = (msgspec.json.encode, msgspec.json.decode)
+    except ImportError:
+        pass
+    return backends
+
+
+def _tool_result(values: list) -> dict:
+    # FastMCP returns results twice: as text content and as structured content.
+    return {
+        "jsonrpc": "2.0",
+        "id": "7f9c2ba4-e88f-11ee-9a4c-0242ac120002",
+        "result": {
+            "content": [{"type": "text", "text": json.dumps(values, indent=2)}],
+            "structuredContent": {"result": values},
+            "isError": False,
+        },
+    }
+
+
+def _payloads() -> dict[str, dict]:
+    rng = random.Random(0)
+    return {
+        "tools/call request": {
+            "jsonrpc": "2.0",
+            "id": "7f9c2ba4-e88f-11ee-9a4c-0242ac120002",
+            "method": "tools/call",
+            "params": {"name": "add", "arguments": {"a": 5, "b": 3}},
+        },
+        "scalar result": _tool_result(8.0),
+        "1k float result": _tool_result([rng.uniform(-1e6, 1e6) for _ in range(1_000)]),
+        "100k float result": _tool_result([rng.uniform(-1e6, 1e6) for _ in range(100_000)]),
+    }
+
+
+def _time_us(fn) -> float:
+    number, elapsed = timeit.Timer(fn).autorange()
+    best = min([elapsed] + timeit.Timer(fn).repeat(repeat=2, number=number))
+    return best / number * 1e6
+
+
+def main():
+    backends = _backends()
+    print(f"python {sys.version.split()[0]}; backends: {', '.join(backends)}\n")
+
+    print(f"{'payload':<20} {'bytes':>9} " + " ".join(f"{name + ' enc/dec us':>22}" for name in backends))
+    for label, payload in _payloads().items():
+        size = len(backends["stdlib"][0](payload))
+        cells = []
+        for dumps, loads in backends.values():
+            encoded = dumps(payload)
+            cells.append(f"{_time_us(lambda: dumps(payload)):>10.1f} / {_time_us(lambda: loads(encoded)):>9.1f}")
+        print(f"{label:<20} {size:>9} " + " ".join(f"{cell:>22}" for cell in cells))
+
+    print("\npydantic messages (JSONRPCMessage)")
+    print(f"{'payload':<20} {'via dict enc/dec us':>24} {'pydantic-core enc/dec us':>26}")
+    dumps, loads = backends.get("orjson", backends["stdlib"])
+    for label, payload in _payloads().items():
+        message = JSONRPCMessage.model_validate(payload)
+        wire = message.model_dump_json(by_alias=True, exclude_none=True)
+        via_dict = (
+            _time_us(lambda: dumps(message.model_dump(mode="json", by_alias=True, exclude_none=True))),
+            _time_us(lambda: JSONRPCMessage.model_validate(loads(wire))),
+        )
+        native = (
+            _time_us(lambda: message.model_dump_json(by_alias=True, exclude_none=True)),
+            _time_us(lambda: JSONRPCMessage.model_validate_json(wire)),
+        )
+        print(f"{label:<20} {via_dict[0]:>12.1f} / {via_dict[1]:>9.1f} {native[0]:>14.1f} / {native[1]:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Compares the stateless and stateful streamable HTTP modes under a chatty
+agent workload.
+
+    python benchmarks/session_modes.py --clients 20 --calls 50
+
+Each mode is served by its own server process with token verification
+stubbed out and rate limiting disabled. Every client opens one MCP session
+and makes `--calls` sequential tool calls, the way an agent makes many small
+calls in one turn. Reports per-call latency percentiles and the server's
+resident memory (read from /proc, so Linux only).
+"""
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+import jwt
+
+PACKAGE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PACKAGE_ROOT)
+
+
+def serve(port: int):
+    from unittest.mock import patch
+
+    import uvicorn
+
+    def unverified(_self, token):
+        return jwt.decode(token, options={"verify_signature": False})
+
+    with patch("mcp_calculator.auth.TokenVerifier.verify_token", unverified):
+        from mcp_calculator.app import app
+
+        uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning")
+
+
+def _memory_kb(pid: int) -> dict[str, int]:
+    memory = {}
+    with open(f"/proc/{pid}/status") as status:
+        for line in status:
+            if line.startswith(("VmRSS:", "VmHWM:")):
+                name, value = line.split(":")
+                memory[name] = int(value.split()[0])
+    return memory
+
+
+async def _client(url: str, index: int, calls: int) -> list[float]:
+    from mcp import ClientSession
+    from mcp.client.streamable_http import streamable_http_client
+    from mcp.shared._httpx_utils import create_mcp_http_client
+
+    token = jwt.encode({"sub": f"agent-{index}"}, "benchmark-key-the-server-does-not-check", algorithm="HS256")
+    latencies = []
+    async with create_mcp_http_client(headers={"Authorization": f"Bearer {token}"}) as http_client:
+        async with streamable_http_client(url, http_client=http_client) as (read, write, _):
+            async with ClientSession(read, write) as session:
+                await session.initialize()
+                for call in range(calls):
+                    started = time.perf_counter()
+                    await session.call_tool("add", {"a": call, "b": index})
+                    latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+async def _workload(url: str, clients: int, calls: int) -> tuple[list[float], float]:
+    started = time.perf_counter()
+    results = await asyncio.gather(*(_client(url, i, calls) for i in range(clients)))
+    return [latency for latencies in results for latency in latencies], time.perf_counter() - started
+
+
+def run_mode(stateful: bool, clients: int, calls: int) -> dict:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    env = {**os.environ, "MCP_STATEFUL": str(stateful).lower(), "ADMISSION_RATE": "0"}
+    # The server logs every request; keep its output out of the report.
+    process = subprocess.Popen(
+        [sys.executable, __file__, "--serve", str(port)],
+        env=env,
+        cwd=PACKAGE_ROOT,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        url = f"http://127.0.0.1:{port}/mcp/"
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                httpx.get(url.removesuffix("mcp/") + "metrics")
+                break
+            except httpx.TransportError:
+                if process.poll() is not None or time.monotonic() > deadline:
+                    raise
+                time.sleep(0.1)
+
+        idle = _memory_kb(process.pid)
+        latencies, elapsed = asyncio.run(_workload(url, clients, calls))
+        loaded = _memory_kb(process.pid)
+    finally:
+        process.terminate()
+        process.wait()
+
+    latencies.sort()
+    return {
+        "mode": "stateful" if stateful else "stateless",
+        "calls_per_s": len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95)] * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99)] * 1000,
+        "rss_idle_mb": idle["VmRSS"] / 1024,
+        "rss_after_mb": loaded["VmRSS"] / 1024,
+        "rss_peak_mb": loaded["VmHWM"] / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=20, help="concurrent MCP sessions")
+    parser.add_argument("--calls", type=int, default=50, help="sequential tool calls per session")
+    parser.add_argument("--serve", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve)
+        return
+
+    columns = ["mode", "calls_per_s", "p50_ms", "p95_ms", "p99_ms", "rss_idle_mb", "rss_after_mb", "rss_peak_mb"]
+    print(" ".join(f"{column:>12}" for column in columns))
+    for stateful in (False, True):
+        row = run_mode(stateful, args.clients, args.calls)
+        print(" ".join(f"{row[c]:>12.2f}" if isinstance(row[c], float) else f"{row[c]:>12}" for c in columns))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Compares tool call latency over streamable HTTP and over the in-process
+transport an agent uses with MCP_SERVER_URL=memory://mcp_calculator.
+
+    python benchmarks/transports.py --clients 1 --calls 500
+
+The HTTP server runs in its own process (stateless JSON responses), the
+in-process server in this one; both verify tokens without checking the
+signature and have rate limiting disabled. Every client opens one MCP
+session and makes `--calls` sequential `add` calls.
+"""
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from contextlib import asynccontextmanager
+from unittest.mock import patch
+
+import httpx
+import jwt
+
+PACKAGE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PACKAGE_ROOT)
+os.environ["ADMISSION_RATE"] = "0"
+
+
+def _unverified(_self, token):
+    return jwt.decode(token, options={"verify_signature": False})
+
+
+def serve(port: int):
+    import uvicorn
+
+    with patch("mcp_calculator.auth.TokenVerifier.verify_token", _unverified):
+        from mcp_calculator.app import app
+
+        uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning", access_log=False)
+
+
+@asynccontextmanager
+async def _http_streams(url: str, headers: dict):
+    from mcp.client.streamable_http import streamable_http_client
+    from mcp.shared._httpx_utils import create_mcp_http_client
+
+    async with create_mcp_http_client(headers=headers) as http_client:
+        async with streamable_http_client(url, http_client=http_client) as (read, write, _):
+            yield read, write
+
+
+async def _client(connect, index: int, calls: int) -> list[float]:
+    from mcp import ClientSession
+
+    token = jwt.encode({"sub": f"agent-{index}"}, "benchmark-key-the-server-does-not-check", algorithm="HS256")
+    latencies = []
+    async with connect({"Authorization": f"Bearer {token}"}) as (read, write):
+        async with ClientSession(read, write) as session:
+            await session.initialize()
+            for call in range(calls):
+                started = time.perf_counter()
+                await session.call_tool("add", {"a": call, "b": index})
+                latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+async def _workload(connect, clients: int, calls: int) -> tuple[list[float], float]:
+    started = time.perf_counter()
+    results = await asyncio.gather(*(_client(connect, i, calls) for i in range(clients)))
+    return [latency for latencies in results for latency in latencies], time.perf_counter() - started
+
+
+def _report(transport: str, latencies: list[float], elapsed: float) -> dict:
+    latencies.sort()
+    return {
+        "transport": transport,
+        "calls_per_s": len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95)] * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99)] * 1000,
+    }
+
+
+def run_http(clients: int, calls: int) -> dict:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    process = subprocess.Popen(
+        [sys.executable, __file__, "--serve", str(port)],
+        cwd=PACKAGE_ROOT,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        url = f"http://127.0.0.1:{port}/mcp/"
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                httpx.get(url.removesuffix("mcp/") + "metrics")
+                break
+            except httpx.TransportError:
+                if process.poll() is not None or time.monotonic() > deadline:
+                    raise
+                time.sleep(0.1)
+
+        def connect(headers):
+            return _http_streams(url, headers)
+
+        latencies, elapsed = asyncio.run(_workload(connect, clients, calls))
+    finally:
+        process.terminate()
+        process.wait()
+    return _report("http", latencies, elapsed)
+
+
+def run_in_process(clients: int, calls: int) -> dict:
+    import logging
+
+    from mcp_calculator.app import in_process
+
+    # The server logs every request at INFO; keep it out of the report.
+    logging.disable(logging.INFO)
+    with patch("mcp_calculator.auth.TokenVerifier.verify_token", _unverified):
+        latencies, elapsed = asyncio.run(_workload(in_process.connect, clients, calls))
+    return _report("in_process", latencies, elapsed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=1, help="concurrent MCP sessions")
+    parser.add_argument("--calls", type=int, default=500, help="sequential tool calls per session")
+    parser.add_argument("--serve", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve)
+        return
+
+    columns = ["transport", "calls_per_s", "p50_ms", "p95_ms", "p99_ms"]
+    print(" ".join(f"{column:>12}" for column in columns))
+    for run in (run_http, run_in_process):
+        row = run(args.clients, args.calls)
+        print(" ".join(f"{row[c]:>12.2f}" if isinstance(row[c], float) else f"{row[c]:>12}" for c in columns))
+
+
+if __name__ == "__main__":
+    main()
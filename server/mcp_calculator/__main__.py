@@ -1,9 +1,14 @@
 import uvicorn
 from mcp_calculator.app import app
+from mcp_calculator.config import LOG_LEVEL, LOG_RATE_LIMIT_BURST, LOG_RATE_LIMIT_INTERVAL
+from mcp_calculator.logs import configure_logging
 
 def main():
     """Entry point for the application script."""
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    configure_logging(LOG_LEVEL, burst=LOG_RATE_LIMIT_BURST, interval=LOG_RATE_LIMIT_INTERVAL)
+    # uvicorn's own loggers go through the same queue; AccessLogMiddleware
+    # replaces its access log.
+    uvicorn.run(app, host="0.0.0.0", port=8000, log_config=None, access_log=False)
 
 if __name__ == "__main__":
     main()
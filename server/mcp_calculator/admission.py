@@ -0,0 +1,272 @@
+import asyncio
+import math
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+
+from mcp_calculator.logs import stage
+from mcp_calculator.responses import CodecJSONResponse
+
+
+class RateLimitBackend(ABC):
+    """Storage for per-subject token buckets."""
+
+    @abstractmethod
+    async def take(self, key: str, rate: float, burst: int) -> float:
+        """
+        Takes one token from `key`'s bucket.
+
+        Returns 0 when a token was available, otherwise the number of seconds
+        until one will be.
+        """
+
+
+def _refill(tokens: float, elapsed: float, rate: float, burst: int) -> float:
+    return min(float(burst), tokens + max(elapsed, 0.0) * rate)
+
+
+class InMemoryRateLimitBackend(RateLimitBackend):
+    """Per-worker token buckets, LRU-bounded to `max_keys` subjects."""
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+
+    async def take(self, key: str, rate: float, burst: int) -> float:
+        now = time.monotonic()
+        tokens, updated = self._buckets.pop(key, (float(burst), now))
+        tokens = _refill(tokens, now - updated, rate, burst)
+        retry_after = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            retry_after = (1 - tokens) / rate
+        self._buckets[key] = (tokens, now)
+        # An evicted subject simply starts again with a full bucket.
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return retry_after
+
+
+class SQLiteRateLimitBackend(RateLimitBackend):
+    """
+    Token buckets shared by all workers on a host through one SQLite file.
+
+    Each take is a short write transaction; SQLite's file lock serializes
+    workers, so the limit holds across the whole host. At most every
+    `prune_interval` seconds, buckets idle long enough to have refilled are
+    deleted (a missing bucket is a full one), keeping the table bounded by
+    the number of recently active subjects.
+    """
+
+    def __init__(self, path: str, prune_interval: float = 60.0):
+        self.path = path
+        self.prune_interval = prune_interval
+        self._last_prune = 0.0
+        self._conn = sqlite3.connect(path, timeout=5.0, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS token_buckets "
+            "(key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS token_buckets_updated ON token_buckets (updated)"
+        )
+        self._lock = threading.Lock()
+
+    def _take(self, key: str, rate: float, burst: int) -> float:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Wall-clock time: monotonic clocks are not shared between processes.
+                now = time.time()
+                row = self._conn.execute(
+                    "SELECT tokens, updated FROM token_buckets WHERE key = ?", (key,)
+                ).fetchone()
+                tokens, updated = row if row else (float(burst), now)
+                tokens = _refill(tokens, now - updated, rate, burst)
+                retry_after = 0.0
+                if tokens >= 1:
+                    tokens -= 1
+                else:
+                    retry_after = (1 - tokens) / rate
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO token_buckets (key, tokens, updated) VALUES (?, ?, ?)",
+                    (key, tokens, now),
+                )
+                if now - self._last_prune >= self.prune_interval:
+                    self._last_prune = now
+                    self._conn.execute(
+                        "DELETE FROM token_buckets WHERE updated < ?", (now - burst / rate,)
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return retry_after
+
+    async def take(self, key: str, rate: float, burst: int) -> float:
+        return await asyncio.to_thread(self._take, key, rate, burst)
+
+
+def create_backend(url: str) -> RateLimitBackend:
+    """Builds a backend from `memory` or `sqlite:<path>`."""
+    if url == "memory":
+        return InMemoryRateLimitBackend()
+    if url.startswith("sqlite:"):
+        return SQLiteRateLimitBackend(url.removeprefix("sqlite:"))
+    raise ValueError(f"Unsupported admission backend: {url}")
+
+
+class ConcurrencyLimiter:
+    """
+    Caps in-flight requests with a bounded FIFO wait queue.
+
+    `acquire` returns False straight away when the queue is full, or after
+    `queue_timeout` seconds without a free slot. A max of 0 disables the cap.
+    """
+
+    def __init__(self, max_in_flight: int, max_queue: int, queue_timeout: float):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self._waiters: deque[asyncio.Future] = deque()
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self) -> bool:
+        if self.max_in_flight <= 0:
+            self.in_flight += 1
+            return True
+        if self.in_flight < self.max_in_flight and not self._waiters:
+            self.in_flight += 1
+            return True
+        if len(self._waiters) >= self.max_queue:
+            return False
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            # release() hands its slot over by resolving the waiter.
+            await asyncio.wait_for(waiter, self.queue_timeout)
+            return True
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            else:
+                try:
+                    self._waiters.remove(waiter)
+                except ValueError:
+                    pass
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            return False
+
+    def release(self):
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.in_flight -= 1
+
+
+class AdmissionController:
+    """Per-subject token buckets in front of a global in-flight limit."""
+
+    def __init__(
+        self,
+        backend: RateLimitBackend,
+        rate: float,
+        burst: int,
+        max_in_flight: int,
+        max_queue: int,
+        queue_timeout: float,
+        retry_after: float = 1.0,
+    ):
+        self.backend = backend
+        self.rate = rate
+        self.burst = burst
+        self.limiter = ConcurrencyLimiter(max_in_flight, max_queue, queue_timeout)
+        self.retry_after = retry_after
+        self.admitted = 0
+        self.rejected_rate = 0
+        self.rejected_queue = 0
+
+    async def check_rate(self, subject: str) -> float:
+        if self.rate <= 0:
+            return 0.0
+        return await self.backend.take(subject, self.rate, self.burst)
+
+    def snapshot(self) -> dict:
+        return {
+            "admitted": self.admitted,
+            "rejected_rate_limited": self.rejected_rate,
+            "rejected_overloaded": self.rejected_queue,
+            "in_flight": self.limiter.in_flight,
+            "queued": self.limiter.queued,
+        }
+
+
+def _too_many_requests(detail: str, retry_after: float) -> CodecJSONResponse:
+    return CodecJSONResponse(
+        {"error": detail},
+        status_code=429,
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+    )
+
+
+class AdmissionMiddleware:
+    """
+    Admission control for MCP requests.
+
+    Runs after AuthMiddleware so buckets are keyed by the verified JWT
+    subject. A request first takes a token from its subject's bucket, then
+    waits (bounded) for a global in-flight slot; either failing returns 429
+    with a `Retry-After` header.
+    """
+    def __init__(self, app, controller: AdmissionController):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith("/mcp/"):
+            await self.app(scope, receive, send)
+            return
+
+        controller = self.controller
+        claims = scope.get("state", {}).get("claims")
+        subject = claims.get("sub") if isinstance(claims, dict) else None
+
+        retry_after = await controller.check_rate(subject or "anonymous")
+        if retry_after > 0:
+            controller.rejected_rate += 1
+            response = _too_many_requests("Rate limit exceeded", retry_after)
+            await response(scope, receive, send)
+            return
+
+        if scope.get("method") == "GET":
+            # A GET opens a session's long-lived SSE stream (or resumes one);
+            # it would hold an in-flight slot for as long as it stays open.
+            controller.admitted += 1
+            await self.app(scope, receive, send)
+            return
+
+        with stage("admission"):
+            acquired = await controller.limiter.acquire()
+        if not acquired:
+            controller.rejected_queue += 1
+            response = _too_many_requests("Server overloaded", controller.retry_after)
+            await response(scope, receive, send)
+            return
+
+        controller.admitted += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            controller.limiter.release()
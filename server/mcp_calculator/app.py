@@ -1,38 +1,277 @@
+from contextlib import asynccontextmanager
+
+import anyio
+from mcp.server.auth.middleware.bearer_auth import AuthenticatedUser
 from mcp.server.fastmcp import FastMCP
+from mcp_calculator.tools.arrays import register_array_tools
 from mcp_calculator.tools.calculator import register_calculator_tools
-from mcp_calculator.auth import TokenVerifier
+from mcp_calculator.tools.number_theory import register_number_theory_tools
+from mcp_calculator.tools.pipeline import register_pipeline_tools
+from mcp_calculator import codec
+from mcp_calculator.admission import AdmissionController, AdmissionMiddleware, create_backend
+from mcp_calculator.auth import TokenVerifier, access_token
+from mcp_calculator.cache import ResultCache
+from mcp_calculator.cache_backends import SharedCache, create_cache_backend
+from mcp_calculator.compression import CompressionMiddleware
+from mcp_calculator.config import (
+    ACCESS_LOG,
+    ADMISSION_BACKEND,
+    ADMISSION_BURST,
+    ADMISSION_MAX_IN_FLIGHT,
+    ADMISSION_MAX_QUEUE,
+    ADMISSION_QUEUE_TIMEOUT,
+    ADMISSION_RATE,
+    AUTH_CACHE_TTL,
+    CACHE_BACKEND,
+    COMPRESSION_ENABLED,
+    COMPRESSION_GZIP_LEVEL,
+    COMPRESSION_MINIMUM_SIZE,
+    COMPRESSION_ZSTD_LEVEL,
+    JWKS_CACHE_TTL,
+    MCP_EVENT_STORE_MAX_EVENTS,
+    MCP_JSON_RESPONSE,
+    MCP_MAX_REQUEST_BYTES,
+    MCP_MAX_SESSIONS,
+    MCP_SESSION_IDLE_TIMEOUT,
+    MCP_SSE_RETRY_MS,
+    MCP_STATEFUL,
+    PROFILING_ADMIN_SCOPE,
+    PROFILING_DIR,
+    PROFILING_ENABLED,
+    PROFILING_INTERVAL,
+    PROFILING_MAX_PROFILES,
+    PROFILING_MAX_SECONDS,
+    PROFILING_SAMPLE_RATE,
+    TOOL_CACHE_MAX_BYTES,
+    TOOL_CACHE_MAX_ENTRIES,
+    TOOL_PROCESS_WORKERS,
+    TOOL_THREAD_WORKERS,
+    TOOL_TIMEOUT,
+)
+from mcp_calculator.deadline import DeadlineMiddleware
+from mcp_calculator.event_store import MemoryEventStore
+from mcp_calculator.execution import ToolExecutor
+from mcp_calculator.in_process import InProcessTransport
+from mcp_calculator.logs import AccessLogMiddleware, stage
+from mcp_calculator.profiling import PROFILES_PATH, ProfileStore, ProfilingMiddleware, StackSampler, profiles_routes
+from mcp_calculator.responses import CodecJSONResponse
 from starlette.middleware import Middleware
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.requests import Request
-from starlette.responses import JSONResponse
 
 class AuthMiddleware(BaseHTTPMiddleware):
-    def __init__(self, app):
+    def __init__(self, app, verifier: TokenVerifier):
         super().__init__(app)
-        self.verifier = TokenVerifier()
+        self.verifier = verifier
 
     async def dispatch(self, request: Request, call_next):
-        if request.url.path.startswith("/mcp/"):
+        # /metrics exposes per-tool and per-subject counters, so it needs a token too
+        if (
+            request.url.path.startswith("/mcp/")
+            or request.url.path == "/metrics"
+            or request.url.path.startswith(PROFILES_PATH)
+        ):
             try:
-                await self.verifier.verify_request(request)
+                with stage("auth"):
+                    token, claims = await self.verifier.authenticate(request)
             except ValueError as e:
-                return JSONResponse({"error": str(e)}, status_code=401)
+                return CodecJSONResponse({"error": str(e)}, status_code=401)
+            # Claims are read downstream (e.g. the JWT subject for rate limiting)
+            request.state.claims = claims
+            # In stateful mode the session manager binds each MCP session to
+            # the principal that opened it and rejects other callers.
+            request.scope["user"] = AuthenticatedUser(access_token(token, claims))
         return await call_next(request)
 
+
+class DisconnectMiddleware:
+    """
+    Cancels an MCP request when the client disconnects.
+
+    The JSON response path of the streamable HTTP transport only notices a
+    gone client when it tries to send the result, so a tool would otherwise
+    run to completion for nobody. The request body is buffered up front and
+    a watcher waits for `http.disconnect`; cancelling the handler tears down
+    the per-request MCP transport, which cancels the in-flight tool call.
+
+    Only installed for stateless JSON responses: SSE responses notice
+    disconnects themselves, and in stateful mode a call keeps running in
+    its session so the client can resume it with `Last-Event-ID`.
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith("/mcp/"):
+            await self.app(scope, receive, send)
+            return
+
+        body = []
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+            body.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                break
+
+        disconnected = anyio.Event()
+        body_sent = False
+
+        async def replay_receive():
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {"type": "http.request", "body": b"".join(body), "more_body": False}
+            await disconnected.wait()
+            return {"type": "http.disconnect"}
+
+        async with anyio.create_task_group() as tg:
+            async def watch_disconnect():
+                while (await receive())["type"] != "http.disconnect":
+                    pass
+                disconnected.set()
+                tg.cancel_scope.cancel()
+
+            tg.start_soon(watch_disconnect)
+            await self.app(scope, replay_receive, send)
+            tg.cancel_scope.cancel()
+
+
+# Shared tool executors; the pools are created in the app lifespan below
+executor = ToolExecutor(
+    thread_workers=TOOL_THREAD_WORKERS,
+    process_workers=TOOL_PROCESS_WORKERS,
+    default_timeout=TOOL_TIMEOUT,
+)
+
+# Shared result cache for tools marked pure
+result_cache = ResultCache(max_entries=TOOL_CACHE_MAX_ENTRIES, max_bytes=TOOL_CACHE_MAX_BYTES)
+
+# Per-subject rate limiting and global in-flight limit
+admission = AdmissionController(
+    backend=create_backend(ADMISSION_BACKEND),
+    rate=ADMISSION_RATE,
+    burst=ADMISSION_BURST,
+    max_in_flight=ADMISSION_MAX_IN_FLIGHT,
+    max_queue=ADMISSION_MAX_QUEUE,
+    queue_timeout=ADMISSION_QUEUE_TIMEOUT,
+)
+
+# Verified tokens and the JWKS, shared with the other workers using the cache
+shared_cache = SharedCache(create_cache_backend(CACHE_BACKEND), dumps=codec.dumps, loads=codec.loads)
+verifier = TokenVerifier(cache=shared_cache, claims_ttl=AUTH_CACHE_TTL, jwks_ttl=JWKS_CACHE_TTL)
+
+# Sampled and admin-requested request profiles
+profile_store = ProfileStore(PROFILING_DIR, max_profiles=PROFILING_MAX_PROFILES)
+profile_sampler = StackSampler(interval=PROFILING_INTERVAL, max_seconds=PROFILING_MAX_SECONDS)
+
+# Resumable SSE streams in stateful mode
+event_store = MemoryEventStore(max_events=MCP_EVENT_STORE_MAX_EVENTS) if MCP_STATEFUL else None
+
 # Initialize FastMCP server
 server = FastMCP(
     name="mcp-calculator",
     streamable_http_path="/mcp/",
-    stateless_http=True,
-    json_response=True,
+    stateless_http=not MCP_STATEFUL,
+    json_response=MCP_JSON_RESPONSE and not MCP_STATEFUL,
+    event_store=event_store,
+    retry_interval=MCP_SSE_RETRY_MS,
+    session_idle_timeout=MCP_SESSION_IDLE_TIMEOUT,
+    max_sessions=MCP_MAX_SESSIONS,
+    max_request_body_size=MCP_MAX_REQUEST_BYTES,
 )
 
 # Register tools
-register_calculator_tools(server)
+register_calculator_tools(server, executor, result_cache)
+register_array_tools(server, executor)
+register_number_theory_tools(server, executor, result_cache)
+register_pipeline_tools(server, executor)
+
+# MCP sessions for an agent running in this process (MCP_SERVER_URL=memory://)
+in_process = InProcessTransport(server, verifier, admission)
+
+
+@server.custom_route("/metrics", methods=["GET"])
+async def metrics(_request: Request):
+    return CodecJSONResponse(
+        {
+            "tools": executor.metrics.snapshot(),
+            "cache": result_cache.snapshot(),
+            "admission": admission.snapshot(),
+            "streamable_http": _transport_snapshot(),
+            "in_process": in_process.snapshot(),
+            "shared_cache": shared_cache.snapshot(),
+        }
+    )
+
+
+_list_profiles, _get_profile = profiles_routes(profile_store, PROFILING_ADMIN_SCOPE, json_response=CodecJSONResponse)
+server.custom_route(PROFILES_PATH, methods=["GET"])(_list_profiles)
+server.custom_route(PROFILES_PATH + "/{profile_id}", methods=["GET"])(_get_profile)
+
 
-# Get the internal app and wrap it with auth middleware
+def _open_sessions() -> int | None:
+    """
+    The number of open stateful sessions, or None if it cannot be read.
+
+    The SDK has no public count, so this reads the session manager's table
+    defensively: if a newer SDK renames it, /metrics drops the number
+    instead of failing.
+    """
+    instances = getattr(server.session_manager, "_server_instances", None)
+    try:
+        return len(instances)
+    except TypeError:
+        return None
+
+
+def _transport_snapshot() -> dict:
+    if not MCP_STATEFUL:
+        return {"mode": "stateless"}
+    return {
+        "mode": "stateful",
+        "sessions": _open_sessions(),
+        "max_sessions": MCP_MAX_SESSIONS,
+        "event_store": event_store.snapshot(),
+    }
+
+
+# Get the internal app and wrap it with auth and admission middleware
+# (the last added runs first: access log, compression, auth, profiling,
+# deadline, then admission, then disconnect handling)
 http_app = server.streamable_http_app()
-http_app.add_middleware(AuthMiddleware)
+if MCP_JSON_RESPONSE and not MCP_STATEFUL:
+    http_app.add_middleware(DisconnectMiddleware)
+http_app.add_middleware(AdmissionMiddleware, controller=admission)
+http_app.add_middleware(DeadlineMiddleware)
+http_app.add_middleware(
+    ProfilingMiddleware,
+    sampler=profile_sampler,
+    store=profile_store,
+    sample_rate=PROFILING_SAMPLE_RATE if PROFILING_ENABLED else 0.0,
+    admin_scope=PROFILING_ADMIN_SCOPE,
+)
+http_app.add_middleware(AuthMiddleware, verifier=verifier)
+if COMPRESSION_ENABLED:
+    http_app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=COMPRESSION_MINIMUM_SIZE,
+        gzip_level=COMPRESSION_GZIP_LEVEL,
+        zstd_level=COMPRESSION_ZSTD_LEVEL,
+    )
+if ACCESS_LOG:
+    http_app.add_middleware(AccessLogMiddleware)
+
+# Run the tool executors alongside the MCP session manager
+_session_manager_lifespan = http_app.router.lifespan_context
+
+@asynccontextmanager
+async def lifespan(app):
+    async with executor.lifespan(), _session_manager_lifespan(app):
+        yield
+
+http_app.router.lifespan_context = lifespan
 
 # Expose the wrapped app
 app = http_app
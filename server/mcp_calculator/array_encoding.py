@@ -0,0 +1,89 @@
+import base64
+import math
+from typing import Annotated, Literal
+
+import numpy as np
+from mcp.types import CallToolResult, TextContent
+from pydantic import BaseModel, Field
+
+from mcp_calculator import codec
+
+# Wire dtypes and their explicit little-endian numpy equivalents.
+DTYPES = {"float64": np.dtype("<f8"), "int64": np.dtype("<i8")}
+
+
+class BinaryArray(BaseModel):
+    """
+    A numeric array sent as base64-encoded little-endian bytes.
+
+    Tools taking arrays accept either this or a plain JSON list. Results
+    use the encoding of the arguments, so clients that only send JSON lists
+    always get JSON lists back.
+    """
+
+    encoding: Literal["base64"] = "base64"
+    dtype: Literal["float64", "int64"]
+    shape: list[int] = Field(description="Array dimensions; their product times 8 is the byte length")
+    data: str = Field(description="Base64 of the array bytes in C order")
+
+
+# The argument type of array tools.
+NumericArray = list[float] | BinaryArray
+
+# The return annotation of array tools: a CallToolResult whose structured
+# content is {"result": NumericArray} (see `array_result`).
+ArrayResult = Annotated[CallToolResult, NumericArray]
+
+
+def to_numpy(value: NumericArray) -> np.ndarray:
+    """
+    Converts an array argument to numpy.
+
+    Binary arrays are viewed in place over the decoded bytes
+    (`numpy.frombuffer`), so the result is read-only.
+    """
+    if not isinstance(value, BinaryArray):
+        return np.asarray(value, dtype=np.float64)
+
+    if any(dim < 0 for dim in value.shape):
+        raise ValueError(f"Invalid array shape: {value.shape}")
+    try:
+        buffer = base64.b64decode(value.data, validate=True)
+    except ValueError as e:
+        raise ValueError(f"Invalid base64 array data: {e}") from e
+    dtype = DTYPES[value.dtype]
+    expected = math.prod(value.shape) * dtype.itemsize
+    if len(buffer) != expected:
+        raise ValueError(f"Array data is {len(buffer)} bytes, expected {expected} for shape {value.shape}")
+    return np.frombuffer(buffer, dtype=dtype).reshape(value.shape)
+
+
+def from_numpy(array: np.ndarray, binary: bool) -> NumericArray:
+    """Converts an array result to the wire: binary, or a flat JSON list."""
+    if not binary:
+        return array.astype(np.float64, copy=False).ravel().tolist()
+    name = "int64" if np.issubdtype(array.dtype, np.integer) else "float64"
+    array = np.ascontiguousarray(array, dtype=DTYPES[name])
+    return BinaryArray(dtype=name, shape=list(array.shape), data=base64.b64encode(array.data).decode("ascii"))
+
+
+def is_binary(*values: NumericArray) -> bool:
+    """Whether a call opted into binary results by sending a binary argument."""
+    return any(isinstance(value, BinaryArray) for value in values)
+
+
+def array_result(array: np.ndarray, binary: bool) -> CallToolResult:
+    """
+    Builds an array tool's result.
+
+    FastMCP would render a list as one text block per element and repeat
+    a binary array's base64 in the text, so the text is built here: compact
+    JSON for lists, a one-line summary for binary arrays.
+    """
+    wire = from_numpy(array, binary)
+    if isinstance(wire, BinaryArray):
+        text = f"{wire.dtype} array of shape {wire.shape} (binary, see structured content)"
+        wire = wire.model_dump()
+    else:
+        text = codec.dumps(wire).decode()
+    return CallToolResult(content=[TextContent(type="text", text=text)], structuredContent={"result": wire})
@@ -1,12 +1,18 @@
+import asyncio
+import hashlib
 import os
 import logging
+import time
 import certifi
 import ssl
 import jwt
 from jwt import PyJWKClient
+from mcp.server.auth.provider import AccessToken
 from starlette.requests import Request
 from starlette.responses import JSONResponse
 
+from mcp_calculator.cache_backends import SharedCache
+
 # Configure logging
 logger = logging.getLogger(__name__)
 
@@ -16,9 +22,47 @@ OIDC_AUDIENCE = os.getenv("OIDC_AUDIENCE", "https://mcp.msgraph.com")
 OIDC_JWKS_URL = os.getenv("OIDC_JWKS_URL", "https://dev-d2i2ktw25ycepyad.us.auth0.com/.well-known/jwks.json")
 
 class TokenVerifier:
-    def __init__(self):
+    """
+    Verifies bearer tokens against the OIDC provider's keys.
+
+    With a shared `cache`, workers share what they verify: the JWKS (for
+    `jwks_ttl` seconds), so a cold worker need not fetch it, and verified
+    claims (keyed by a hash of the token, for at most `claims_ttl` seconds
+    and never past the token's expiry), so a token is verified once for
+    all workers. The cache must be as trusted as the servers themselves.
+    """
+
+    def __init__(self, cache: SharedCache | None = None, claims_ttl: float = 300.0, jwks_ttl: float = 600.0):
         ssl_context = ssl.create_default_context(cafile=certifi.where())
         self.jwks_client = PyJWKClient(OIDC_JWKS_URL, ssl_context=ssl_context)
+        self.cache = cache
+        self.claims_ttl = claims_ttl
+        self.jwks_ttl = jwks_ttl
+        self._jwks_lock = asyncio.Lock()
+
+    def _has_key(self, kid: str) -> bool:
+        jwk_set = self.jwks_client.jwk_set_cache.get() if self.jwks_client.jwk_set_cache else None
+        return jwk_set is not None and any(key.key_id == kid for key in jwk_set.keys)
+
+    async def _load_jwks(self, token: str):
+        """
+        Makes the token's signing key available to `verify_token`: from the
+        shared cache when another worker has fetched it, else from the JWKS
+        endpoint (off the event loop), sharing the result.
+        """
+        kid = jwt.get_unverified_header(token).get("kid")
+        if kid is None or self.cache is None or self._has_key(kid):
+            return
+        async with self._jwks_lock:
+            if self._has_key(kid):
+                return
+            shared = await self.cache.get("jwks")
+            if shared is not None and any(key.get("kid") == kid for key in shared.get("keys", [])):
+                self.jwks_client.jwk_set_cache.put(shared)
+                return
+            jwks = await asyncio.to_thread(self.jwks_client.fetch_data)
+            self.jwks_client.jwk_set_cache.put(jwks)
+            await self.cache.set("jwks", jwks, self.jwks_ttl)
 
     def verify_token(self, token: str) -> dict:
         try:
@@ -32,16 +76,47 @@ class TokenVerifier:
             )
             return data
         except jwt.PyJWTError as e:
-            logger.error(f"Token verification failed: {e}")
+            logger.error("Token verification failed: %s", e)
             raise
 
-    async def verify_request(self, request: Request):
-        auth_header = request.headers.get("Authorization")
+    async def authenticate_header(self, auth_header: str | None) -> tuple[str, dict]:
+        """Returns the bearer token in an Authorization header value and its verified claims."""
         if not auth_header or not auth_header.startswith("Bearer "):
             raise ValueError("Missing or invalid Authorization header")
 
         token = auth_header.split(" ")[1]
+        key = "token:" + hashlib.sha256(token.encode()).hexdigest()
+        now = time.time()
+        if self.cache is not None:
+            claims = await self.cache.get(key)
+            if claims is not None and claims.get("exp", now + 1) > now:
+                return token, claims
         try:
-            self.verify_token(token)
+            await self._load_jwks(token)
+            claims = self.verify_token(token)
         except Exception as e:
             raise ValueError(f"Invalid token: {str(e)}")
+        if self.cache is not None:
+            ttl = min(self.claims_ttl, claims["exp"] - now) if "exp" in claims else self.claims_ttl
+            await self.cache.set(key, claims, ttl)
+        return token, claims
+
+    async def authenticate(self, request: Request) -> tuple[str, dict]:
+        """Returns the request's bearer token and its verified claims."""
+        return await self.authenticate_header(request.headers.get("Authorization"))
+
+    async def verify_request(self, request: Request) -> dict:
+        _token, claims = await self.authenticate(request)
+        return claims
+
+
+def access_token(token: str, claims: dict) -> AccessToken:
+    """The MCP SDK's view of a verified bearer token."""
+    return AccessToken(
+        token=token,
+        client_id=claims.get("azp") or claims.get("client_id") or claims.get("sub", ""),
+        scopes=claims.get("scope", "").split(),
+        expires_at=claims.get("exp"),
+        subject=claims.get("sub"),
+        claims=claims,
+    )
@@ -0,0 +1,155 @@
+import functools
+import math
+import sys
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable
+
+# Deterministic failures of pure tools (e.g. divide by zero) are cached too.
+CACHEABLE_ERRORS = (ValueError, ArithmeticError)
+
+_NAN = ("nan",)
+_NEGATIVE_ZERO = ("-0.0",)
+
+
+def canonicalize(value: Any) -> Any:
+    """
+    Returns a hashable, canonical form of a tool argument.
+
+    Integral floats collapse to ints so `2` and `2.0` share a key. Bools
+    are tagged so they do not collide with `1` and `0`. `-0.0` and NaN map
+    to sentinels: the former compares equal to `0` but can flip a result's
+    sign, the latter never compares equal to itself. Lists and dicts are
+    tagged too, so no argument canonicalizes to another's sentinel.
+    """
+    if isinstance(value, bool):
+        return ("bool", value)
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, float):
+        if math.isnan(value):
+            return _NAN
+        if value == 0 and math.copysign(1.0, value) < 0:
+            return _NEGATIVE_ZERO
+        if value.is_integer():
+            return int(value)
+        return value
+    if isinstance(value, (list, tuple)):
+        return ("list", tuple(canonicalize(v) for v in value))
+    if isinstance(value, dict):
+        return ("dict", tuple(sorted((k, canonicalize(v)) for k, v in value.items())))
+    return value
+
+
+def _estimate_size(obj: Any) -> int:
+    size = sys.getsizeof(obj)
+    if isinstance(obj, (tuple, list)):
+        size += sum(_estimate_size(item) for item in obj)
+    elif isinstance(obj, dict):
+        size += sum(_estimate_size(k) + _estimate_size(v) for k, v in obj.items())
+    return size
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+
+
+class ResultCache:
+    """
+    Bounded LRU cache for results of pure tools.
+
+    Bounded by both entry count and an estimated memory budget; the least
+    recently used entries are evicted first. A max of 0 entries disables
+    caching and `pure` becomes a no-op. All state is guarded by one lock,
+    so tools running on the event loop and on pool threads can share it.
+    """
+
+    def __init__(self, max_entries: int = 4096, max_bytes: int = 8 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[tuple, tuple[bool, Any, int]] = OrderedDict()
+        self._bytes = 0
+        self._evictions = 0
+        self._stats: dict[str, CacheStats] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.max_bytes > 0
+
+    def get(self, key: tuple) -> tuple[bool, bool, Any]:
+        """Returns (found, is_error, value) and counts a hit or miss."""
+        with self._lock:
+            stats = self._stats.setdefault(key[0], CacheStats())
+            entry = self._entries.get(key)
+            if entry is None:
+                stats.misses += 1
+                return False, False, None
+            self._entries.move_to_end(key)
+            stats.hits += 1
+            return True, entry[0], entry[1]
+
+    def put(self, key: tuple, value: Any, is_error: bool = False):
+        size = _estimate_size(key) + _estimate_size(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[2]
+            self._entries[key] = (is_error, value, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, _, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self._evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "evictions": self._evictions,
+                "tools": {
+                    name: {"hits": stats.hits, "misses": stats.misses}
+                    for name, stats in self._stats.items()
+                },
+            }
+
+    def pure(self, fn: Callable) -> Callable:
+        """
+        Decorator marking a tool as a pure function of its arguments.
+
+        Apply it above `@executor.policy(...)` so cache hits skip the pool.
+        """
+        if not self.enabled:
+            return fn
+
+        @functools.wraps(fn)
+        async def wrapper(**kwargs):
+            key = (fn.__name__, canonicalize(kwargs))
+            found, is_error, value = self.get(key)
+            if found:
+                if is_error:
+                    error_type, args = value
+                    raise error_type(*args)
+                return value
+            try:
+                result = await fn(**kwargs)
+            except CACHEABLE_ERRORS as e:
+                self.put(key, (type(e), e.args), is_error=True)
+                raise
+            self.put(key, result)
+            return result
+
+        return wrapper
@@ -0,0 +1,83 @@
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import GZipResponder, IdentityResponder
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Preferred first. Content types starlette's responders never compress
+# (text/event-stream) pass through untouched, so SSE streams stay live.
+ENCODINGS = ("zstd", "gzip") if zstandard is not None else ("gzip",)
+
+
+def negotiate(accept_encoding: str) -> str | None:
+    """
+    Picks the response encoding for an `Accept-Encoding` header.
+
+    The client's q-values decide; ties go to the server's preference
+    (zstd, then gzip). Returns None when nothing acceptable is supported.
+    """
+    weights: dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[name.strip().lower()] = q
+    wildcard = weights.get("*", 0.0)
+    best, best_q = None, 0.0
+    for encoding in ENCODINGS:
+        q = weights.get(encoding, wildcard)
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+class ZstdResponder(IdentityResponder):
+    content_encoding = "zstd"
+
+    def __init__(self, app, minimum_size: int, level: int = 3):
+        super().__init__(app, minimum_size)
+        self.compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def apply_compression(self, body: bytes, *, more_body: bool) -> bytes:
+        data = self.compressor.compress(body)
+        if more_body:
+            # Emit each chunk as it comes rather than holding it in the frame.
+            return data + self.compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+        return data + self.compressor.flush()
+
+
+class CompressionMiddleware:
+    """
+    Compresses responses with zstd (when installed) or gzip, negotiated via
+    `Accept-Encoding`.
+
+    Bodies under `minimum_size` bytes, responses that already carry a
+    `Content-Encoding` and SSE streams are sent as is.
+    """
+
+    def __init__(self, app, minimum_size: int = 1024, gzip_level: int = 6, zstd_level: int = 3):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.zstd_level = zstd_level
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate(Headers(scope=scope).get("Accept-Encoding", ""))
+        if encoding == "zstd":
+            responder = ZstdResponder(self.app, self.minimum_size, level=self.zstd_level)
+        elif encoding == "gzip":
+            responder = GZipResponder(self.app, self.minimum_size, compresslevel=self.gzip_level)
+        else:
+            responder = IdentityResponder(self.app, self.minimum_size)
+        await responder(scope, receive, send)
@@ -0,0 +1,92 @@
+import os
+import tempfile
+
+
+def _optional_int(name: str) -> int | None:
+    value = os.environ.get(name)
+    return int(value) if value else None
+
+
+def _optional_float(name: str) -> float | None:
+    value = os.environ.get(name)
+    return float(value) if value else None
+
+
+# Tool Execution Configuration
+# Unset worker counts fall back to the concurrent.futures defaults.
+TOOL_THREAD_WORKERS = _optional_int("TOOL_THREAD_WORKERS")
+TOOL_PROCESS_WORKERS = _optional_int("TOOL_PROCESS_WORKERS")
+# Default timeout (seconds) for thread/process pool tools; unset means no limit.
+TOOL_TIMEOUT = _optional_float("TOOL_TIMEOUT")
+
+# Result Cache Configuration (tools marked pure); 0 entries disables caching.
+TOOL_CACHE_MAX_ENTRIES = int(os.environ.get("TOOL_CACHE_MAX_ENTRIES", "4096"))
+TOOL_CACHE_MAX_BYTES = int(os.environ.get("TOOL_CACHE_MAX_BYTES", str(8 * 1024 * 1024)))
+
+# Admission Control Configuration
+# Per-subject token bucket: sustained requests/second and burst size (0 rate disables).
+ADMISSION_RATE = float(os.environ.get("ADMISSION_RATE", "20"))
+ADMISSION_BURST = int(os.environ.get("ADMISSION_BURST", "40"))
+# Global in-flight limit per worker and its bounded wait queue (0 disables the limit).
+ADMISSION_MAX_IN_FLIGHT = int(os.environ.get("ADMISSION_MAX_IN_FLIGHT", "64"))
+ADMISSION_MAX_QUEUE = int(os.environ.get("ADMISSION_MAX_QUEUE", "128"))
+ADMISSION_QUEUE_TIMEOUT = float(os.environ.get("ADMISSION_QUEUE_TIMEOUT", "5"))
+# Token bucket storage: "memory" (per worker) or "sqlite:<path>" (shared by workers on a host).
+ADMISSION_BACKEND = os.environ.get("ADMISSION_BACKEND", "memory")
+
+# Streamable HTTP Mode
+# Stateless (default): every request is independent and answered with JSON.
+# Stateful: MCP sessions are kept server-side and answered over SSE, with
+# Last-Event-ID resumption from a bounded in-memory event store (per worker,
+# so resumption needs sticky sessions).
+MCP_STATEFUL = os.environ.get("MCP_STATEFUL", "false").lower() in ("1", "true", "yes")
+# Stateless mode only: answer with JSON (default) or, when false, over SSE, which
+# also delivers progress notifications from chunked tools.
+MCP_JSON_RESPONSE = os.environ.get("MCP_JSON_RESPONSE", "true").lower() in ("1", "true", "yes")
+MCP_MAX_SESSIONS = int(os.environ.get("MCP_MAX_SESSIONS", "1000"))
+MCP_SESSION_IDLE_TIMEOUT = float(os.environ.get("MCP_SESSION_IDLE_TIMEOUT", "300"))
+MCP_EVENT_STORE_MAX_EVENTS = int(os.environ.get("MCP_EVENT_STORE_MAX_EVENTS", "10000"))
+# Reconnect delay (milliseconds) suggested to clients in SSE priming events.
+MCP_SSE_RETRY_MS = _optional_int("MCP_SSE_RETRY_MS")
+# Largest accepted /mcp/ request body; large binary arrays may need more than the 4 MiB default.
+MCP_MAX_REQUEST_BYTES = int(os.environ.get("MCP_MAX_REQUEST_BYTES", str(4 * 1024 * 1024)))
+
+# Response Compression
+# Responses are compressed with zstd (when zstandard is installed) or gzip,
+# as negotiated by Accept-Encoding. SSE streams and bodies under the minimum
+# size are sent uncompressed.
+COMPRESSION_ENABLED = os.environ.get("COMPRESSION_ENABLED", "true").lower() in ("1", "true", "yes")
+COMPRESSION_MINIMUM_SIZE = int(os.environ.get("COMPRESSION_MINIMUM_SIZE", "1024"))
+COMPRESSION_GZIP_LEVEL = int(os.environ.get("COMPRESSION_GZIP_LEVEL", "6"))
+COMPRESSION_ZSTD_LEVEL = int(os.environ.get("COMPRESSION_ZSTD_LEVEL", "3"))
+
+# On-demand Profiling
+# When enabled, a PROFILING_SAMPLE_RATE fraction of requests is profiled by a
+# stack sampler. Callers granted PROFILING_ADMIN_SCOPE can profile a request
+# with `X-Profile: 1` at any time (an empty scope disables the header) and
+# list profiles at /debug/profiles.
+PROFILING_ENABLED = os.environ.get("PROFILING_ENABLED", "false").lower() in ("1", "true", "yes")
+PROFILING_SAMPLE_RATE = float(os.environ.get("PROFILING_SAMPLE_RATE", "0.01"))
+PROFILING_INTERVAL = float(os.environ.get("PROFILING_INTERVAL", "0.005"))
+PROFILING_MAX_SECONDS = float(os.environ.get("PROFILING_MAX_SECONDS", "30"))
+PROFILING_DIR = os.environ.get("PROFILING_DIR", os.path.join(tempfile.gettempdir(), "mcp-calculator-profiles"))
+PROFILING_MAX_PROFILES = int(os.environ.get("PROFILING_MAX_PROFILES", "100"))
+PROFILING_ADMIN_SCOPE = os.environ.get("PROFILING_ADMIN_SCOPE", "profile:admin")
+
+# Logging
+# Records are written by a background thread; warnings and errors are limited
+# to LOG_RATE_LIMIT_BURST per LOG_RATE_LIMIT_INTERVAL seconds per message
+# template. ACCESS_LOG writes one JSON line per request to stdout.
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+LOG_RATE_LIMIT_BURST = int(os.environ.get("LOG_RATE_LIMIT_BURST", "10"))
+LOG_RATE_LIMIT_INTERVAL = float(os.environ.get("LOG_RATE_LIMIT_INTERVAL", "60"))
+ACCESS_LOG = os.environ.get("ACCESS_LOG", "true").lower() in ("1", "true", "yes")
+
+# Shared Cache
+# Verified tokens and the JWKS, shared by the workers using the same backend:
+# "memory" (per worker), "sqlite:<path>" (per host; /dev/shm keeps it in
+# memory) or "redis://[[user]:password@]host[:port][/db]". A TTL of 0 disables
+# caching that kind of entry.
+CACHE_BACKEND = os.environ.get("CACHE_BACKEND", "memory")
+AUTH_CACHE_TTL = float(os.environ.get("AUTH_CACHE_TTL", "300"))
+JWKS_CACHE_TTL = float(os.environ.get("JWKS_CACHE_TTL", "600"))
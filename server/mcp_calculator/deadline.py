@@ -0,0 +1,104 @@
+import math
+import time
+from contextvars import ContextVar
+
+import anyio
+from mcp.server.lowlevel.server import request_ctx
+from starlette.datastructures import Headers
+
+from mcp_calculator.responses import CodecJSONResponse
+
+# Seconds the caller is still willing to wait, as an HTTP header (MCPClient,
+# the invokers) or as a `_meta` key of the MCP request (pooled agent sessions,
+# whose HTTP headers are fixed per session).
+DEADLINE_HEADER = "X-Request-Timeout"
+DEADLINE_META_KEY = "x-request-timeout"
+
+# Absolute time.monotonic() deadline of the current HTTP request.
+_deadline: ContextVar[float | None] = ContextVar("deadline", default=None)
+
+
+def parse_timeout(value) -> float | None:
+    """Parses a relative timeout in seconds; None when missing or malformed."""
+    if value is None:
+        return None
+    try:
+        timeout = float(value)
+    except (TypeError, ValueError):
+        return None
+    return timeout if math.isfinite(timeout) else None
+
+
+def _meta_timeout() -> float | None:
+    try:
+        meta = request_ctx.get().meta
+    except LookupError:
+        return None
+    if meta is None or not meta.model_extra:
+        return None
+    return parse_timeout(meta.model_extra.get(DEADLINE_META_KEY))
+
+
+def remaining() -> float | None:
+    """
+    Seconds left before the current request's deadline, or None without one.
+
+    The `X-Request-Timeout` header counts from when the request arrived. A
+    `_meta` timeout counts from when it is read (the tool starting), and
+    only applies when it is tighter than the header.
+    """
+    deadline = _deadline.get()
+    header = None if deadline is None else deadline - time.monotonic()
+    meta = _meta_timeout()
+    if header is None or (meta is not None and meta < header):
+        return meta
+    return header
+
+
+class DeadlineMiddleware:
+    """
+    Bounds MCP requests by the caller's `X-Request-Timeout`.
+
+    A request whose deadline has already passed is answered with 504
+    straight away. Otherwise the deadline is made available to tools (see
+    `remaining`) and the request is cancelled when it passes, which drops
+    queued admission and pool work; a 504 is sent if no response has
+    started. Long-lived GET streams are not bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope.get("method") == "GET" or not scope["path"].startswith("/mcp/"):
+            await self.app(scope, receive, send)
+            return
+
+        timeout = parse_timeout(Headers(scope=scope).get(DEADLINE_HEADER))
+        if timeout is None:
+            await self.app(scope, receive, send)
+            return
+        if timeout <= 0:
+            await _deadline_exceeded()(scope, receive, send)
+            return
+
+        started = False
+
+        async def send_tracking(message):
+            nonlocal started
+            if message["type"] == "http.response.start":
+                started = True
+            await send(message)
+
+        token = _deadline.set(time.monotonic() + timeout)
+        try:
+            with anyio.move_on_after(timeout) as cancel_scope:
+                await self.app(scope, receive, send_tracking)
+        finally:
+            _deadline.reset(token)
+        if cancel_scope.cancelled_caught and not started:
+            await _deadline_exceeded()(scope, receive, send)
+
+
+def _deadline_exceeded() -> CodecJSONResponse:
+    return CodecJSONResponse({"error": "Deadline exceeded"}, status_code=504)
@@ -0,0 +1,52 @@
+from collections import OrderedDict
+from uuid import uuid4
+
+from mcp.server.streamable_http import EventCallback, EventId, EventMessage, EventStore, StreamId
+from mcp.types import JSONRPCMessage
+
+
+class MemoryEventStore(EventStore):
+    """
+    Bounded in-memory event store for resumable SSE streams.
+
+    Keeps the last `max_events` events across all streams in insertion
+    order; older events are dropped, so a client that reconnects after its
+    `Last-Event-ID` has been evicted gets no replay and must retry the call.
+    The store is per worker: resumption needs sticky sessions.
+    """
+
+    def __init__(self, max_events: int = 10_000):
+        self.max_events = max_events
+        self._events: OrderedDict[EventId, tuple[StreamId, JSONRPCMessage | None]] = OrderedDict()
+        self.evictions = 0
+        self.replays = 0
+
+    async def store_event(self, stream_id: StreamId, message: JSONRPCMessage | None) -> EventId:
+        event_id = uuid4().hex
+        self._events[event_id] = (stream_id, message)
+        while len(self._events) > self.max_events:
+            self._events.popitem(last=False)
+            self.evictions += 1
+        return event_id
+
+    async def replay_events_after(self, last_event_id: EventId, send_callback: EventCallback) -> StreamId | None:
+        if last_event_id not in self._events:
+            return None
+        stream_id, _ = self._events[last_event_id]
+        self.replays += 1
+        # Snapshot first: the callback may await while new events are stored.
+        events = list(self._events.items())
+        start = next(i for i, (event_id, _) in enumerate(events) if event_id == last_event_id)
+        for event_id, (event_stream, message) in events[start + 1:]:
+            # Priming events carry no message; they only mark a stream's start.
+            if event_stream == stream_id and message is not None:
+                await send_callback(EventMessage(message, event_id))
+        return stream_id
+
+    def snapshot(self) -> dict:
+        return {
+            "events": len(self._events),
+            "max_events": self.max_events,
+            "evictions": self.evictions,
+            "replays": self.replays,
+        }
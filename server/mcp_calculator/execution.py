@@ -0,0 +1,369 @@
+import asyncio
+import collections.abc
+import functools
+import inspect
+import logging
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from enum import Enum
+from typing import Any, Callable, Generator, get_args, get_origin
+
+from mcp.server.lowlevel.server import request_ctx
+
+from mcp_calculator import deadline
+from mcp_calculator.logs import stage
+
+logger = logging.getLogger(__name__)
+
+
+class ExecutionPolicy(str, Enum):
+    """Where a tool's function body runs."""
+
+    INLINE = "inline"
+    THREADPOOL = "threadpool"
+    PROCESSPOOL = "processpool"
+
+
+class ToolTimeoutError(TimeoutError):
+    """Raised when a pooled tool does not finish within its timeout."""
+    pass
+
+
+class DeadlineExceededError(ToolTimeoutError):
+    """Raised when a tool call's deadline (see `deadline.remaining`) has passed."""
+    pass
+
+
+@dataclass
+class Progress:
+    """Yielded by a chunked tool after each chunk: how far it has got."""
+
+    progress: float
+    total: float | None = None
+    message: str | None = None
+
+
+@dataclass
+class ToolStats:
+    calls: int = 0
+    errors: int = 0
+    timeouts: int = 0
+    cancelled: int = 0
+    queue_wait_total: float = 0.0
+    queue_wait_max: float = 0.0
+    run_time_total: float = 0.0
+    run_time_max: float = 0.0
+
+    def snapshot(self) -> dict:
+        completed = max(self.calls - self.timeouts - self.cancelled, 1)
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "cancelled": self.cancelled,
+            "queue_wait_avg_ms": self.queue_wait_total / completed * 1000,
+            "queue_wait_max_ms": self.queue_wait_max * 1000,
+            "run_time_avg_ms": self.run_time_total / completed * 1000,
+            "run_time_max_ms": self.run_time_max * 1000,
+        }
+
+
+class ToolMetrics:
+    """Per-tool call counters and queue-wait / run-time timings."""
+
+    def __init__(self):
+        self._stats: dict[str, ToolStats] = {}
+        self._lock = threading.Lock()
+
+    def record(self, name: str, outcome: str, queue_wait: float = 0.0, run_time: float = 0.0):
+        with self._lock:
+            stats = self._stats.setdefault(name, ToolStats())
+            stats.calls += 1
+            if outcome == "timeout":
+                stats.timeouts += 1
+                return
+            if outcome == "cancelled":
+                stats.cancelled += 1
+                return
+            if outcome == "error":
+                stats.errors += 1
+            stats.queue_wait_total += queue_wait
+            stats.queue_wait_max = max(stats.queue_wait_max, queue_wait)
+            stats.run_time_total += run_time
+            stats.run_time_max = max(stats.run_time_max, run_time)
+
+    def snapshot(self) -> dict[str, dict]:
+        with self._lock:
+            return {name: stats.snapshot() for name, stats in self._stats.items()}
+
+
+def _timed_call(fn: Callable, kwargs: dict) -> tuple[Any, Exception | None, float, float]:
+    # Runs inside the pool worker. Errors are returned rather than raised so
+    # the caller still gets the timings; time.monotonic() is system-wide on
+    # the platforms we deploy to, so stamps from worker processes compare.
+    started = time.monotonic()
+    try:
+        return fn(**kwargs), None, started, time.monotonic()
+    except Exception as e:
+        return None, e, started, time.monotonic()
+
+
+def _next_chunk(chunks: Generator) -> tuple[bool, Any, float, float]:
+    # Runs one chunk of a chunked tool inside the pool worker; returns
+    # whether the tool finished, its progress or result, and the timings.
+    started = time.monotonic()
+    try:
+        progress = next(chunks)
+    except StopIteration as stop:
+        return True, stop.value, started, time.monotonic()
+    return False, progress, started, time.monotonic()
+
+
+async def report_progress(progress: Progress):
+    """Sends an MCP progress notification, if the current request asked for them."""
+    try:
+        ctx = request_ctx.get()
+    except LookupError:
+        return
+    token = ctx.meta.progressToken if ctx.meta else None
+    if token is None:
+        return
+    await ctx.session.send_progress_notification(
+        progress_token=token,
+        progress=progress.progress,
+        total=progress.total,
+        message=progress.message,
+        related_request_id=str(ctx.request_id),
+    )
+
+
+class ToolExecutor:
+    """
+    Runs tool functions according to their declared ExecutionPolicy.
+
+    The thread and process pools are shared by all tools and are created in
+    the application lifespan (see `lifespan`), or on first use outside it.
+    After `shutdown` they are not recreated until `start` is called again;
+    pooled calls raise RuntimeError until then. A timeout or a cancelled
+    request (e.g. the client disconnected) drops work that is still queued;
+    work already running in a worker cannot be interrupted and finishes in
+    the background.
+
+    Tools written as generators run in chunks on the thread pool: each
+    `yield Progress(...)` ends a chunk, is sent to the client as an MCP
+    progress notification, and the generator's return value is the
+    result. Between chunks the call's timeout and deadline are checked and
+    a cancelled request stops, so an abandoned call wastes one chunk at most.
+    """
+
+    def __init__(
+        self,
+        thread_workers: int | None = None,
+        process_workers: int | None = None,
+        default_timeout: float | None = None,
+    ):
+        self.thread_workers = thread_workers
+        self.process_workers = process_workers
+        self.default_timeout = default_timeout
+        self.metrics = ToolMetrics()
+        self._thread_pool: ThreadPoolExecutor | None = None
+        self._process_pool: ProcessPoolExecutor | None = None
+        self._shut_down = False
+        self._lock = threading.Lock()
+
+    def _create_pools(self):
+        # Called with the lock held.
+        if self._thread_pool is None:
+            self._thread_pool = ThreadPoolExecutor(
+                max_workers=self.thread_workers, thread_name_prefix="mcp-tool"
+            )
+        if self._process_pool is None:
+            self._process_pool = ProcessPoolExecutor(max_workers=self.process_workers)
+
+    def start(self):
+        with self._lock:
+            self._shut_down = False
+            self._create_pools()
+
+    def shutdown(self):
+        with self._lock:
+            self._shut_down = True
+            thread_pool, self._thread_pool = self._thread_pool, None
+            process_pool, self._process_pool = self._process_pool, None
+        if thread_pool is not None:
+            thread_pool.shutdown(wait=False, cancel_futures=True)
+        if process_pool is not None:
+            process_pool.shutdown(wait=False, cancel_futures=True)
+
+    @asynccontextmanager
+    async def lifespan(self):
+        self.start()
+        logger.info(
+            "Tool executors started (threads=%s, processes=%s)",
+            self.thread_workers or "default",
+            self.process_workers or "default",
+        )
+        try:
+            yield self
+        finally:
+            self.shutdown()
+
+    def _pool(self, policy: ExecutionPolicy):
+        with self._lock:
+            if self._shut_down:
+                raise RuntimeError("Tool executor is shut down")
+            # Tools called outside the app lifespan (scripts, tests) still work.
+            self._create_pools()
+            if policy is ExecutionPolicy.PROCESSPOOL:
+                return self._process_pool
+            return self._thread_pool
+
+    async def run(
+        self,
+        name: str,
+        fn: Callable,
+        kwargs: dict,
+        policy: ExecutionPolicy = ExecutionPolicy.INLINE,
+        timeout: float | None = None,
+    ) -> Any:
+        """
+        Runs `fn(**kwargs)` under `policy` and records metrics for `name`.
+
+        A caller deadline shorter than `timeout` replaces it, and a call
+        whose deadline has already passed is not run at all. The time taken,
+        pool queueing included, counts as the request's `tool` stage.
+        """
+        with stage("tool"):
+            if inspect.isgeneratorfunction(fn):
+                return await self._run_chunked(name, fn, kwargs, timeout)
+            return await self._run(name, fn, kwargs, policy, timeout)
+
+    async def _run(
+        self, name: str, fn: Callable, kwargs: dict, policy: ExecutionPolicy, timeout: float | None
+    ) -> Any:
+        budget = deadline.remaining()
+        if budget is not None and budget <= 0:
+            self.metrics.record(name, "timeout")
+            raise DeadlineExceededError(f"Tool '{name}' deadline exceeded before it started")
+
+        if policy is ExecutionPolicy.INLINE:
+            started = time.monotonic()
+            try:
+                result = fn(**kwargs)
+            except Exception:
+                self.metrics.record(name, "error", run_time=time.monotonic() - started)
+                raise
+            self.metrics.record(name, "ok", run_time=time.monotonic() - started)
+            return result
+
+        timeout = timeout if timeout is not None else self.default_timeout
+        expires = budget is not None and (timeout is None or budget < timeout)
+        if expires:
+            timeout = budget
+        loop = asyncio.get_running_loop()
+        submitted = time.monotonic()
+        # Cancelling the asyncio future (timeout or request cancellation)
+        # cancels the pool future too, so queued work never starts.
+        future = loop.run_in_executor(
+            self._pool(policy), functools.partial(_timed_call, fn, kwargs)
+        )
+        try:
+            result, error, started, finished = await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            self.metrics.record(name, "timeout")
+            if expires:
+                raise DeadlineExceededError(f"Tool '{name}' deadline exceeded after {timeout:.3f}s")
+            raise ToolTimeoutError(f"Tool '{name}' timed out after {timeout}s")
+        except asyncio.CancelledError:
+            self.metrics.record(name, "cancelled")
+            raise
+
+        self.metrics.record(
+            name,
+            "error" if error else "ok",
+            queue_wait=max(started - submitted, 0.0),
+            run_time=finished - started,
+        )
+        if error is not None:
+            raise error
+        return result
+
+    async def _run_chunked(self, name: str, fn: Callable, kwargs: dict, timeout: float | None) -> Any:
+        budget = deadline.remaining()
+        if budget is not None and budget <= 0:
+            self.metrics.record(name, "timeout")
+            raise DeadlineExceededError(f"Tool '{name}' deadline exceeded before it started")
+
+        timeout = timeout if timeout is not None else self.default_timeout
+        expires = budget is not None and (timeout is None or budget < timeout)
+        if expires:
+            timeout = budget
+        loop = asyncio.get_running_loop()
+        pool = self._pool(ExecutionPolicy.THREADPOOL)
+        chunks = fn(**kwargs)
+        submitted = time.monotonic()
+        first_started = None
+        run_time = 0.0
+        try:
+            async with asyncio.timeout(timeout):
+                while True:
+                    done, value, started, finished = await loop.run_in_executor(pool, _next_chunk, chunks)
+                    first_started = first_started or started
+                    run_time += finished - started
+                    if done:
+                        break
+                    await report_progress(value)
+        except TimeoutError:
+            self.metrics.record(name, "timeout")
+            if expires:
+                raise DeadlineExceededError(f"Tool '{name}' deadline exceeded after {timeout:.3f}s") from None
+            raise ToolTimeoutError(f"Tool '{name}' timed out after {timeout}s") from None
+        except asyncio.CancelledError:
+            self.metrics.record(name, "cancelled")
+            raise
+        except Exception:
+            self.metrics.record(name, "error", run_time=run_time)
+            raise
+
+        self.metrics.record(
+            name, "ok", queue_wait=max(first_started - submitted, 0.0), run_time=run_time
+        )
+        return value
+
+    def policy(self, policy: ExecutionPolicy, timeout: float | None = None):
+        """
+        Decorator declaring how a tool runs.
+
+        Apply it below `@mcp.tool()`; the wrapped function keeps the original
+        signature and docstring so FastMCP derives the same schema. Process
+        pool functions are pickled by reference and must be defined at module
+        level. Chunked tools (generators) run on the thread pool and are
+        annotated `-> Generator[Progress, None, T]`; FastMCP sees `-> T`.
+        """
+        policy = ExecutionPolicy(policy)
+
+        def decorator(fn: Callable) -> Callable:
+            if policy is ExecutionPolicy.PROCESSPOOL and "<locals>" in fn.__qualname__:
+                raise ValueError(
+                    f"Tool '{fn.__name__}' uses the process pool and must be a module-level function"
+                )
+
+            if inspect.isgeneratorfunction(fn) and policy is not ExecutionPolicy.THREADPOOL:
+                raise ValueError(f"Chunked tool '{fn.__name__}' must use the thread pool")
+
+            @functools.wraps(fn)
+            async def wrapper(**kwargs):
+                return await self.run(fn.__name__, fn, kwargs, policy=policy, timeout=timeout)
+
+            if inspect.isgeneratorfunction(fn):
+                signature = inspect.signature(fn, eval_str=True)
+                returns = signature.return_annotation
+                if get_origin(returns) is collections.abc.Generator:
+                    wrapper.__signature__ = signature.replace(return_annotation=get_args(returns)[2])
+            wrapper.execution_policy = policy
+            return wrapper
+
+        return decorator
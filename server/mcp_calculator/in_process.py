@@ -0,0 +1,130 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+
+import anyio
+from anyio.streams.memory import MemoryObjectReceiveStream, MemoryObjectSendStream
+from mcp import types
+from mcp.server.auth.middleware.auth_context import auth_context_var
+from mcp.server.auth.middleware.bearer_auth import AuthenticatedUser
+from mcp.server.fastmcp import FastMCP
+from mcp.shared.exceptions import McpError
+from mcp.shared.message import SessionMessage
+
+from mcp_calculator.admission import AdmissionController
+from mcp_calculator.auth import TokenVerifier, access_token
+from mcp_calculator.logs import stage
+
+# Verified claims of the in-process session the current request arrived on.
+_claims: ContextVar[dict | None] = ContextVar("in_process_claims", default=None)
+
+
+def _error(code: int, message: str) -> McpError:
+    return McpError(types.ErrorData(code=code, message=message))
+
+
+class InProcessTransport:
+    """
+    Serves MCP sessions to clients in the same process over memory streams.
+
+    Meant for an agent running next to the server (a sidecar): tool calls
+    skip sockets, HTTP and JSON encoding, and the bearer token is verified
+    once when a session opens instead of on every request. Auth still holds
+    for the session's claims:
+
+    - opening a session needs a valid token, and tool calls are refused with
+      error 401 once it has expired;
+    - tools see the caller as they do over HTTP (`get_access_token()`);
+    - each tool call takes a token from its subject's bucket and an
+      in-flight slot, as HTTP requests do in `AdmissionMiddleware`, and is
+      refused with error 429 when either is unavailable.
+
+    Deadlines sent in a call's `_meta` apply as over HTTP. The HTTP-only
+    middleware (compression, access logs, profiling) does not run.
+    """
+
+    def __init__(self, server: FastMCP, verifier: TokenVerifier, admission: AdmissionController):
+        self.server = server
+        self.verifier = verifier
+        self.admission = admission
+        self.sessions = 0
+        self.opened = 0
+
+        # Calls on HTTP sessions were admitted by the middleware already.
+        lowlevel = server._mcp_server
+        call_tool = lowlevel.request_handlers[types.CallToolRequest]
+
+        async def admitted_call_tool(request: types.CallToolRequest):
+            claims = _claims.get()
+            if claims is None:
+                return await call_tool(request)
+            async with self._admit(claims):
+                return await call_tool(request)
+
+        lowlevel.request_handlers[types.CallToolRequest] = admitted_call_tool
+
+    @asynccontextmanager
+    async def _admit(self, claims: dict):
+        expires_at = claims.get("exp")
+        if expires_at is not None and expires_at <= time.time():
+            raise _error(401, "Token expired")
+
+        controller = self.admission
+        if await controller.check_rate(claims.get("sub") or "anonymous") > 0:
+            controller.rejected_rate += 1
+            raise _error(429, "Rate limit exceeded")
+        with stage("admission"):
+            acquired = await controller.limiter.acquire()
+        if not acquired:
+            controller.rejected_queue += 1
+            raise _error(429, "Server overloaded")
+
+        controller.admitted += 1
+        try:
+            yield
+        finally:
+            controller.limiter.release()
+
+    async def _serve(
+        self,
+        token: str,
+        claims: dict,
+        read_stream: MemoryObjectReceiveStream[SessionMessage | Exception],
+        write_stream: MemoryObjectSendStream[SessionMessage],
+    ):
+        # Request handlers run in tasks started by `run`, so they see both.
+        _claims.set(claims)
+        auth_context_var.set(AuthenticatedUser(access_token(token, claims)))
+        lowlevel = self.server._mcp_server
+        await lowlevel.run(read_stream, write_stream, lowlevel.create_initialization_options())
+
+    @asynccontextmanager
+    async def connect(self, headers: dict[str, str] | None = None):
+        """
+        Opens a session for the caller whose bearer token is in `headers`
+        (an `Authorization` header) and yields the client's read and write
+        streams, for an MCP `ClientSession`.
+
+        Raises ValueError when the token is missing or invalid.
+        """
+        headers = {name.lower(): value for name, value in (headers or {}).items()}
+        token, claims = await self.verifier.authenticate_header(headers.get("authorization"))
+
+        client_send, server_receive = anyio.create_memory_object_stream[SessionMessage | Exception](1)
+        server_send, client_receive = anyio.create_memory_object_stream[SessionMessage | Exception](1)
+        async with client_send, server_receive, server_send, client_receive:
+            # A task rather than a task group: ADK enters and exits client
+            # connections in different tasks (asyncio.wait_for before 3.12).
+            task = asyncio.create_task(self._serve(token, claims, server_receive, server_send))
+            self.sessions += 1
+            self.opened += 1
+            try:
+                yield client_receive, client_send
+            finally:
+                self.sessions -= 1
+                task.cancel()
+                await asyncio.wait([task])
+
+    def snapshot(self) -> dict:
+        return {"sessions": self.sessions, "opened": self.opened}
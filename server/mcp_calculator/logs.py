@@ -0,0 +1,180 @@
+# Copied from common/logs.py by common/sync.py; edit that file instead.
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# "<package>.access", e.g. mcp_calculator.access
+ACCESS_LOGGER = f"{__package__}.access"
+access_logger = logging.getLogger(ACCESS_LOGGER)
+
+# Milliseconds spent per stage by the current HTTP request.
+_stages: ContextVar[dict | None] = ContextVar("stages", default=None)
+
+_listener: logging.handlers.QueueListener | None = None
+
+
+@contextmanager
+def stage(name: str):
+    """
+    Adds the time spent in the block to the current request's `name` stage.
+
+    Stages that run concurrently within one request (e.g. several tool
+    calls) add up, so their sum can exceed the request's duration.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings = _stages.get()
+        if timings is not None:
+            timings[name] = timings.get(name, 0.0) + (time.perf_counter() - started) * 1000
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Lets through at most `burst` records per `interval` seconds for each
+    logger, level and message template; records below WARNING always pass.
+
+    Log calls with arguments (`logger.error("... %s", e)`) share a template,
+    so an error storm (e.g. a flood of expired tokens) is logged a few times
+    per interval. The first record let through after a drop says how many
+    similar ones were dropped.
+    """
+
+    def __init__(self, burst: int = 10, interval: float = 60.0, max_keys: int = 10_000):
+        super().__init__()
+        self.burst = burst
+        self.interval = interval
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        # (logger, level, template) -> [window start, let through, dropped]
+        self._windows: dict[tuple, list] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno < logging.WARNING or self.burst <= 0:
+            return True
+        key = (record.name, record.levelno, str(record.msg))
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.interval:
+                dropped = window[2] if window is not None else 0
+                if window is None and len(self._windows) >= self.max_keys:
+                    self._windows = {k: w for k, w in self._windows.items() if now - w[0] < self.interval}
+                window = self._windows[key] = [now, 0, 0]
+                if dropped:
+                    record.msg = f"{record.msg} ({dropped} similar messages dropped)"
+            if window[1] >= self.burst:
+                window[2] += 1
+                return False
+            window[1] += 1
+            return True
+
+
+class AccessFormatter(logging.Formatter):
+    """Formats access log records as one JSON object per line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        return json.dumps({"time": round(record.created, 3), **record.access}, separators=(",", ":"))
+
+
+def configure_logging(level: int | str = logging.INFO, burst: int = 10, interval: float = 60.0):
+    """
+    Sends log records through a queue to a background listener thread.
+
+    Handlers that write to stderr and stdout run on the listener thread, so
+    logging never blocks the event loop on I/O. Warnings and errors are
+    rate limited per message template (see `RateLimitFilter`). Access log
+    records go to stdout as JSON lines, everything else to stderr. Replaces
+    the root logger's handlers (frameworks such as FastMCP install their
+    own); does nothing when already configured.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.addFilter(RateLimitFilter(burst=burst, interval=interval))
+
+    text_handler = logging.StreamHandler(sys.stderr)
+    text_handler.setFormatter(logging.Formatter(logging.BASIC_FORMAT))
+    text_handler.addFilter(lambda record: record.name != ACCESS_LOGGER)
+    access_handler = logging.StreamHandler(sys.stdout)
+    access_handler.setFormatter(AccessFormatter())
+    access_handler.addFilter(lambda record: record.name == ACCESS_LOGGER)
+
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.setLevel(level)
+    root.addHandler(queue_handler)
+    access_logger.setLevel(logging.INFO)
+
+    _listener = logging.handlers.QueueListener(log_queue, text_handler, access_handler)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+
+class AccessLogMiddleware:
+    """
+    Logs one access record per HTTP request: method, path, status, response
+    size, duration, the caller's JWT subject and the time spent per stage
+    (see `stage`), in milliseconds.
+
+    Runs outermost, so the duration covers every other middleware.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = None
+        size = 0
+
+        async def send_logging(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        timings = {}
+        token = _stages.set(timings)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_logging)
+        finally:
+            _stages.reset(token)
+            claims = scope.get("state", {}).get("claims") or {}
+            client = scope.get("client")
+            access_logger.info(
+                "%s %s %s",
+                scope["method"],
+                scope["path"],
+                status,
+                extra={
+                    "access": {
+                        "method": scope["method"],
+                        "path": scope["path"],
+                        "status": status or 500,
+                        "bytes": size,
+                        "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+                        "subject": claims.get("sub"),
+                        "client": client[0] if client else None,
+                        "stages": {name: round(ms, 2) for name, ms in timings.items()},
+                    }
+                },
+            )
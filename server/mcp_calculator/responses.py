@@ -0,0 +1,12 @@
+from typing import Any
+
+from starlette.responses import JSONResponse
+
+from mcp_calculator import codec
+
+
+class CodecJSONResponse(JSONResponse):
+    """JSONResponse rendered with the selected codec (see `codec`)."""
+
+    def render(self, content: Any) -> bytes:
+        return codec.dumps(content)
@@ -0,0 +1,5 @@
+from mcp.types import ToolAnnotations
+
+# Annotations for tools without side effects. Clients may retry or hedge
+# (send duplicate) calls to these.
+PURE_TOOL = ToolAnnotations(readOnlyHint=True, idempotentHint=True)
@@ -0,0 +1,31 @@
+import numpy as np
+from mcp.server.fastmcp import FastMCP
+from mcp_calculator.array_encoding import ArrayResult, NumericArray, array_result, is_binary, to_numpy
+from mcp_calculator.execution import ExecutionPolicy, ToolExecutor
+from mcp_calculator.tools import PURE_TOOL
+
+
+def register_array_tools(mcp: FastMCP, executor: ToolExecutor | None = None):
+    executor = executor or ToolExecutor()
+    # numpy releases the GIL for large arrays, so these run on the thread pool.
+
+    @mcp.tool(annotations=PURE_TOOL)
+    @executor.policy(ExecutionPolicy.THREADPOOL)
+    def array_sum(values: NumericArray) -> float:
+        """Sum all elements of an array."""
+        return float(to_numpy(values).sum())
+
+    @mcp.tool(annotations=PURE_TOOL)
+    @executor.policy(ExecutionPolicy.THREADPOOL)
+    def array_scale(values: NumericArray, factor: float) -> ArrayResult:
+        """Multiply every element of an array by factor."""
+        return array_result(to_numpy(values) * factor, binary=is_binary(values))
+
+    @mcp.tool(annotations=PURE_TOOL)
+    @executor.policy(ExecutionPolicy.THREADPOOL)
+    def array_add(a: NumericArray, b: NumericArray) -> ArrayResult:
+        """Add two arrays of the same shape element by element."""
+        left, right = to_numpy(a), to_numpy(b)
+        if left.shape != right.shape:
+            raise ValueError(f"Shapes differ: {list(left.shape)} and {list(right.shape)}")
+        return array_result(np.add(left, right), binary=is_binary(a, b))
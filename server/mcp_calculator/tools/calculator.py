@@ -1,22 +1,38 @@
 from mcp.server.fastmcp import FastMCP
+from mcp_calculator.cache import ResultCache
+from mcp_calculator.execution import ExecutionPolicy, ToolExecutor
+from mcp_calculator.tools import PURE_TOOL
 
-def register_calculator_tools(mcp: FastMCP):
-    @mcp.tool()
+def register_calculator_tools(
+    mcp: FastMCP,
+    executor: ToolExecutor | None = None,
+    cache: ResultCache | None = None,
+):
+    executor = executor or ToolExecutor()
+    # `cache.pure` is for tools whose work outweighs a cache lookup; the
+    # arithmetic tools below are cheaper than canonicalizing their arguments.
+    cache = cache or ResultCache(max_entries=0)
+
+    @mcp.tool(annotations=PURE_TOOL)
+    @executor.policy(ExecutionPolicy.INLINE)
     def add(a: float, b: float) -> float:
         """Add two numbers."""
         return a + b
 
-    @mcp.tool()
+    @mcp.tool(annotations=PURE_TOOL)
+    @executor.policy(ExecutionPolicy.INLINE)
     def subtract(a: float, b: float) -> float:
         """Subtract b from a."""
         return a - b
 
-    @mcp.tool()
+    @mcp.tool(annotations=PURE_TOOL)
+    @executor.policy(ExecutionPolicy.INLINE)
     def multiply(a: float, b: float) -> float:
         """Multiply two numbers."""
         return a * b
 
-    @mcp.tool()
+    @mcp.tool(annotations=PURE_TOOL)
+    @executor.policy(ExecutionPolicy.INLINE)
     def divide(a: float, b: float) -> float:
         """Divide a by b."""
         if b == 0:
@@ -0,0 +1,61 @@
+import math
+from typing import Generator
+
+import numpy as np
+from mcp.server.fastmcp import FastMCP
+from mcp_calculator.cache import ResultCache
+from mcp_calculator.execution import ExecutionPolicy, Progress, ToolExecutor
+from mcp_calculator.tools import PURE_TOOL
+
+# Largest n accepted by prime_count; 10^9 takes about ten seconds.
+PRIME_COUNT_MAX = 10**10
+# Numbers sieved per chunk: a few tens of milliseconds of work.
+SIEVE_CHUNK = 1 << 23
+
+
+def _small_primes(limit: int) -> np.ndarray:
+    """The primes up to `limit`."""
+    sieve = np.ones(limit + 1, dtype=bool)
+    sieve[:2] = False
+    for p in range(2, math.isqrt(limit) + 1):
+        if sieve[p]:
+            sieve[p * p :: p] = False
+    return np.flatnonzero(sieve)
+
+
+def count_primes(n: int, chunk: int = SIEVE_CHUNK) -> Generator[Progress, None, int]:
+    """Counts the primes up to n with a segmented sieve, one segment per chunk."""
+    if n > PRIME_COUNT_MAX:
+        raise ValueError(f"n must be at most {PRIME_COUNT_MAX}")
+    if n < 2:
+        return 0
+    base = _small_primes(math.isqrt(n)).tolist()
+    count = 0
+    for low in range(0, n + 1, chunk):
+        high = min(low + chunk, n + 1)
+        segment = np.ones(high - low, dtype=bool)
+        segment[: max(0, 2 - low)] = False
+        for p in base:
+            if p * p >= high:
+                break
+            start = max(p * p, -(-low // p) * p)
+            segment[start - low :: p] = False
+        count += int(np.count_nonzero(segment))
+        yield Progress(high - 1, n, f"{count} primes up to {high - 1}")
+    return count
+
+
+def register_number_theory_tools(
+    mcp: FastMCP,
+    executor: ToolExecutor | None = None,
+    cache: ResultCache | None = None,
+):
+    executor = executor or ToolExecutor()
+    cache = cache or ResultCache(max_entries=0)
+
+    @mcp.tool(annotations=PURE_TOOL)
+    @cache.pure
+    @executor.policy(ExecutionPolicy.THREADPOOL)
+    def prime_count(n: int) -> Generator[Progress, None, int]:
+        """Count the prime numbers up to n (at most 10^10). Reports progress."""
+        return (yield from count_primes(n))
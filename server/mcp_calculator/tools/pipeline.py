@@ -0,0 +1,207 @@
+import asyncio
+import graphlib
+from collections import Counter
+from typing import Annotated, Literal
+
+import numpy as np
+from mcp.server.fastmcp import FastMCP
+from mcp.types import CallToolResult, TextContent
+from pydantic import BaseModel, Field
+
+from mcp_calculator import codec, deadline
+from mcp_calculator.array_encoding import BinaryArray, NumericArray, from_numpy, is_binary, to_numpy
+from mcp_calculator.execution import DeadlineExceededError, ExecutionPolicy, ToolExecutor
+from mcp_calculator.tools import PURE_TOOL
+
+# Largest pipeline accepted in one call.
+PIPELINE_MAX_STEPS = 256
+# Array steps with fewer elements run inline: a thread pool handoff costs
+# more than the arithmetic.
+POOLED_MIN_SIZE = 1 << 16
+
+_BINARY_OPS = {"add": np.add, "subtract": np.subtract, "multiply": np.multiply, "divide": np.divide}
+_ARITY = {**dict.fromkeys(_BINARY_OPS, 2), "sum": 1}
+
+
+class PipelineStep(BaseModel):
+    """One operation of a pipeline, whose result later steps use by `name`."""
+
+    name: str = Field(pattern=r"^[A-Za-z_][A-Za-z0-9_]*$", max_length=64)
+    op: Literal["add", "subtract", "multiply", "divide", "sum"] = Field(
+        description="add, subtract, multiply and divide take two operands (element-wise for arrays); "
+        "sum takes one and adds up its elements"
+    )
+    args: list[float | str | NumericArray] = Field(
+        description="Operands: numbers, arrays, or the names of other steps"
+    )
+
+
+# The return annotation of `pipeline`: a CallToolResult whose structured
+# content maps each step's name to its value (see `pipeline_result`).
+PipelineResult = Annotated[CallToolResult, dict[str, float | NumericArray]]
+
+
+def plan(steps: list[PipelineStep]) -> graphlib.TopologicalSorter:
+    """
+    Validates a pipeline and returns its steps' dependency graph, prepared.
+
+    Steps may be listed in any order; a step depends on the steps it
+    names. Raises ValueError for duplicate or unknown names, wrong operand
+    counts and cycles.
+    """
+    if not steps:
+        raise ValueError("A pipeline needs at least one step")
+    if len(steps) > PIPELINE_MAX_STEPS:
+        raise ValueError(f"A pipeline has at most {PIPELINE_MAX_STEPS} steps")
+    counts = Counter(step.name for step in steps)
+    duplicates = sorted(name for name, count in counts.items() if count > 1)
+    if duplicates:
+        raise ValueError(f"Duplicate step names: {', '.join(duplicates)}")
+
+    graph = graphlib.TopologicalSorter()
+    for step in steps:
+        if len(step.args) != _ARITY[step.op]:
+            raise ValueError(
+                f"Step '{step.name}': {step.op} takes {_ARITY[step.op]} operands, got {len(step.args)}"
+            )
+        references = [arg for arg in step.args if isinstance(arg, str)]
+        for reference in references:
+            if reference not in counts:
+                raise ValueError(f"Step '{step.name}' refers to unknown step '{reference}'")
+        graph.add(step.name, *references)
+    try:
+        graph.prepare()
+    except graphlib.CycleError as e:
+        raise ValueError(f"Steps form a cycle: {' -> '.join(e.args[1])}") from None
+    return graph
+
+
+def _check_finite(value: np.ndarray):
+    # Overflow gives inf (and inf - inf NaN), which JSON cannot carry.
+    if not np.isfinite(value).all():
+        raise ValueError("Result is not a finite number")
+
+
+def apply(op: str, operands: list[np.ndarray]) -> np.ndarray:
+    """
+    Evaluates one operation; binary operations take equal shapes or a
+    scalar. Raises ValueError for a zero divisor or a non-finite result.
+    """
+    with np.errstate(over="ignore", invalid="ignore"):
+        if op == "sum":
+            result = np.asarray(operands[0].sum())
+        else:
+            left, right = operands
+            if left.ndim and right.ndim and left.shape != right.shape:
+                raise ValueError(f"Shapes differ: {list(left.shape)} and {list(right.shape)}")
+            if op == "divide" and np.any(right == 0):
+                raise ValueError("Cannot divide by zero")
+            result = _BINARY_OPS[op](left, right)
+    _check_finite(result)
+    return result
+
+
+def _apply_step(name: str, op: str, operands: list[np.ndarray]) -> np.ndarray:
+    try:
+        return apply(op, operands)
+    except ValueError as e:
+        raise ValueError(f"Step '{name}': {e}") from None
+
+
+async def run_pipeline(steps: list[PipelineStep], executor: ToolExecutor) -> dict[str, np.ndarray]:
+    """
+    Runs a pipeline and returns every step's value (0-d arrays for scalars).
+
+    Each round takes all the steps whose operands are ready, i.e. the
+    independent branches at that point. Scalar steps of a round sharing an
+    operation are evaluated as one vectorized numpy call. Large array steps
+    run concurrently on the executor's thread pool (numpy releases the GIL)
+    and are listed in its metrics as `pipeline.<op>`. The caller's deadline
+    is checked between rounds.
+    """
+    graph = plan(steps)
+    by_name = {step.name: step for step in steps}
+    values: dict[str, np.ndarray] = {}
+
+    def operands(step: PipelineStep) -> list[np.ndarray]:
+        return [values[arg] if isinstance(arg, str) else to_numpy(arg) for arg in step.args]
+
+    while graph.is_active():
+        budget = deadline.remaining()
+        if budget is not None and budget <= 0:
+            raise DeadlineExceededError("Tool 'pipeline' deadline exceeded")
+        ready = [by_name[name] for name in graph.get_ready()]
+        scalar: dict[str, list[tuple[PipelineStep, list[np.ndarray]]]] = {}
+        pooled = []
+        for step in ready:
+            args = operands(step)
+            if all(arg.ndim == 0 for arg in args):
+                scalar.setdefault(step.op, []).append((step, args))
+            elif max(arg.size for arg in args) < POOLED_MIN_SIZE:
+                values[step.name] = _apply_step(step.name, step.op, args)
+            else:
+                pooled.append((step, args))
+
+        for op, group in scalar.items():
+            if op == "divide":
+                for step, args in group:
+                    if args[1] == 0:
+                        raise ValueError(f"Step '{step.name}': Cannot divide by zero")
+            # Column i holds every step's i-th operand.
+            rows = [args for _, args in group]
+            columns = [np.array(column, dtype=np.result_type(*column)) for column in zip(*rows)]
+            with np.errstate(over="ignore", invalid="ignore"):
+                results = columns[0] if op == "sum" else _BINARY_OPS[op](*columns)
+            for (step, _), result in zip(group, results):
+                if not np.isfinite(result):
+                    raise ValueError(f"Step '{step.name}': Result is not a finite number")
+                values[step.name] = np.asarray(result)
+
+        results = await asyncio.gather(
+            *(
+                executor.run(
+                    f"pipeline.{step.op}",
+                    _apply_step,
+                    {"name": step.name, "op": step.op, "operands": args},
+                    policy=ExecutionPolicy.THREADPOOL,
+                )
+                for step, args in pooled
+            )
+        )
+        for (step, _), result in zip(pooled, results):
+            values[step.name] = result
+        graph.done(*(step.name for step in ready))
+
+    return {step.name: values[step.name] for step in steps}
+
+
+def pipeline_result(values: dict[str, np.ndarray], binary: bool) -> CallToolResult:
+    """
+    Builds the result of `pipeline`: scalars as numbers, arrays encoded as
+    in `array_result`, with binary arrays summarized in the text.
+    """
+    structured, summary = {}, {}
+    for name, value in values.items():
+        wire = float(value) if value.ndim == 0 else from_numpy(value, binary)
+        if isinstance(wire, BinaryArray):
+            structured[name] = wire.model_dump()
+            summary[name] = f"{wire.dtype} array of shape {wire.shape} (binary, see structured content)"
+        else:
+            structured[name] = summary[name] = wire
+    text = codec.dumps(summary).decode()
+    return CallToolResult(content=[TextContent(type="text", text=text)], structuredContent=structured)
+
+
+def register_pipeline_tools(mcp: FastMCP, executor: ToolExecutor | None = None):
+    executor = executor or ToolExecutor()
+
+    @mcp.tool(annotations=PURE_TOOL)
+    async def pipeline(steps: list[PipelineStep]) -> PipelineResult:
+        """
+        Run several dependent calculations in one call. Each step applies an
+        operation to numbers, arrays or the results of other steps (by name),
+        e.g. [{"name": "t1", "op": "multiply", "args": [3, 4]},
+        {"name": "t2", "op": "add", "args": ["t1", 5]}]. Returns every step's value.
+        """
+        binary = is_binary(*(arg for step in steps for arg in step.args))
+        return pipeline_result(await run_pipeline(steps, executor), binary)
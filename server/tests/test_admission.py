@@ -0,0 +1,94 @@
+import asyncio
+
+import pytest
+
+from mcp_calculator.admission import (
+    AdmissionController,
+    AdmissionMiddleware,
+    ConcurrencyLimiter,
+    InMemoryRateLimitBackend,
+    SQLiteRateLimitBackend,
+)
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_allows_burst_then_limits():
+    backend = InMemoryRateLimitBackend()
+    results = [await backend.take("alice", rate=1.0, burst=3) for _ in range(4)]
+    assert results[:3] == [0.0, 0.0, 0.0]
+    assert 0 < results[3] <= 1.0
+    # Buckets are per subject
+    assert await backend.take("bob", rate=1.0, burst=3) == 0.0
+
+
+@pytest.mark.asyncio
+async def test_sqlite_backend_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / "buckets.db")
+    first, second = SQLiteRateLimitBackend(path), SQLiteRateLimitBackend(path)
+    assert await first.take("alice", rate=0.1, burst=2) == 0.0
+    assert await second.take("alice", rate=0.1, burst=2) == 0.0
+    assert await first.take("alice", rate=0.1, burst=2) > 0
+
+
+@pytest.mark.asyncio
+async def test_sqlite_backend_prunes_refilled_buckets(tmp_path):
+    backend = SQLiteRateLimitBackend(str(tmp_path / "buckets.db"), prune_interval=0)
+    for key in ("alice", "bob", "carol"):
+        await backend.take(key, rate=1000.0, burst=1)
+    await asyncio.sleep(0.01)
+    await backend.take("dave", rate=1000.0, burst=1)
+
+    keys = backend._conn.execute("SELECT key FROM token_buckets").fetchall()
+    assert keys == [("dave",)]
+
+
+@pytest.mark.asyncio
+async def test_limiter_queues_then_rejects_when_queue_full():
+    limiter = ConcurrencyLimiter(max_in_flight=1, max_queue=1, queue_timeout=1.0)
+    assert await limiter.acquire()
+
+    queued = asyncio.create_task(limiter.acquire())
+    await asyncio.sleep(0)
+    assert limiter.queued == 1
+    assert await limiter.acquire() is False
+
+    limiter.release()
+    assert await queued is True
+    assert limiter.in_flight == 1
+
+
+@pytest.mark.asyncio
+async def test_limiter_times_out_queued_requests():
+    limiter = ConcurrencyLimiter(max_in_flight=1, max_queue=5, queue_timeout=0.01)
+    assert await limiter.acquire()
+    assert await limiter.acquire() is False
+    assert limiter.queued == 0
+
+
+async def _call(middleware, subject):
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "path": "/mcp/", "headers": [], "state": {"claims": {"sub": subject}}}
+    await middleware(scope, None, send)
+    return sent[0]
+
+
+@pytest.mark.asyncio
+async def test_middleware_rejects_with_retry_after():
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+
+    controller = AdmissionController(
+        InMemoryRateLimitBackend(), rate=0.5, burst=1, max_in_flight=0, max_queue=0, queue_timeout=0
+    )
+    middleware = AdmissionMiddleware(app, controller=controller)
+
+    assert (await _call(middleware, "alice"))["status"] == 200
+    rejected = await _call(middleware, "alice")
+    assert rejected["status"] == 429
+    assert (b"retry-after", b"2") in rejected["headers"]
+    assert (await _call(middleware, "bob"))["status"] == 200
+    assert controller.snapshot()["rejected_rate_limited"] == 1
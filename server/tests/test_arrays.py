@@ -0,0 +1,73 @@
+import base64
+
+import numpy as np
+import pytest
+
+from mcp.server.fastmcp import FastMCP
+from mcp_calculator.array_encoding import BinaryArray, from_numpy, to_numpy
+from mcp_calculator.execution import ToolExecutor
+from mcp_calculator.tools.arrays import register_array_tools
+
+
+def _binary(array: np.ndarray) -> dict:
+    return from_numpy(array, binary=True).model_dump()
+
+
+@pytest.fixture
+def server():
+    executor = ToolExecutor(thread_workers=2)
+    executor.start()
+    server = FastMCP(name="test")
+    register_array_tools(server, executor)
+    yield server
+    executor.shutdown()
+
+
+def test_binary_arrays_decode_in_place():
+    array = np.arange(6, dtype=np.int64).reshape(2, 3)
+    decoded = to_numpy(BinaryArray(**_binary(array)))
+
+    np.testing.assert_array_equal(decoded, array)
+    assert decoded.dtype == np.dtype("<i8")
+    # A read-only view over the decoded bytes, not a copy.
+    assert not decoded.flags.writeable and not decoded.flags.owndata
+
+
+def test_binary_arrays_are_validated():
+    data = base64.b64encode(np.zeros(3).tobytes()).decode()
+    with pytest.raises(ValueError, match="expected 32"):
+        to_numpy(BinaryArray(dtype="float64", shape=[4], data=data))
+    with pytest.raises(ValueError, match="shape"):
+        to_numpy(BinaryArray(dtype="float64", shape=[-3], data=data))
+    with pytest.raises(ValueError, match="base64"):
+        to_numpy(BinaryArray(dtype="float64", shape=[3], data="not base64!"))
+
+
+@pytest.mark.asyncio
+async def test_json_clients_get_json_results(server):
+    result = await server.call_tool("array_scale", {"values": [1, 2, 3], "factor": 2})
+    assert result.structuredContent == {"result": [2.0, 4.0, 6.0]}
+    assert result.content[0].text == "[2.0,4.0,6.0]"
+
+    _content, structured = await server.call_tool("array_sum", {"values": [1.5, 2.5]})
+    assert structured == {"result": 4.0}
+
+
+@pytest.mark.asyncio
+async def test_binary_arguments_get_binary_results(server):
+    a = np.arange(4, dtype=np.int64).reshape(2, 2)
+    result = await server.call_tool("array_add", {"a": _binary(a), "b": _binary(a)})
+
+    wire = result.structuredContent["result"]
+    assert (wire["encoding"], wire["dtype"], wire["shape"]) == ("base64", "int64", [2, 2])
+    np.testing.assert_array_equal(to_numpy(BinaryArray(**wire)), a + a)
+
+    # One binary argument is enough to opt in.
+    result = await server.call_tool("array_add", {"a": _binary(np.ones(3)), "b": [1, 2, 3]})
+    np.testing.assert_array_equal(to_numpy(BinaryArray(**result.structuredContent["result"])), [2.0, 3.0, 4.0])
+
+    _content, structured = await server.call_tool("array_sum", {"values": _binary(a)})
+    assert structured == {"result": 6.0}
+
+    with pytest.raises(Exception, match="Shapes differ"):
+        await server.call_tool("array_add", {"a": _binary(a), "b": [1.0]})
@@ -0,0 +1,80 @@
+import asyncio
+
+import pytest
+
+from mcp.server.fastmcp import FastMCP
+from mcp_calculator.cache import ResultCache, canonicalize
+from mcp_calculator.execution import ToolExecutor
+from mcp_calculator.tools.calculator import register_calculator_tools
+
+
+def test_canonicalize_merges_integral_floats():
+    assert canonicalize({"a": 2, "b": 3.5}) == canonicalize({"b": 3.5, "a": 2.0})
+    assert canonicalize(-0.0) != canonicalize(0.0)
+    assert canonicalize(float("nan")) == canonicalize(float("nan"))
+
+
+@pytest.mark.parametrize(
+    "first, second",
+    [
+        (True, 1),
+        (False, 0),
+        (True, 1.0),
+        ([True], [1]),
+        ({"flag": False}, {"flag": 0}),
+        (["nan"], float("nan")),
+        (["-0.0"], -0.0),
+        ([["a", 1]], {"a": 1}),
+    ],
+)
+def test_canonical_keys_do_not_collide(first, second):
+    assert canonicalize(first) != canonicalize(second)
+
+
+def test_lru_evicts_by_entry_count_and_bytes():
+    cache = ResultCache(max_entries=2)
+    for i in range(3):
+        cache.put(("tool", i), i)
+    assert cache.get(("tool", 0))[0] is False
+    assert cache.get(("tool", 2))[0] is True
+
+    cache = ResultCache(max_entries=100, max_bytes=400)
+    for i in range(10):
+        cache.put(("tool", i), "x" * 50)
+    snapshot = cache.snapshot()
+    assert snapshot["bytes"] <= 400
+    assert snapshot["evictions"] > 0
+
+
+@pytest.mark.asyncio
+async def test_pure_tools_hit_cache_and_cache_errors():
+    calls = []
+    cache = ResultCache()
+
+    @cache.pure
+    async def divide(a: float, b: float) -> float:
+        calls.append((a, b))
+        if b == 0:
+            raise ValueError("Cannot divide by zero")
+        return a / b
+
+    assert await divide(a=6, b=3) == 2
+    assert await divide(a=6.0, b=3.0) == 2
+    for _ in range(2):
+        with pytest.raises(ValueError, match="divide by zero"):
+            await divide(a=1, b=0)
+
+    assert calls == [(6, 3), (1, 0)]
+    assert cache.snapshot()["tools"]["divide"] == {"hits": 2, "misses": 2}
+
+
+@pytest.mark.asyncio
+async def test_arithmetic_tools_bypass_cache():
+    server = FastMCP(name="test")
+    cache = ResultCache()
+    register_calculator_tools(server, ToolExecutor(), cache)
+
+    await asyncio.gather(
+        *(server.call_tool("multiply", {"a": i % 5, "b": 2}) for i in range(50))
+    )
+    assert cache.snapshot()["entries"] == 0
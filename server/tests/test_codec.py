@@ -0,0 +1,33 @@
+from unittest.mock import patch
+
+import pytest
+
+from mcp_calculator import codec
+from mcp_calculator.responses import CodecJSONResponse
+
+
+def test_round_trip_is_compact_utf8():
+    payload = {"jsonrpc": "2.0", "id": 1, "result": {"values": [1.5, -2.0], "label": "π"}}
+    encoded = codec.dumps(payload)
+    assert isinstance(encoded, bytes)
+    assert b" " not in encoded and "π".encode() in encoded
+    assert codec.loads(encoded) == payload
+    assert codec.loads(encoded.decode()) == payload
+
+
+def test_values_rejected_by_fast_backends_fall_back_to_stdlib():
+    assert codec.loads(codec.dumps({"n": 2**70})) == {"n": 2**70}
+
+
+def test_missing_backend_falls_back_to_stdlib():
+    with patch.dict("sys.modules", {"orjson": None, "msgspec": None}):
+        assert codec._select("auto")[0] == "stdlib"
+        assert codec._select("orjson")[0] == "stdlib"
+    with pytest.raises(ValueError):
+        codec._select("yaml")
+
+
+def test_json_response_uses_codec():
+    response = CodecJSONResponse({"error": "Rate limit exceeded"}, status_code=429)
+    assert response.body == b'{"error":"Rate limit exceeded"}'
+    assert response.headers["content-type"] == "application/json"
@@ -0,0 +1,75 @@
+import gzip
+from unittest.mock import patch
+
+import pytest
+import zstandard
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse, StreamingResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from mcp_calculator import compression
+from mcp_calculator.compression import CompressionMiddleware, negotiate
+from mcp_calculator.responses import CodecJSONResponse
+
+LARGE = {"result": [i * 0.5 for i in range(2_000)]}
+
+
+def _client() -> TestClient:
+    async def large(_request):
+        return CodecJSONResponse(LARGE)
+
+    async def small(_request):
+        return PlainTextResponse("ok")
+
+    async def events(_request):
+        async def stream():
+            for i in range(3):
+                yield f"data: {'x' * 1000} {i}\n\n"
+        return StreamingResponse(stream(), media_type="text/event-stream")
+
+    app = Starlette(routes=[Route("/large", large), Route("/small", small), Route("/events", events)])
+    app.add_middleware(CompressionMiddleware, minimum_size=500)
+    return TestClient(app)
+
+
+def _raw(client: TestClient, path: str, accept_encoding: str):
+    # Read the undecoded body so the test sees what went over the wire.
+    with client.stream("GET", path, headers={"Accept-Encoding": accept_encoding}) as response:
+        return response, b"".join(response.iter_raw())
+
+
+def test_negotiation():
+    assert negotiate("gzip, deflate, zstd") == "zstd"
+    assert negotiate("gzip;q=1.0, zstd;q=0.5") == "gzip"
+    assert negotiate("zstd;q=0, gzip") == "gzip"
+    assert negotiate("*") == "zstd"
+    assert negotiate("*, zstd;q=0") == "gzip"
+    assert negotiate("br, identity") is None
+    assert negotiate("") is None
+    with patch.object(compression, "ENCODINGS", ("gzip",)):
+        assert negotiate("zstd, gzip;q=0.1") == "gzip"
+
+
+def test_large_responses_are_compressed():
+    client = _client()
+
+    response, body = _raw(client, "/large", "zstd, gzip")
+    assert response.headers["content-encoding"] == "zstd"
+    assert "accept-encoding" in response.headers["vary"].lower()
+    assert zstandard.ZstdDecompressor().decompressobj().decompress(body) == CodecJSONResponse(LARGE).body
+
+    response, body = _raw(client, "/large", "gzip")
+    assert response.headers["content-encoding"] == "gzip"
+    assert gzip.decompress(body) == CodecJSONResponse(LARGE).body
+
+    response, body = _raw(client, "/large", "identity")
+    assert "content-encoding" not in response.headers
+    assert body == CodecJSONResponse(LARGE).body
+
+
+@pytest.mark.parametrize("path", ["/small", "/events"])
+def test_small_responses_and_event_streams_are_not_compressed(path):
+    response, body = _raw(_client(), path, "zstd, gzip")
+    assert "content-encoding" not in response.headers
+    assert body.startswith(b"ok") or body.startswith(b"data: ")
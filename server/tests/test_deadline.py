@@ -0,0 +1,93 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+from mcp.server.lowlevel.server import request_ctx
+from mcp.types import RequestParams
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from mcp_calculator import deadline
+from mcp_calculator.deadline import DEADLINE_HEADER, DEADLINE_META_KEY, DeadlineMiddleware
+from mcp_calculator.execution import DeadlineExceededError, ExecutionPolicy, ToolExecutor
+
+
+@pytest.fixture
+def executor():
+    executor = ToolExecutor(thread_workers=2)
+    executor.start()
+    yield executor
+    executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_deadline_shortens_pool_timeouts(executor):
+    token = deadline._deadline.set(time.monotonic() + 0.05)
+    try:
+        with pytest.raises(DeadlineExceededError, match="deadline exceeded"):
+            await executor.run("slow", lambda: time.sleep(0.5), {}, policy=ExecutionPolicy.THREADPOOL, timeout=10)
+    finally:
+        deadline._deadline.reset(token)
+    assert executor.metrics.snapshot()["slow"]["timeouts"] == 1
+
+
+@pytest.mark.asyncio
+async def test_expired_calls_are_not_run(executor):
+    calls = []
+    # A deadline from the request's _meta, as pooled agent sessions send it.
+    meta = RequestParams.Meta(**{DEADLINE_META_KEY: 0})
+    token = request_ctx.set(SimpleNamespace(meta=meta))
+    try:
+        with pytest.raises(DeadlineExceededError, match="before it started"):
+            await executor.run("add", lambda: calls.append(1), {})
+    finally:
+        request_ctx.reset(token)
+    assert calls == []
+
+    await executor.run("add", lambda: calls.append(1), {})
+    assert calls == [1]
+
+
+def test_header_and_meta_deadlines():
+    assert deadline.remaining() is None
+    assert deadline.parse_timeout("1.5") == 1.5
+    assert deadline.parse_timeout("soon") is None and deadline.parse_timeout("nan") is None
+
+    token = deadline._deadline.set(time.monotonic() + 10)
+    meta_token = request_ctx.set(SimpleNamespace(meta=RequestParams.Meta(**{DEADLINE_META_KEY: 2})))
+    try:
+        # The tighter of the two applies.
+        assert 1.9 < deadline.remaining() <= 2
+    finally:
+        request_ctx.reset(meta_token)
+        deadline._deadline.reset(token)
+
+
+def test_middleware_cancels_requests_past_their_deadline():
+    seen = []
+
+    async def slow(_request):
+        seen.append(deadline.remaining())
+        await asyncio.sleep(1)
+        return PlainTextResponse("late")
+
+    app = Starlette(routes=[Route("/mcp/", slow, methods=["POST"])])
+    app.add_middleware(DeadlineMiddleware)
+    client = TestClient(app)
+
+    started = time.monotonic()
+    response = client.post("/mcp/", headers={DEADLINE_HEADER: "0.05"})
+    assert response.status_code == 504
+    assert time.monotonic() - started < 0.5
+    assert 0 < seen[0] <= 0.05
+
+    response = client.post("/mcp/", headers={DEADLINE_HEADER: "0"})
+    assert response.status_code == 504 and len(seen) == 1
+
+    assert client.post("/mcp/", headers={DEADLINE_HEADER: "5"}).text == "late"
+    assert seen[-1] is not None
+    assert client.post("/mcp/").text == "late"
+    assert seen[-1] is None
@@ -0,0 +1,155 @@
+import os
+import threading
+import time
+
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from mcp.server.fastmcp import FastMCP
+from mcp_calculator.execution import ExecutionPolicy, ToolExecutor, ToolTimeoutError
+
+
+def square(x: int) -> dict:
+    return {"value": x * x, "pid": os.getpid()}
+
+
+@pytest.fixture
+def executor():
+    executor = ToolExecutor(thread_workers=2, process_workers=1)
+    executor.start()
+    yield executor
+    executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_threadpool_runs_off_event_loop_thread(executor):
+    result = await executor.run(
+        "ident", lambda: threading.get_ident(), {}, policy=ExecutionPolicy.THREADPOOL
+    )
+    assert result != threading.get_ident()
+    assert executor.metrics.snapshot()["ident"]["calls"] == 1
+
+
+@pytest.mark.asyncio
+async def test_processpool_runs_in_worker_process(executor):
+    result = await executor.run("square", square, {"x": 7}, policy=ExecutionPolicy.PROCESSPOOL)
+    assert result["value"] == 49
+    assert result["pid"] != os.getpid()
+
+
+@pytest.mark.asyncio
+async def test_pool_errors_are_reraised_and_counted(executor):
+    def fail():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError, match="boom"):
+        await executor.run("fail", fail, {}, policy=ExecutionPolicy.THREADPOOL)
+    assert executor.metrics.snapshot()["fail"]["errors"] == 1
+
+
+@pytest.mark.asyncio
+async def test_timeout_raises_tool_timeout_error(executor):
+    with pytest.raises(ToolTimeoutError):
+        await executor.run(
+            "slow", lambda: time.sleep(0.5), {}, policy=ExecutionPolicy.THREADPOOL, timeout=0.05
+        )
+    assert executor.metrics.snapshot()["slow"]["timeouts"] == 1
+
+
+@pytest.mark.asyncio
+async def test_shut_down_executor_does_not_restart_its_pools(executor):
+    executor.shutdown()
+
+    with pytest.raises(RuntimeError, match="shut down"):
+        await executor.run("square", square, {"x": 2}, policy=ExecutionPolicy.THREADPOOL)
+    assert executor._thread_pool is None and executor._process_pool is None
+    # Inline tools need no pool.
+    assert (await executor.run("square", square, {"x": 2}))["value"] == 4
+
+    executor.start()
+    assert (await executor.run("square", square, {"x": 3}, policy=ExecutionPolicy.THREADPOOL))["value"] == 9
+
+
+def test_processpool_policy_rejects_nested_functions():
+    executor = ToolExecutor()
+
+    with pytest.raises(ValueError, match="module-level"):
+        @executor.policy(ExecutionPolicy.PROCESSPOOL)
+        def nested(x: int) -> int:
+            return x
+
+
+@pytest.mark.asyncio
+async def test_policy_wrapper_keeps_tool_schema(executor):
+    server = FastMCP(name="test")
+    server.tool()(executor.policy(ExecutionPolicy.PROCESSPOOL, timeout=5)(square))
+
+    tools = await server.list_tools()
+    assert tools[0].name == "square"
+    assert list(tools[0].inputSchema["properties"]) == ["x"]
+
+    content = await server.call_tool("square", {"x": 3})
+    assert '"value": 9' in content[0].text
+
+
+def test_metrics_endpoint_reports_tool_timings():
+    authenticate = AsyncMock(return_value=("token", {"sub": "alice"}))
+    with patch("mcp_calculator.auth.TokenVerifier.authenticate", new=authenticate):
+        from starlette.testclient import TestClient
+        from mcp_calculator.app import app
+
+        with TestClient(app, base_url="http://localhost:8000") as client:
+            response = client.post(
+                "/mcp/",
+                json={
+                    "jsonrpc": "2.0",
+                    "id": 1,
+                    "method": "tools/call",
+                    "params": {"name": "add", "arguments": {"a": 1, "b": 2}},
+                },
+                headers={"Accept": "application/json, text/event-stream"},
+            )
+            assert response.json()["result"]["structuredContent"] == {"result": 3.0}
+
+            stats = client.get("/metrics").json()["tools"]["add"]
+            assert stats["calls"] >= 1
+            assert "queue_wait_avg_ms" in stats and "run_time_avg_ms" in stats
+
+
+def test_metrics_endpoint_requires_token():
+    from starlette.testclient import TestClient
+    from mcp_calculator.app import app
+
+    # No lifespan: the session manager can only run once per process.
+    client = TestClient(app, base_url="http://localhost:8000")
+    assert client.get("/metrics").status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_disconnect_cancels_in_flight_mcp_request():
+    import asyncio
+    from mcp_calculator.app import DisconnectMiddleware
+
+    cancelled = asyncio.Event()
+
+    async def slow_app(scope, receive, send):
+        assert (await receive())["body"] == b'{"id": 1}'
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    messages = [
+        {"type": "http.request", "body": b'{"id": 1}', "more_body": False},
+        {"type": "http.disconnect"},
+    ]
+
+    async def receive():
+        if len(messages) == 1:
+            await asyncio.sleep(0.05)
+        return messages.pop(0)
+
+    scope = {"type": "http", "path": "/mcp/"}
+    await asyncio.wait_for(DisconnectMiddleware(slow_app)(scope, receive, AsyncMock()), 1)
+    assert cancelled.is_set()
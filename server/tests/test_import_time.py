@@ -0,0 +1,42 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+PACKAGE_ROOT = Path(__file__).resolve().parents[1]
+
+# Cold-start import budget in seconds, roughly 1.5x the time recorded when it
+# was set (~0.6s, mostly the mcp SDK). Wall-clock budgets depend on the
+# machine, so the check only runs when IMPORT_TIME_BUDGET_SCALE is set (to 1
+# on a machine like the one it was recorded on, higher on slower ones).
+APP_IMPORT_BUDGET = 1.0
+BUDGET_SCALE = os.environ.get("IMPORT_TIME_BUDGET_SCALE")
+
+
+def _cumulative_us(importtime_output: str, module: str) -> int:
+    for line in importtime_output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _self_us, cumulative_us, name = line.removeprefix("import time:").split("|")
+        if name.strip() == module:
+            return int(cumulative_us)
+    raise AssertionError(f"{module} not found in importtime output")
+
+
+@pytest.mark.skipif(BUDGET_SCALE is None, reason="set IMPORT_TIME_BUDGET_SCALE to check the import budget")
+def test_server_cold_import_time_within_budget():
+    samples = []
+    for _ in range(3):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", "import mcp_calculator.app"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=PACKAGE_ROOT,
+        )
+        samples.append(_cumulative_us(result.stderr, "mcp_calculator.app") / 1e6)
+
+    budget = APP_IMPORT_BUDGET * float(BUDGET_SCALE)
+    assert min(samples) <= budget, f"importing mcp_calculator.app took {min(samples):.2f}s (budget {budget:.2f}s)"
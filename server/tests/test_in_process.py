@@ -0,0 +1,74 @@
+import time
+
+import jwt
+import pytest
+from mcp import ClientSession
+from mcp.server.auth.middleware.auth_context import get_access_token
+from mcp.server.fastmcp import FastMCP
+from mcp.shared.exceptions import McpError
+
+from mcp_calculator.admission import AdmissionController, InMemoryRateLimitBackend
+from mcp_calculator.auth import TokenVerifier
+from mcp_calculator.in_process import InProcessTransport
+
+
+def _unverified(_self, token):
+    return jwt.decode(token, options={"verify_signature": False})
+
+
+def _headers(**claims):
+    token = jwt.encode(claims, "test-key-the-verifier-does-not-check", algorithm="HS256")
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def transport(monkeypatch):
+    monkeypatch.setattr(TokenVerifier, "verify_token", _unverified)
+    server = FastMCP(name="test")
+
+    @server.tool()
+    def whoami() -> str:
+        return get_access_token().subject
+
+    admission = AdmissionController(
+        backend=InMemoryRateLimitBackend(),
+        rate=1,
+        burst=2,
+        max_in_flight=4,
+        max_queue=4,
+        queue_timeout=1,
+    )
+    return InProcessTransport(server, TokenVerifier(), admission)
+
+
+@pytest.mark.asyncio
+async def test_tool_calls_run_as_the_session_subject(transport):
+    async with transport.connect(_headers(sub="alice")) as (read, write):
+        async with ClientSession(read, write) as session:
+            await session.initialize()
+            result = await session.call_tool("whoami", {})
+            assert result.structuredContent == {"result": "alice"}
+            assert transport.snapshot() == {"sessions": 1, "opened": 1}
+
+            # Two calls use up alice's bucket.
+            await session.call_tool("whoami", {})
+            with pytest.raises(McpError, match="Rate limit exceeded"):
+                await session.call_tool("whoami", {})
+    assert transport.admission.snapshot()["admitted"] == 2
+    assert transport.snapshot()["sessions"] == 0
+
+    with pytest.raises(ValueError, match="Authorization"):
+        async with transport.connect({}):
+            pass
+
+
+@pytest.mark.asyncio
+async def test_calls_are_refused_once_the_token_expires(transport, monkeypatch):
+    expires_at = int(time.time()) + 60
+    async with transport.connect(_headers(sub="bob", exp=expires_at)) as (read, write):
+        async with ClientSession(read, write) as session:
+            await session.initialize()
+            assert (await session.call_tool("whoami", {})).structuredContent == {"result": "bob"}
+            monkeypatch.setattr("mcp_calculator.in_process.time.time", lambda: expires_at)
+            with pytest.raises(McpError, match="Token expired"):
+                await session.call_tool("whoami", {})
@@ -0,0 +1,52 @@
+import json
+import logging
+
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from mcp_calculator.logs import ACCESS_LOGGER, AccessFormatter, AccessLogMiddleware, RateLimitFilter, stage
+
+
+def make_record(msg, args=(), level=logging.ERROR):
+    return logging.LogRecord("mcp_calculator.auth", level, __file__, 1, msg, args, None)
+
+
+def test_repeated_errors_are_rate_limited(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr("mcp_calculator.logs.time.monotonic", lambda: now[0])
+    limiter = RateLimitFilter(burst=2, interval=60)
+
+    passed = [limiter.filter(make_record("Token verification failed: %s", (f"expired {i}",))) for i in range(5)]
+    assert passed == [True, True, False, False, False]
+    # Other templates and info records have their own budget.
+    assert limiter.filter(make_record("Auth failed: %s", ("x",)))
+    assert all(limiter.filter(make_record("ok", level=logging.INFO)) for _ in range(5))
+
+    now[0] = 61
+    record = make_record("Token verification failed: %s", ("expired 5",))
+    assert limiter.filter(record)
+    assert record.getMessage() == "Token verification failed: expired 5 (3 similar messages dropped)"
+
+
+def test_access_log_has_one_json_line_with_stage_timings(caplog):
+    async def tool(_request):
+        with stage("auth"):
+            pass
+        for _ in range(2):
+            with stage("tool"):
+                pass
+        return PlainTextResponse("42")
+
+    app = Starlette(routes=[Route("/mcp/", tool, methods=["POST"])])
+    app.add_middleware(AccessLogMiddleware)
+
+    with caplog.at_level(logging.INFO, logger=ACCESS_LOGGER):
+        assert TestClient(app).post("/mcp/").text == "42"
+
+    [record] = [r for r in caplog.records if r.name == ACCESS_LOGGER]
+    line = json.loads(AccessFormatter().format(record))
+    assert line["method"] == "POST" and line["path"] == "/mcp/" and line["status"] == 200
+    assert line["bytes"] == 2 and line["duration_ms"] >= 0
+    assert set(line["stages"]) == {"auth", "tool"}
@@ -0,0 +1,112 @@
+import numpy as np
+import pytest
+from mcp.server.fastmcp import FastMCP
+from mcp.server.fastmcp.exceptions import ToolError
+
+from mcp_calculator.array_encoding import BinaryArray, from_numpy, to_numpy
+from mcp_calculator.execution import ToolExecutor
+from mcp_calculator.tools import pipeline as pipeline_module
+from mcp_calculator.tools.pipeline import POOLED_MIN_SIZE, PipelineStep, register_pipeline_tools, run_pipeline
+
+
+@pytest.fixture
+def executor():
+    executor = ToolExecutor(thread_workers=2)
+    executor.start()
+    yield executor
+    executor.shutdown()
+
+
+@pytest.fixture
+def server(executor):
+    server = FastMCP(name="test")
+    register_pipeline_tools(server, executor)
+    return server
+
+
+@pytest.mark.asyncio
+async def test_steps_run_in_dependency_order_and_return_every_value(server):
+    steps = [
+        {"name": "result", "op": "divide", "args": ["t2", 4]},
+        {"name": "t2", "op": "add", "args": ["t1", 2]},
+        {"name": "t1", "op": "multiply", "args": [3, 2]},
+        {"name": "scaled", "op": "multiply", "args": [[1, 2, 3], "t1"]},
+        {"name": "total", "op": "sum", "args": ["scaled"]},
+    ]
+    result = await server.call_tool("pipeline", {"steps": steps})
+
+    assert result.structuredContent == {
+        "result": 2.0,
+        "t2": 8.0,
+        "t1": 6.0,
+        "scaled": [6.0, 12.0, 18.0],
+        "total": 36.0,
+    }
+    assert result.content[0].text == '{"result":2.0,"t2":8.0,"t1":6.0,"scaled":[6.0,12.0,18.0],"total":36.0}'
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "steps, error",
+    [
+        ([], "at least one step"),
+        ([{"name": "a", "op": "add", "args": [1, 2]}] * 2, "Duplicate step names: a"),
+        ([{"name": "a", "op": "add", "args": ["b", 1]}], "unknown step 'b'"),
+        ([{"name": "a", "op": "sum", "args": [1, 2]}], "sum takes 1 operands, got 2"),
+        (
+            [{"name": "a", "op": "add", "args": ["b", 1]}, {"name": "b", "op": "add", "args": ["a", 1]}],
+            "cycle: a -> b -> a",
+        ),
+        ([{"name": "a", "op": "divide", "args": [1, 0]}], "Step 'a': Cannot divide by zero"),
+        ([{"name": "a", "op": "add", "args": [[1, 2], [1, 2, 3]]}], r"Step 'a': Shapes differ: \[2\] and \[3\]"),
+        ([{"name": "a", "op": "multiply", "args": [1e308, 10]}], "Step 'a': Result is not a finite number"),
+        ([{"name": "a", "op": "multiply", "args": [[1e308, 1.0], 10]}], "Step 'a': Result is not a finite number"),
+        ([{"name": "a", "op": "sum", "args": [[1e308, 1e308]]}], "Step 'a': Result is not a finite number"),
+        (
+            [{"name": "a", "op": "multiply", "args": [1e308, 10]}, {"name": "b", "op": "subtract", "args": ["a", "a"]}],
+            "Step 'a': Result is not a finite number",
+        ),
+    ],
+)
+async def test_invalid_pipelines_are_refused(server, steps, error):
+    with pytest.raises(ToolError, match=error):
+        await server.call_tool("pipeline", {"steps": steps})
+
+
+@pytest.mark.asyncio
+async def test_independent_scalar_steps_are_vectorized(executor, monkeypatch):
+    calls = 0
+
+    def add(left, right):
+        nonlocal calls
+        calls += 1
+        return np.add(left, right)
+
+    monkeypatch.setitem(pipeline_module._BINARY_OPS, "add", add)
+    steps = [PipelineStep(name=f"x{i}", op="add", args=[i, 1]) for i in range(100)]
+    steps.append(PipelineStep(name="y", op="add", args=["x0", "x99"]))
+
+    values = await run_pipeline(steps, executor)
+
+    assert [float(values[f"x{i}"]) for i in range(100)] == [i + 1.0 for i in range(100)]
+    assert float(values["y"]) == 101.0
+    # One call for the 100 independent steps, one for the step after them.
+    assert calls == 2
+
+
+@pytest.mark.asyncio
+async def test_large_array_branches_run_on_the_pool_in_binary(server, executor):
+    a = np.arange(POOLED_MIN_SIZE, dtype=np.int64)
+    binary = from_numpy(a, binary=True).model_dump()
+    steps = [
+        {"name": "doubled", "op": "multiply", "args": [binary, 2]},
+        {"name": "squared", "op": "multiply", "args": [binary, binary]},
+        {"name": "both", "op": "add", "args": ["doubled", "squared"]},
+    ]
+    result = await server.call_tool("pipeline", {"steps": steps})
+
+    both = to_numpy(BinaryArray(**result.structuredContent["both"]))
+    np.testing.assert_array_equal(both, a * 2 + a * a)
+    assert "float64 array of shape [65536] (binary" in result.content[0].text
+    assert executor.metrics.snapshot()["pipeline.multiply"]["calls"] == 2
+    assert executor.metrics.snapshot()["pipeline.add"]["calls"] == 1
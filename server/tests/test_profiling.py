@@ -0,0 +1,104 @@
+import time
+
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from mcp_calculator.profiling import (
+    PROFILE_HEADER,
+    PROFILES_PATH,
+    ProfileStore,
+    ProfilingMiddleware,
+    StackSampler,
+    profiles_routes,
+)
+
+ADMIN = "profile:admin"
+
+
+def busy_square(n):
+    deadline = time.monotonic() + 0.1
+    while time.monotonic() < deadline:
+        pass
+    return n * n
+
+
+class FakeAuth:
+    """Puts the claims named by the Authorization header in the request state, like AuthMiddleware."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            authorization = dict(scope["headers"]).get(b"authorization", b"").decode()
+            scope.setdefault("state", {})["claims"] = {"sub": "u", "scope": authorization}
+        await self.app(scope, receive, send)
+
+
+def make_client(tmp_path, sample_rate=0.0):
+    store = ProfileStore(str(tmp_path), max_profiles=2)
+
+    async def square(request):
+        return PlainTextResponse(str(busy_square(int(request.path_params["n"]))))
+
+    list_profiles, get_profile = profiles_routes(store, ADMIN)
+    app = Starlette(
+        routes=[
+            Route("/square/{n}", square),
+            Route(PROFILES_PATH, list_profiles),
+            Route(PROFILES_PATH + "/{profile_id}", get_profile),
+        ]
+    )
+    app.add_middleware(ProfilingMiddleware, sampler=StackSampler(interval=0.001), store=store, sample_rate=sample_rate, admin_scope=ADMIN)
+    app.add_middleware(FakeAuth)
+    return TestClient(app), store
+
+
+def test_admin_header_profiles_one_request(tmp_path):
+    client, store = make_client(tmp_path)
+
+    assert client.get("/square/7", headers={PROFILE_HEADER: "1", "Authorization": "read"}).text == "49"
+    assert store.list() == []
+
+    assert client.get("/square/7", headers={PROFILE_HEADER: "1", "Authorization": ADMIN}).text == "49"
+    [profile] = client.get(PROFILES_PATH, headers={"Authorization": ADMIN}).json()["profiles"]
+    assert profile["route"] == "/square/{n}" and profile["method"] == "GET" and profile["status"] == 200
+    assert profile["samples"] > 0 and profile["seconds"] >= 0.1
+
+    stacks = client.get(f"{PROFILES_PATH}/{profile['id']}", headers={"Authorization": ADMIN}).text
+    hottest = stacks.splitlines()[0]
+    # Collapsed format: root-first frames joined by ";", then the sample count.
+    frames, count = hottest.rsplit(" ", 1)
+    assert frames.endswith("test_profiling:busy_square") and int(count) > 0
+
+
+def test_profiles_need_the_admin_scope(tmp_path):
+    client, _ = make_client(tmp_path)
+    assert client.get(PROFILES_PATH, headers={"Authorization": "read"}).status_code == 403
+    assert client.get(f"{PROFILES_PATH}/not-a-profile", headers={"Authorization": ADMIN}).status_code == 404
+
+
+def test_profile_listing_validates_its_limit(tmp_path):
+    client, store = make_client(tmp_path, sample_rate=1.0)
+    for n in range(2):
+        client.get(f"/square/{n}")
+
+    def listing(limit):
+        return client.get(PROFILES_PATH, params={"limit": limit}, headers={"Authorization": ADMIN})
+
+    for bad in ("ten", "0", "-1"):
+        assert listing(bad).status_code == 400
+    assert [profile["id"] for profile in listing("1").json()["profiles"]] == [store.list()[0]["id"]]
+    assert len(listing("1000000").json()["profiles"]) == 2
+
+
+def test_sampled_profiles_are_capped(tmp_path):
+    client, store = make_client(tmp_path, sample_rate=1.0)
+    for n in range(3):
+        client.get(f"/square/{n}")
+
+    profiles = store.list()
+    assert len(profiles) == 2
+    assert len(list(tmp_path.iterdir())) == 4
@@ -0,0 +1,101 @@
+import asyncio
+import time
+from typing import Generator
+
+import pytest
+from mcp.server.fastmcp import FastMCP
+from mcp.shared.memory import create_connected_server_and_client_session
+
+from mcp_calculator.execution import ExecutionPolicy, Progress, ToolExecutor, ToolTimeoutError
+from mcp_calculator.tools.number_theory import count_primes
+
+
+@pytest.fixture
+def executor():
+    executor = ToolExecutor(thread_workers=2)
+    executor.start()
+    yield executor
+    executor.shutdown()
+
+
+def run_chunks(chunks):
+    try:
+        while True:
+            next(chunks)
+    except StopIteration as stop:
+        return stop.value
+
+
+def test_count_primes_matches_known_counts():
+    # Small segments exercise the segment boundaries.
+    for n, expected in [(0, 0), (2, 1), (10, 4), (100, 25), (10**6, 78498)]:
+        assert run_chunks(count_primes(n, chunk=max(7, n // 100))) == expected
+        assert run_chunks(count_primes(n)) == expected
+    with pytest.raises(ValueError, match="at most"):
+        run_chunks(count_primes(10**11))
+
+
+@pytest.mark.asyncio
+async def test_chunked_tool_reports_progress(executor):
+    server = FastMCP(name="test")
+
+    @server.tool()
+    @executor.policy(ExecutionPolicy.THREADPOOL)
+    def count_to(n: int) -> Generator[Progress, None, int]:
+        """Count to n."""
+        for i in range(1, n + 1):
+            yield Progress(i, n, f"at {i}")
+        return n
+
+    reports = []
+
+    async def on_progress(progress, total, message):
+        reports.append((progress, total, message))
+
+    async with create_connected_server_and_client_session(server) as client:
+        [tool] = (await client.list_tools()).tools
+        assert tool.outputSchema["properties"]["result"]["type"] == "integer"
+        result = await client.call_tool("count_to", {"n": 3}, progress_callback=on_progress)
+
+    assert result.structuredContent == {"result": 3}
+    assert reports == [(1, 3, "at 1"), (2, 3, "at 2"), (3, 3, "at 3")]
+    assert executor.metrics.snapshot()["count_to"]["calls"] == 1
+
+
+@pytest.mark.asyncio
+async def test_cancelled_chunked_tool_stops_between_chunks(executor):
+    chunks = []
+
+    def busy() -> Generator[Progress, None, None]:
+        while True:
+            time.sleep(0.01)
+            chunks.append(1)
+            yield Progress(len(chunks))
+
+    call = asyncio.create_task(executor.run("busy", busy, {}, policy=ExecutionPolicy.THREADPOOL))
+    await asyncio.sleep(0.1)
+    call.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await call
+    await asyncio.sleep(0.02)
+    ran = len(chunks)
+    await asyncio.sleep(0.1)
+
+    assert len(chunks) == ran
+    assert executor.metrics.snapshot()["busy"]["cancelled"] == 1
+
+    chunks.clear()
+    with pytest.raises(ToolTimeoutError, match="timed out"):
+        await executor.run("busy", busy, {}, policy=ExecutionPolicy.THREADPOOL, timeout=0.05)
+    await asyncio.sleep(0.05)
+    ran = len(chunks)
+    await asyncio.sleep(0.1)
+    assert len(chunks) == ran
+
+
+def test_chunked_tools_must_use_the_thread_pool():
+    with pytest.raises(ValueError, match="thread pool"):
+        @ToolExecutor().policy(ExecutionPolicy.INLINE)
+        def chunked() -> Generator[Progress, None, int]:
+            yield Progress(1)
+            return 1
@@ -0,0 +1,156 @@
+import asyncio
+import socket
+import time
+from unittest.mock import patch
+
+import jwt
+import pytest
+import pytest_asyncio
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+from mcp_calculator.auth import OIDC_AUDIENCE, OIDC_ISSUER, TokenVerifier
+from mcp_calculator.cache_backends import (
+    InMemoryCacheBackend,
+    RedisCacheBackend,
+    RedisError,
+    SharedCache,
+    SQLiteCacheBackend,
+    create_cache_backend,
+)
+
+
+async def _read_command(reader: asyncio.StreamReader) -> list[bytes]:
+    count = int((await reader.readline())[1:])
+    args = []
+    for _ in range(count):
+        length = int((await reader.readline())[1:])
+        args.append((await reader.readexactly(length + 2))[:-2])
+    return args
+
+
+@pytest_asyncio.fixture
+async def redis_stand_in():
+    """A local server speaking enough of the Redis protocol for the cache backend."""
+    password = b"secret"
+    data: dict[bytes, tuple[bytes, float]] = {}
+    commands = []
+
+    async def handle(reader, writer):
+        authenticated = False
+        try:
+            while not reader.at_eof():
+                args = await _read_command(reader)
+                name = args[0].upper()
+                commands.append(name.decode())
+                if name == b"AUTH":
+                    authenticated = args[-1] == password
+                    writer.write(b"+OK\r\n" if authenticated else b"-WRONGPASS invalid password\r\n")
+                elif not authenticated:
+                    writer.write(b"-NOAUTH Authentication required.\r\n")
+                elif name == b"SELECT":
+                    writer.write(b"+OK\r\n")
+                elif name == b"SET":
+                    data[args[1]] = (args[2], time.monotonic() + int(args[4]) / 1000)
+                    writer.write(b"+OK\r\n")
+                elif name == b"GET":
+                    value, expires = data.get(args[1], (None, 0.0))
+                    if value is None or expires <= time.monotonic():
+                        writer.write(b"$-1\r\n")
+                    else:
+                        writer.write(b"$%d\r\n%s\r\n" % (len(value), value))
+                elif name == b"DEL":
+                    writer.write(b":%d\r\n" % (data.pop(args[1], None) is not None))
+                else:
+                    writer.write(b"-ERR unknown command\r\n")
+                await writer.drain()
+        except (ValueError, asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    yield f"redis://:secret@127.0.0.1:{port}/2", commands
+    server.close()
+    await server.wait_closed()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("kind", ["memory", "sqlite", "redis"])
+async def test_backends_store_values_until_they_expire(kind, tmp_path, redis_stand_in):
+    redis_url, commands = redis_stand_in
+    backend = {
+        "memory": lambda: InMemoryCacheBackend(),
+        "sqlite": lambda: SQLiteCacheBackend(str(tmp_path / "cache.db")),
+        "redis": lambda: create_cache_backend(redis_url),
+    }[kind]()
+
+    await backend.set("a", b"1", ttl=60)
+    await backend.set("b", b"\r\n binary \x00", ttl=0.05)
+    assert await backend.get("a") == b"1"
+    assert await backend.get("b") == b"\r\n binary \x00"
+    await asyncio.sleep(0.1)
+    assert await backend.get("b") is None
+    await backend.delete("a")
+    assert await backend.get("a") is None
+    assert await backend.get("missing") is None
+
+    if kind == "sqlite":
+        # Another worker opening the same file sees the same entries.
+        await backend.set("c", b"shared", ttl=60)
+        assert await SQLiteCacheBackend(str(tmp_path / "cache.db")).get("c") == b"shared"
+    if kind == "redis":
+        # One connection, authenticated and switched to the URL's database once.
+        assert commands[:2] == ["AUTH", "SELECT"]
+        assert commands.count("AUTH") == 1
+        await backend.close()
+
+
+@pytest.mark.asyncio
+async def test_unreachable_cache_server_counts_as_a_miss(redis_stand_in):
+    redis_url, _ = redis_stand_in
+    with pytest.raises(RedisError, match="WRONGPASS"):
+        await create_cache_backend(redis_url.replace("secret", "wrong")).get("a")
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    cache = SharedCache(RedisCacheBackend(port=port, timeout=0.2))
+    await cache.set("a", {"x": 1}, ttl=60)
+    assert await cache.get("a") is None
+    assert cache.snapshot()["errors"] == 2
+
+
+@pytest.mark.asyncio
+async def test_workers_share_the_jwks_and_verified_tokens(tmp_path):
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    jwk = jwt.algorithms.RSAAlgorithm.to_jwk(private_key.public_key(), as_dict=True)
+    jwks = {"keys": [{**jwk, "kid": "key-1", "use": "sig", "alg": "RS256"}]}
+    token = jwt.encode(
+        {"sub": "alice", "aud": OIDC_AUDIENCE, "iss": OIDC_ISSUER, "exp": int(time.time()) + 600},
+        private_key,
+        algorithm="RS256",
+        headers={"kid": "key-1"},
+    )
+    path = str(tmp_path / "cache.db")
+    # Two workers, each with its own connection to the host's cache file.
+    first, second = (TokenVerifier(cache=SharedCache(SQLiteCacheBackend(path))) for _ in range(2))
+
+    with patch.object(first.jwks_client, "fetch_data", return_value=jwks) as fetch:
+        assert (await first.authenticate_header(f"Bearer {token}"))[1]["sub"] == "alice"
+    assert fetch.call_count == 1
+
+    # The second worker verifies nothing itself.
+    with patch.object(TokenVerifier, "verify_token", side_effect=AssertionError):
+        assert (await second.authenticate_header(f"Bearer {token}"))[1]["sub"] == "alice"
+
+    # A new token signed with the same key only needs the shared JWKS.
+    other = jwt.encode(
+        {"sub": "bob", "aud": OIDC_AUDIENCE, "iss": OIDC_ISSUER},
+        private_key,
+        algorithm="RS256",
+        headers={"kid": "key-1"},
+    )
+    with patch.object(second.jwks_client, "fetch_data", side_effect=AssertionError):
+        assert (await second.authenticate_header(f"Bearer {other}"))[1]["sub"] == "bob"
+    assert second.cache.snapshot()["hits"] == 2
@@ -0,0 +1,184 @@
+import importlib
+import json
+import socket
+import threading
+import time
+from unittest.mock import patch
+
+import httpx
+import jwt
+import pytest
+import uvicorn
+
+import mcp_calculator.app
+import mcp_calculator.config
+from mcp_calculator.event_store import MemoryEventStore
+
+PROTOCOL_VERSION = "2025-11-25"
+SSE_HEADERS = {"Accept": "application/json, text/event-stream", "MCP-Protocol-Version": PROTOCOL_VERSION}
+
+
+def _token(sub: str) -> str:
+    return jwt.encode({"sub": sub, "iss": "https://issuer/"}, "secret", algorithm="HS256")
+
+
+def _unverified(_self, token):
+    return jwt.decode(token, options={"verify_signature": False})
+
+
+def _serve(monkeypatch, env: dict):
+    """Serves the app, configured by `env`, on a local port."""
+    for name, value in env.items():
+        monkeypatch.setenv(name, value)
+    importlib.reload(mcp_calculator.config)
+    module = importlib.reload(mcp_calculator.app)
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(module.app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    with patch("mcp_calculator.auth.TokenVerifier.verify_token", _unverified):
+        thread.start()
+        while not server.started:
+            time.sleep(0.01)
+        yield f"http://127.0.0.1:{port}/mcp/"
+        server.should_exit = True
+        thread.join(5)
+
+    for name in env:
+        monkeypatch.delenv(name)
+    importlib.reload(mcp_calculator.config)
+    importlib.reload(mcp_calculator.app)
+
+
+@pytest.fixture
+def stateful_url(monkeypatch):
+    """Serves the app in stateful mode on a local port."""
+    yield from _serve(monkeypatch, {"MCP_STATEFUL": "true"})
+
+
+@pytest.fixture
+def stateless_sse_url(monkeypatch):
+    """Serves the app in stateless mode, answering over SSE, on a local port."""
+    yield from _serve(monkeypatch, {"MCP_JSON_RESPONSE": "false"})
+
+
+def _events(response):
+    """Yields (event id, parsed data) for each SSE event in `response`."""
+    event_id, data = None, []
+    for line in response.iter_lines():
+        if line.startswith("id:"):
+            event_id = line.removeprefix("id:").strip()
+        elif line.startswith("data:"):
+            data.append(line.removeprefix("data:").strip())
+        elif not line:
+            if event_id is not None or data:
+                payload = "\n".join(data)
+                yield event_id, json.loads(payload) if payload else None
+            event_id, data = None, []
+
+
+def _call(client, url, headers, request_id):
+    return client.stream(
+        "POST",
+        url,
+        headers=headers,
+        json={
+            "jsonrpc": "2.0",
+            "id": request_id,
+            "method": "tools/call",
+            "params": {"name": "add", "arguments": {"a": 2, "b": 3}},
+        },
+    )
+
+
+def test_stateful_session_resumes_and_is_bound_to_its_principal(stateful_url):
+    alice = {**SSE_HEADERS, "Authorization": f"Bearer {_token('alice')}"}
+    with httpx.Client(timeout=5) as client:
+        response = client.post(
+            stateful_url,
+            headers=alice,
+            json={
+                "jsonrpc": "2.0",
+                "id": 1,
+                "method": "initialize",
+                "params": {
+                    "protocolVersion": PROTOCOL_VERSION,
+                    "capabilities": {},
+                    "clientInfo": {"name": "test", "version": "0"},
+                },
+            },
+        )
+        session_id = response.headers["mcp-session-id"]
+        alice["mcp-session-id"] = session_id
+        client.post(stateful_url, headers=alice, json={"jsonrpc": "2.0", "method": "notifications/initialized"})
+
+        # The result arrives on an SSE stream that starts with a priming event.
+        with _call(client, stateful_url, alice, 2) as response:
+            events = list(_events(response))
+        priming_id = events[0][0]
+        result_id, result = events[-1]
+        assert result["result"]["structuredContent"] == {"result": 5.0}
+
+        # Reconnecting after the priming event replays the result.
+        with client.stream("GET", stateful_url, headers={**alice, "Last-Event-ID": priming_id}) as response:
+            replayed_id, replayed = next(event for event in _events(response) if event[1] is not None)
+        assert (replayed_id, replayed) == (result_id, result)
+
+        # Another principal cannot use the session.
+        bob = {**alice, "Authorization": f"Bearer {_token('bob')}"}
+        with _call(client, stateful_url, bob, 3) as response:
+            assert response.status_code == 404
+
+        metrics = client.get(stateful_url.removesuffix("mcp/") + "metrics", headers=alice).json()
+        assert metrics["streamable_http"]["mode"] == "stateful"
+        assert metrics["streamable_http"]["sessions"] == 1
+        assert metrics["streamable_http"]["event_store"]["replays"] == 1
+
+
+def test_stateless_sse_delivers_progress(stateless_sse_url):
+    headers = {**SSE_HEADERS, "Authorization": f"Bearer {_token('alice')}"}
+    request = {
+        "jsonrpc": "2.0",
+        "id": 1,
+        "method": "tools/call",
+        "params": {"name": "prime_count", "arguments": {"n": 20_000_000}, "_meta": {"progressToken": "p1"}},
+    }
+    with httpx.Client(timeout=30) as client:
+        with client.stream("POST", stateless_sse_url, headers=headers, json=request) as response:
+            messages = [data for _, data in _events(response) if data is not None]
+
+    *progress, result = messages
+    assert result["result"]["structuredContent"] == {"result": 1270607}
+    assert [p["method"] for p in progress] == ["notifications/progress"] * 3
+    assert [p["params"]["progress"] for p in progress] == [8388607, 16777215, 20_000_000]
+    assert all(p["params"]["progressToken"] == "p1" and p["params"]["total"] == 20_000_000 for p in progress)
+
+
+@pytest.mark.asyncio
+async def test_event_store_is_bounded_and_replays_one_stream():
+    store = MemoryEventStore(max_events=4)
+    sent = []
+
+    async def send(event):
+        sent.append(event.message)
+
+    priming = await store.store_event("a", None)
+    await store.store_event("a", "a1")
+    await store.store_event("b", "b1")
+    await store.store_event("a", "a2")
+    assert await store.replay_events_after(priming, send) == "a"
+    assert sent == ["a1", "a2"]
+
+    await store.store_event("b", "b2")
+    assert store.snapshot()["events"] == 4 and store.evictions == 1
+    assert await store.replay_events_after(priming, send) is None
+
+
+def test_session_count_is_dropped_if_the_sdk_table_is_missing(monkeypatch):
+    app = mcp_calculator.app
+    assert app._open_sessions() == len(app.server.session_manager._server_instances)
+
+    monkeypatch.setattr(app.server, "_session_manager", object())
+    assert app._open_sessions() is None